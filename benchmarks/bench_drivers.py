@@ -0,0 +1,149 @@
+"""End-to-end throughput of the SenseID reader adapters, without hardware.
+
+Each adapter (`SenseidNurapy`, `SenseidImpinjLlrp`, `SenseidReaderRedRcp`,
+...) is instantiated around a fake vendor driver from `fake_drivers.py`
+that pushes synthetic reports at a configurable rate. For every adapter
+and mode the harness reports the sustained tags/s delivered to the user
+callback, the latency from driver hand-off to user callback (p50 / p99 /
+max) and CPU time per tag.
+
+    python benchmarks/bench_drivers.py                          # all adapters, max rate
+    python benchmarks/bench_drivers.py --driver NURAPY --rate 5000 --batch 50
+    python benchmarks/bench_drivers.py --failure-rate 0.01 --json drivers.json
+
+`--rate 0` (default) pushes as fast as the adapter accepts, which gives
+the adapter's capacity on this machine.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+from fake_drivers import ADAPTERS, FakeProfile, create_adapter, install_vendor_shims  # noqa: E402
+
+RAIN_DRIVERS = ('NURAPY', 'REDRCP', 'IMPINJ_LLRP', 'ZEBRA_LLRP', 'IMPINJ_IOT')
+
+
+def rain_reports(n: int):
+    """Mixed RAIN population: standard SenseID, senseRead, Farsens and plain EPCs."""
+    reports = [(bytes.fromhex(epc), None) for epc in corpus.rain_known(n)]
+    reports += [(bytes.fromhex(epc), bytes.fromhex(mem)) for epc, mem in corpus.senseread(n)]
+    reports += [(bytes.fromhex(epc), bytes.fromhex(mem)) for epc, mem in corpus.farsens(n)]
+    reports += [(bytes.fromhex(epc), None) for epc in corpus.rain_foreign(n)]
+    return reports
+
+
+def ble_reports(n: int):
+    return [(bytes.fromhex(b), None) for b in corpus.ble_known(n) + corpus.ble_foreign(n)]
+
+
+def nfc_reports(n: int):
+    return [(bytes(area), None) for area in corpus.nfc_ndef(n)]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))]
+
+
+def run_case(driver: str, mode_name: str, profile: FakeProfile, duration_s: float) -> dict:
+    from senseid.readers import SenseidReaderMode
+
+    adapter, fake = create_adapter(driver, profile)
+    latencies = []
+    lock = threading.Lock()
+    perf_counter = time.perf_counter
+
+    def on_tag(tag):
+        latency = perf_counter() - fake.emit_time
+        with lock:
+            latencies.append(latency)
+
+    adapter.connect('127.0.0.1')
+    mode = SenseidReaderMode(mode_name)
+    if mode in adapter.get_supported_modes():
+        adapter.set_mode(mode)
+    cpu_start = time.process_time()
+    start = perf_counter()
+    adapter.start_inventory_async(notification_callback=on_tag)
+    time.sleep(duration_s)
+    adapter.stop_inventory_async()
+    elapsed = perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    adapter.disconnect()
+
+    with lock:
+        delivered = sorted(latencies)
+    tags = len(delivered)
+    return {
+        'tags': tags,
+        'tags_per_s': tags / elapsed,
+        'p50_us': _percentile(delivered, 50) * 1e6,
+        'p99_us': _percentile(delivered, 99) * 1e6,
+        'max_us': (delivered[-1] if delivered else 0.0) * 1e6,
+        'callback_cpu_us_per_tag': fake.adapter_cpu_s / tags * 1e6 if tags and fake.adapter_cpu_s else None,
+        'process_cpu_us_per_tag': cpu / tags * 1e6 if tags else None,
+        'failures_injected': fake.failures_injected,
+        'adapter_errors': len(fake.errors),
+        'first_error': repr(fake.errors[0]) if fake.errors else None,
+    }
+
+
+def cases(drivers):
+    for driver in drivers:
+        if driver in RAIN_DRIVERS:
+            yield driver, 'SENSEID'
+            yield driver, 'SENSEREAD'
+        elif driver == 'ACR1552':
+            yield driver, 'NDEF'
+        else:
+            yield driver, 'SENSEID'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--driver', action='append', choices=list(ADAPTERS),
+                        help='adapter to run (repeatable, default: all)')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per case (default: %(default)s)')
+    parser.add_argument('--rate', type=float, default=0.0, help='reports/s pushed by the fake, 0 = max')
+    parser.add_argument('--batch', type=int, default=1, help='reports per driver callback')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds between air time and callback')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='probability of a failing batch')
+    parser.add_argument('--population', type=int, default=200, help='distinct tags per family')
+    parser.add_argument('--json', metavar='PATH', help='write results as JSON')
+    args = parser.parse_args()
+
+    drivers = args.driver or list(ADAPTERS)
+    install_vendor_shims(drivers)
+    populations = {'rain': rain_reports(args.population), 'ble': ble_reports(args.population),
+                   'nfc': nfc_reports(args.population)}
+
+    print(f'{"adapter":<12} {"mode":<10} {"tags/s":>11} {"p50 us":>9} {"p99 us":>9} {"max us":>10} '
+          f'{"cb cpu/tag":>10} {"cpu/tag":>8} {"errors":>7}')
+    results = {}
+    for driver, mode in cases(drivers):
+        reports = populations['ble' if driver == 'KLSBLELCR' else 'nfc' if driver == 'ACR1552' else 'rain']
+        profile = FakeProfile(rate_hz=args.rate, batch_size=args.batch, latency_s=args.latency,
+                              failure_rate=args.failure_rate, reports=reports)
+        r = run_case(driver, mode, profile, args.duration)
+        results[f'{driver}/{mode}'] = r
+        cb_cpu = f'{r["callback_cpu_us_per_tag"]:10.1f}' if r['callback_cpu_us_per_tag'] is not None else f'{"-":>10}'
+        cpu = f'{r["process_cpu_us_per_tag"]:8.1f}' if r['process_cpu_us_per_tag'] is not None else f'{"-":>8}'
+        print(f'{driver:<12} {mode:<10} {r["tags_per_s"]:11,.0f} {r["p50_us"]:9.1f} {r["p99_us"]:9.1f} '
+              f'{r["max_us"]:10.1f} {cb_cpu} {cpu} {r["adapter_errors"]:7d}')
+        if r['first_error']:
+            print(f'    first adapter error: {r["first_error"]}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
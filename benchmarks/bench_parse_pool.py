@@ -0,0 +1,135 @@
+"""Scaling of the process-pool parse stage (senseid.parsers.pool).
+
+Parses a mixed corpus (SenseID Rain, senseRead with User memory, Farsens
+and BLE) inline on one core, then through a SenseidParsePool with 1, 2,
+... N worker processes, and reports tags/s and the speed-up over inline
+parsing. Every run checks that the results arrive in submission order and
+match the inline parsers.
+
+    python benchmarks/bench_parse_pool.py                  # 1..cpu_count workers
+    python benchmarks/bench_parse_pool.py --workers 1 2 4 8 --batch-size 512
+    python benchmarks/bench_parse_pool.py --compact        # skip building SenseidTag objects
+
+Run it with the package importable (`pip install -e .`). The main process
+still builds the tag objects and runs the callback, so the speed-up levels
+off once that becomes the bottleneck; --compact shows the decode side alone.
+"""
+import argparse
+import os
+import platform
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+
+from senseid.parsers import SenseidTechnologies  # noqa: E402
+from senseid.parsers.ble import SenseidBleTag  # noqa: E402
+from senseid.parsers.dispatch import parse_rain_report  # noqa: E402
+from senseid.parsers.pool import SenseidParsePool, materialize  # noqa: E402
+
+Report = Tuple[SenseidTechnologies, bytes, Optional[bytes]]
+
+
+def build_inputs(n: int) -> List[Report]:
+    """`n` reports, a quarter of each family, interleaved."""
+    quarter = max(1, n // 4)
+    rain = [(SenseidTechnologies.RAIN, bytes.fromhex(epc), None) for epc in corpus.rain_known(quarter)]
+    senseread = [(SenseidTechnologies.RAIN, bytes.fromhex(epc), bytes.fromhex(user_mem))
+                 for epc, user_mem in corpus.senseread(quarter)]
+    farsens = [(SenseidTechnologies.RAIN, bytes.fromhex(epc), bytes.fromhex(user_mem))
+               for epc, user_mem in corpus.farsens(quarter)]
+    ble = [(SenseidTechnologies.BLE, bytes.fromhex(adv), None) for adv in corpus.ble_known(quarter)]
+    return [report for group in zip(rain, senseread, farsens, ble) for report in group]
+
+
+def parse_inline(report: Report):
+    technology, epc, user_mem = report
+    if technology == SenseidTechnologies.BLE:
+        return SenseidBleTag(bytearray(epc))
+    return parse_rain_report(bytearray(epc), user_mem)
+
+
+def _signature(tag) -> tuple:
+    data = tuple((d.magnitude, d.value) for d in tag.data) if tag.data is not None else None
+    return type(tag).__name__, tag.id, tag.name, tag.sn, data
+
+
+def bench_inline(inputs: List[Report]) -> float:
+    start = time.perf_counter()
+    for report in inputs:
+        parse_inline(report)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def bench_pool(inputs: List[Report], workers: int, batch_size: int, compact: bool,
+               expected: List[tuple]) -> float:
+    """Tags/s through a pool of `workers` processes, after a warm-up that
+    starts the workers and maps the shared-memory segments."""
+    received: List[Tuple[int, object]] = []
+    done = threading.Event()
+
+    def on_batch(results, contexts):
+        received.extend(zip(contexts, results))
+        if len(received) >= len(inputs):
+            done.set()
+
+    with SenseidParsePool(workers=workers, batch_size=batch_size) as pool:
+        warm_up = pool.open_stream(lambda results, contexts: None, compact=True)
+        for technology, epc, user_mem in inputs[:workers * batch_size * 4]:
+            warm_up.submit(technology, epc, user_mem)
+        warm_up.close()
+
+        stream = pool.open_stream(on_batch, compact=compact)
+        start = time.perf_counter()
+        for index, (technology, epc, user_mem) in enumerate(inputs):
+            stream.submit(technology, epc, user_mem, index)
+        stream.flush()
+        done.wait()
+        elapsed = time.perf_counter() - start
+        stream.close()
+
+    if [index for index, _ in received] != list(range(len(inputs))):
+        raise AssertionError('results out of order')
+    for (index, result), signature in zip(received, expected):
+        tag = materialize(result) if compact else result
+        if _signature(tag) != signature:
+            raise AssertionError(f'result {index} differs from the inline parser: {_signature(tag)} != {signature}')
+    return len(inputs) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', type=int, default=200000, help='reports per run (default: %(default)s)')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        help='worker counts to run (default: 1, 2, 4, ... up to cpu_count)')
+    parser.add_argument('--batch-size', type=int, default=256, help='reports per batch (default: %(default)s)')
+    parser.add_argument('--compact', action='store_true', help='deliver compact tuples, no SenseidTag objects')
+    args = parser.parse_args()
+
+    cpu_count = os.cpu_count() or 1
+    worker_counts = args.workers
+    if not worker_counts:
+        worker_counts, n = [], 1
+        while n < cpu_count:
+            worker_counts.append(n)
+            n *= 2
+        worker_counts.append(cpu_count)
+
+    inputs = build_inputs(args.n)
+    expected = [_signature(parse_inline(report)) for report in inputs]
+    print(f'Python {platform.python_version()} ({platform.machine()}), {cpu_count} CPUs, '
+          f'{len(inputs):,} reports, batch {args.batch_size}{", compact" if args.compact else ""}')
+    inline = bench_inline(inputs)
+    print(f'{"workers":<8} {"tags/s":>12} {"speed-up":>9}')
+    print(f'{"inline":<8} {inline:12,.0f} {1:9.2f}')
+    for workers in worker_counts:
+        rate = bench_pool(inputs, workers, args.batch_size, args.compact, expected)
+        print(f'{workers:<8} {rate:12,.0f} {rate / inline:9.2f}')
+
+
+if __name__ == '__main__':
+    main()
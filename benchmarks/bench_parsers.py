@@ -0,0 +1,201 @@
+"""Micro-benchmarks for the SenseID parsers.
+
+For every tag family and input class it reports throughput (tags/s),
+per-tag latency (mean / p50 / p99) and what each parsed tag keeps alive
+in memory (tracemalloc blocks and bytes per tag). It also times
+`import senseid` in a fresh interpreter and the load of each YAML
+definition file.
+
+    python benchmarks/bench_parsers.py                       # print results
+    python benchmarks/bench_parsers.py --json before.json    # save a baseline
+    python benchmarks/bench_parsers.py --baseline before.json  # compare
+
+Run it with the package importable (`pip install -e .`). Numbers are only
+comparable on the same machine and Python version.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from importlib.resources import files
+from typing import Callable, Dict, List, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import corpus  # noqa: E402
+
+DEFINITION_FILES = {
+    'senseid_rain.yaml': ('senseid.parsers.rain.yaml', 'SenseidRainDef'),
+    'senseid_senseread.yaml': ('senseid.parsers.senseread.yaml', 'SenseidSenseReadDef'),
+    'senseid_farsens.yaml': ('senseid.parsers.farsens.yaml', 'SenseidFarsensDef'),
+    'senseid_ble.yaml': ('senseid.parsers.ble.yaml', 'SenseidBleDef'),
+    'senseid_nfc.yaml': ('senseid.parsers.nfc.yaml', 'SenseidNfcDef'),
+}
+
+
+def _percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def bench_case(parse: Callable, inputs: List, repeat: int, latency_samples: int) -> Dict[str, float]:
+    """Run `parse` over `inputs`. Throughput is the best of `repeat` full
+    passes; latency is timed call by call on the first `latency_samples`
+    inputs; memory is what the parsed results keep alive."""
+    for item in inputs[:100]:  # warm-up
+        parse(item)
+
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        for item in inputs:
+            parse(item)
+        best = min(best, time.perf_counter() - start)
+
+    latencies = []
+    perf_counter = time.perf_counter
+    for item in inputs[:latency_samples]:
+        start = perf_counter()
+        parse(item)
+        latencies.append(perf_counter() - start)
+    latencies.sort()
+
+    sample = inputs[:min(len(inputs), 2000)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [parse(item) for item in sample]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del results
+
+    return {
+        'tags_per_s': len(inputs) / best,
+        'mean_us': sum(latencies) / len(latencies) * 1e6,
+        'p50_us': _percentile(latencies, 50) * 1e6,
+        'p99_us': _percentile(latencies, 99) * 1e6,
+        'blocks_per_tag': blocks / len(sample),
+        'bytes_per_tag': size / len(sample),
+    }
+
+
+def parser_cases(n: int) -> Dict[str, tuple]:
+    from senseid.parsers.ble import SenseidBleTag
+    from senseid.parsers.farsens import SenseidFarsensTag
+    from senseid.parsers.nfc import parse_nfc_bulk_sample, parse_nfc_ndef
+    from senseid.parsers.nfc.yaml import SENSEID_NFC_DEF
+    from senseid.parsers.rain import SenseidRainTag
+    from senseid.parsers.senseread import SenseidSenseReadTag
+
+    nfc_type = SENSEID_NFC_DEF.default_type
+    return {
+        'rain/known': (SenseidRainTag, corpus.rain_known(n)),
+        'rain/unknown-type': (SenseidRainTag, corpus.rain_unknown_type(n)),
+        'rain/non-senseid': (SenseidRainTag, corpus.rain_foreign(n)),
+        'senseread/fresh': (lambda r: SenseidSenseReadTag(r[0], r[1]), corpus.senseread(n)),
+        'senseread/stale': (lambda r: SenseidSenseReadTag(r[0], r[1]), corpus.senseread_stale(n)),
+        'senseread/no-user-mem': (lambda r: SenseidSenseReadTag(r[0]), corpus.senseread(n)),
+        'farsens/known': (lambda r: SenseidFarsensTag(r[0], r[1]), corpus.farsens(n)),
+        'ble/known': (SenseidBleTag, corpus.ble_known(n)),
+        'ble/non-senseid': (SenseidBleTag, corpus.ble_foreign(n)),
+        'nfc/ndef': (lambda a: parse_nfc_ndef(a, uid='E004010000000001'), corpus.nfc_ndef(n)),
+        'nfc/bulk-sample': (lambda v: parse_nfc_bulk_sample(v, 0, nfc_type, uid='E004010000000001'),
+                            corpus.nfc_bulk(n)),
+    }
+
+
+def bench_import(repeat: int) -> float:
+    """Best wall time of `import senseid` plus every parser, in a fresh interpreter."""
+    code = ('import time; t = time.perf_counter(); '
+            'import senseid, senseid.parsers.rain, senseid.parsers.senseread, senseid.parsers.farsens, '
+            'senseid.parsers.ble, senseid.parsers.nfc; print(time.perf_counter() - t)')
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip()))
+    return min(times)
+
+
+def bench_definitions(repeat: int) -> Dict[str, float]:
+    """Best time to read, YAML-parse and build the definition objects of each file."""
+    import importlib
+    import yaml
+    definitions = files('senseid').joinpath('definitions')
+    results = {}
+    for filename, (module_name, class_name) in DEFINITION_FILES.items():
+        def_class = getattr(importlib.import_module(module_name), class_name)
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            def_class.from_dict(yaml.safe_load(definitions.joinpath(filename).read_text()))
+            best = min(best, time.perf_counter() - start)
+        results[filename] = best
+    return results
+
+
+def _delta(value: float, baseline: float, higher_is_better: bool) -> str:
+    if not baseline:
+        return ''
+    change = (value - baseline) / baseline * 100.0
+    better = change > 0 if higher_is_better else change < 0
+    return f' ({change:+.1f}%{"" if abs(change) < 5 else (" better" if better else " WORSE")})'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-n', type=int, default=20000, help='inputs per case (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed passes per case (default: %(default)s)')
+    parser.add_argument('--latency-samples', type=int, default=5000)
+    parser.add_argument('--filter', default='', help='only run cases whose name contains this')
+    parser.add_argument('--json', metavar='PATH', help='write results as JSON')
+    parser.add_argument('--baseline', metavar='PATH', help='compare against a previous --json output')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'import_s': bench_import(args.repeat),
+        'definitions_s': bench_definitions(args.repeat),
+        'parsers': {},
+    }
+
+    print(f'Python {results["python"]} ({results["machine"]})')
+    print(f'import senseid + parsers: {results["import_s"] * 1e3:8.1f} ms'
+          + _delta(results['import_s'], baseline.get('import_s'), False))
+    for filename, seconds in results['definitions_s'].items():
+        print(f'load {filename:<24}: {seconds * 1e3:8.2f} ms'
+              + _delta(seconds, baseline.get('definitions_s', {}).get(filename), False))
+    print()
+    print(f'{"case":<24} {"tags/s":>12} {"mean us":>9} {"p50 us":>9} {"p99 us":>9} {"blk/tag":>8} {"B/tag":>8}')
+    for name, (parse, inputs) in parser_cases(args.n).items():
+        if args.filter not in name:
+            continue
+        r = bench_case(parse, inputs, args.repeat, args.latency_samples)
+        results['parsers'][name] = r
+        print(f'{name:<24} {r["tags_per_s"]:12,.0f} {r["mean_us"]:9.2f} {r["p50_us"]:9.2f} {r["p99_us"]:9.2f} '
+              f'{r["blocks_per_tag"]:8.1f} {r["bytes_per_tag"]:8.0f}'
+              + _delta(r['tags_per_s'], baseline.get('parsers', {}).get(name, {}).get('tags_per_s'), True))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
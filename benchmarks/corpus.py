@@ -0,0 +1,186 @@
+"""Synthetic, reproducible inputs for the SenseID parser benchmarks.
+
+Every corpus is built from the YAML definitions actually loaded by the SDK,
+so new tag types are picked up automatically. Raw values are chosen so the
+calibrated result lands inside each channel's valid_range (when it has one),
+which makes the parsers walk their full decode path instead of bailing out
+early.
+"""
+import random
+import struct
+from typing import List, Optional, Tuple
+
+from senseid.parsers.ble.yaml import SENSEID_BLE_DEF, SenseidValueType as BleValueType
+from senseid.parsers.farsens.yaml import SENSEID_FARSENS_DEF
+from senseid.parsers.nfc.yaml import SENSEID_NFC_DEF
+from senseid.parsers.rain.yaml import SENSEID_RAIN_DEF, SenseidTransformType, SenseidValueType
+from senseid.parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
+
+# Formats of the value types the parsers actually consume (uint8/int8 are
+# declared in some YAMLs but carry no bytes in the decoders).
+_STRUCT_FORMATS = {
+    'uint16': '<H',
+    'int16': '<h',
+    'uint16be': '>H',
+    'int16be': '>h',
+    'float': '<f',
+}
+
+
+def _raw_value(data_def, rng: random.Random):
+    value_type = data_def.type.value
+    transform = data_def.transform.value
+    c = data_def.coefficients
+    valid_range = getattr(data_def, 'valid_range', None)
+    if transform == SenseidTransformType.THERMISTOR_BETA.value:
+        if value_type == SenseidValueType.FLOAT.value:
+            return c[1] * rng.uniform(0.5, 2.0)  # thermistor resistance around R0
+        return rng.randint(1024, 3072)  # ADC12 of a 10k half bridge
+    if transform == SenseidTransformType.LDR.value:
+        return (rng.randint(0, 3) << 12) | rng.randint(1, 0x0FFF)
+    if valid_range:
+        target = rng.uniform(valid_range[0], valid_range[1])
+    else:
+        target = rng.uniform(-20, 60)
+    if transform == SenseidTransformType.LINEAR.value and c[1]:
+        raw = (target - c[0]) / c[1]
+    else:
+        raw = target
+    if value_type == 'float':
+        return raw
+    lo, hi = (0, 0xFFFF) if value_type.startswith('uint') else (-0x8000, 0x7FFF)
+    return min(max(int(round(raw)), lo), hi)
+
+
+def _payload(data_defs, rng: random.Random) -> bytes:
+    out = bytearray()
+    for data_def in data_defs:
+        value_type = data_def.type.value
+        if value_type == BleValueType.PADDING.value:
+            out += b'\x00'
+            continue
+        fmt = _STRUCT_FORMATS.get(value_type)
+        if fmt is not None:
+            out += struct.pack(fmt, _raw_value(data_def, rng))
+    return bytes(out)
+
+
+def rain_known(n: int, seed: int = 1) -> List[str]:
+    """Standard SenseID EPCs (sensor data in the EPC) of every known type."""
+    rng = random.Random(seed)
+    types = sorted(SENSEID_RAIN_DEF.types.items())
+    pen = bytes(SENSEID_RAIN_DEF.pen_header)
+    epcs = []
+    for i in range(n):
+        type_id, type_def = types[i % len(types)]
+        fw_version = type_def.fw_versions[0] if type_def.fw_versions else 1
+        epc = pen + bytes([type_id, fw_version]) + rng.getrandbits(24).to_bytes(3, 'big') \
+            + _payload(type_def.data_def, rng)
+        epcs.append(epc.hex().upper())
+    return epcs
+
+
+def rain_unknown_type(n: int, seed: int = 2) -> List[str]:
+    """SenseID PEN with a type byte missing from senseid_rain.yaml."""
+    rng = random.Random(seed)
+    unknown = [t for t in range(1, 0xFF) if t not in SENSEID_RAIN_DEF.types]
+    pen = bytes(SENSEID_RAIN_DEF.pen_header)
+    return [(pen + bytes([unknown[i % len(unknown)], 1]) + rng.randbytes(6)).hex().upper()
+            for i in range(n)]
+
+
+def rain_foreign(n: int, seed: int = 3) -> List[str]:
+    """Plain commercial EPCs (e.g. Impinj/NXP 0xE2... tags)."""
+    rng = random.Random(seed)
+    return [(b'\xE2\x80' + rng.randbytes(10)).hex().upper() for _ in range(n)]
+
+
+def _senseread_epc(type_id: int, rng: random.Random) -> str:
+    pen = bytes(SENSEID_SENSEREAD_DEF.pen_header)
+    return (pen + bytes([type_id, SENSEID_SENSEREAD_DEF.epc_family_marker])
+            + rng.getrandbits(40).to_bytes(5, 'big')).hex().upper()
+
+
+def senseread(n: int, seed: int = 4) -> List[Tuple[str, str]]:
+    """(EPC, User-memory) pairs with a fresh datagram for every senseRead type."""
+    rng = random.Random(seed)
+    types = sorted(SENSEID_SENSEREAD_DEF.types.items())
+    word_bytes = SENSEID_SENSEREAD_DEF.word_count * 2
+    reports = []
+    for i in range(n):
+        type_id, type_def = types[i % len(types)]
+        fw_version = type_def.fw_versions[0] if type_def.fw_versions else 1
+        user_mem = bytes([fw_version]) + _payload(type_def.data_def, rng)
+        user_mem = user_mem.ljust(word_bytes, b'\x00') + bytes([rng.getrandbits(8)])  # + QoS byte
+        reports.append((_senseread_epc(type_id, rng), user_mem.hex().upper()))
+    return reports
+
+
+def senseread_stale(n: int, seed: int = 5) -> List[Tuple[str, str]]:
+    """senseRead reports whose datagram was not refreshed (fw_version in skip_when)."""
+    rng = random.Random(seed)
+    types = sorted(SENSEID_SENSEREAD_DEF.types)
+    stale_versions = SENSEID_SENSEREAD_DEF.skip_when.fw_version or [0]
+    word_bytes = SENSEID_SENSEREAD_DEF.word_count * 2
+    return [(_senseread_epc(types[i % len(types)], rng),
+             (bytes([stale_versions[i % len(stale_versions)]]) + rng.randbytes(word_bytes)).hex().upper())
+            for i in range(n)]
+
+
+def farsens(n: int, seed: int = 6) -> List[Tuple[str, str]]:
+    """(EPC, User-memory) pairs for every Farsens productId."""
+    rng = random.Random(seed)
+    types = sorted(SENSEID_FARSENS_DEF.types.items())
+    pen = bytes(SENSEID_FARSENS_DEF.pen_header)
+    word_bytes = SENSEID_FARSENS_DEF.word_count * 2
+    reports = []
+    for i in range(n):
+        product_id, type_def = types[i % len(types)]
+        fw_version = type_def.fw_versions[0] if type_def.fw_versions else 1
+        epc = pen + product_id.to_bytes(5, 'big') + rng.getrandbits(16).to_bytes(2, 'big')
+        header = bytes([SENSEID_FARSENS_DEF.preamble, fw_version]).ljust(SENSEID_FARSENS_DEF.data_index, b'\x00')
+        user_mem = (header + _payload(type_def.data_def, rng)).ljust(word_bytes, b'\x00')
+        reports.append((epc.hex().upper(), user_mem.hex().upper()))
+    return reports
+
+
+def ble_known(n: int, seed: int = 7) -> List[str]:
+    """SenseID BLE advertisements: MAC(6) + AD header(2) + local name + type/fw + payload."""
+    rng = random.Random(seed)
+    types = sorted(SENSEID_BLE_DEF.types.items())
+    local_name = SENSEID_BLE_DEF.local_name.encode()
+    beacons = []
+    for i in range(n):
+        type_id, type_def = types[i % len(types)]
+        fw_version = type_def.fw_versions[0] if type_def.fw_versions else 1
+        header = (rng.randbytes(6) + bytes([len(local_name) + 1, 0x09]) + local_name).ljust(14, b'\x00')
+        beacons.append((header + bytes([type_id, fw_version]) + _payload(type_def.data_def, rng)).hex().upper())
+    return beacons
+
+
+def ble_foreign(n: int, seed: int = 8) -> List[str]:
+    """Advertisements from non-SenseID BLE devices."""
+    rng = random.Random(seed)
+    return [(rng.randbytes(6) + bytes([0x05, 0x09]) + b'Beac' + rng.randbytes(12)).hex().upper()
+            for _ in range(n)]
+
+
+def nfc_ndef(n: int, seed: int = 9, uid: Optional[str] = None) -> List[bytearray]:
+    """Type 5 NDEF areas holding a URI record with 'VAL1,VAL2' in its fragment."""
+    rng = random.Random(seed)
+    type_def = SENSEID_NFC_DEF.types[SENSEID_NFC_DEF.default_type]
+    areas = []
+    for _ in range(n):
+        values = ','.join(str(rng.randint(0, 0xFFFF)) for _ in type_def.data_def)
+        url = f'192.168.4.1:80/index.html#{values}'.encode()
+        record = bytes([0xD1, 0x01, len(url) + 1, 0x55, 0x03]) + url
+        area = bytes([0xE1, 0x40, 0x40, 0x01, 0x03, len(record)]) + record + b'\xFE'
+        areas.append(bytearray(area))
+    return areas
+
+
+def nfc_bulk(n: int, seed: int = 10) -> List[List[int]]:
+    """Raw uint16 groups as read back from the NTAG5 bulk area."""
+    rng = random.Random(seed)
+    group_size = len(SENSEID_NFC_DEF.types[SENSEID_NFC_DEF.default_type].data_def)
+    return [[rng.randint(0, 0xFFFF) for _ in range(group_size)] for _ in range(n)]
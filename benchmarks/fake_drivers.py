@@ -0,0 +1,393 @@
+"""In-process fakes of the vendor driver objects wrapped by the SenseID
+reader adapters (NurAPY, RedRcp, ImpinjLlrp, ZebraLlrp, ImpinjIot,
+KlSbleLcr, Acr1552).
+
+Each fake implements the part of the driver surface the adapter uses and,
+once inventory is started, pushes synthetic reports from its own thread at
+a configurable rate, batch size, latency and failure rate - the same way
+the real libraries call back from their reader threads. `create_adapter()`
+builds the real `senseid.readers.*` adapter class around a fake, so the
+adapter code under test is exactly what ships.
+
+If a vendor package is not installed, `install_vendor_shims()` registers a
+placeholder module for it so the adapter module can still be imported; the
+placeholders are never used at runtime because the fake replaces the driver.
+"""
+import importlib
+import random
+import sys
+import threading
+import time
+import types
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Tuple
+
+# Driver -> (adapter module, adapter class, vendor driver class it instantiates, vendor modules it imports)
+ADAPTERS = {
+    'NURAPY': ('senseid.readers.nurapy', 'SenseidNurapy', 'NurAPY',
+               ['nurapy', 'nurapy.protocol', 'nurapy.protocol.command',
+                'nurapy.protocol.command.inv_read_config', 'nurapy.protocol.command.module_setup']),
+    'REDRCP': ('senseid.readers.redrcp', 'SenseidReaderRedRcp', 'RedRcp', ['redrcp']),
+    'IMPINJ_LLRP': ('senseid.readers.impinj_llrp', 'SenseidImpinjLlrp', 'ImpinjLlrp', ['impinj_llrp']),
+    'ZEBRA_LLRP': ('senseid.readers.zebra_llrp', 'SenseidZebraLlrp', 'ZebraLlrp', ['zebra_llrp']),
+    'IMPINJ_IOT': ('senseid.readers.impinj_iot', 'SenseidImpinjIot', 'ImpinjIot', ['impinj_iot']),
+    'KLSBLELCR': ('senseid.readers.klsblelcr', 'SenseidKlSbleLcr', 'KlSbleLcr', ['driver_sble_py_klsblelcf']),
+    'ACR1552': ('senseid.readers.acr1552', 'SenseidAcr1552', 'Acr1552',
+                ['driver_snfc_py_acr1552', 'driver_snfc_py_acr1552.acr1552']),
+}
+
+
+@dataclass
+class FakeProfile:
+    """How a fake reader behaves once inventory starts."""
+    rate_hz: float = 2000.0           # reports per second, 0 = as fast as possible
+    batch_size: int = 1               # reports per driver callback (NUR/LLRP deliver batches)
+    latency_s: float = 0.0            # delay between "air" time and the callback
+    failure_rate: float = 0.0         # probability a batch hits the driver's failure pattern
+    reports: List[Tuple[bytes, Optional[bytes]]] = field(default_factory=list)  # (EPC, User memory)
+    seed: int = 0
+
+
+class _PlaceholderMeta(type):
+    def __getattr__(cls, name):
+        return cls  # enum members, nested constants, ...
+
+
+class _Placeholder(metaclass=_PlaceholderMeta):
+    """Stand-in for any name imported from a missing vendor package."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class _PlaceholderModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        placeholder = _PlaceholderMeta(name, (_Placeholder,), {})
+        setattr(self, name, placeholder)
+        return placeholder
+
+
+def install_vendor_shims(driver_names=None):
+    """Make the adapter modules importable even if their vendor package is
+    not installed."""
+    for name in (driver_names or ADAPTERS):
+        modules = ADAPTERS[name][3]
+        try:
+            importlib.import_module(modules[-1])
+            continue
+        except ImportError:
+            pass
+        for module_name in modules:
+            if module_name not in sys.modules:
+                module = _PlaceholderModule(module_name)
+                module.__path__ = []  # behave as a package for dotted imports
+                sys.modules[module_name] = module
+
+
+class _FakeDriverBase:
+    """Common report pump. Subclasses implement `_deliver(batch)`."""
+
+    def __init__(self, profile: FakeProfile):
+        self.profile = profile
+        self.callback: Optional[Callable] = None
+        self.emit_time = 0.0           # perf_counter() when the current batch was handed to the adapter
+        self.adapter_cpu_s = 0.0       # thread CPU spent inside the adapter callback
+        self.reports_pushed = 0
+        self.failures_injected = 0
+        self.errors: List[BaseException] = []
+        self._rng = random.Random(profile.seed)
+        self._index = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # -- driver surface shared by all fakes --
+    def connect(self, *args, **kwargs):
+        return True
+
+    def disconnect(self):
+        self.stop()
+
+    def set_notification_callback(self, callback):
+        self.callback = callback
+
+    def start(self):
+        if self._thread is not None:
+            return True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._pump, daemon=True, name=f'{type(self).__name__}-pump')
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+        return True
+
+    # -- pump --
+    def _next_report(self) -> Tuple[bytes, Optional[bytes]]:
+        report = self.profile.reports[self._index % len(self.profile.reports)]
+        self._index += 1
+        return report
+
+    def _pump(self):
+        profile = self.profile
+        period = profile.batch_size / profile.rate_hz if profile.rate_hz > 0 else 0.0
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            batch = [self._next_report() for _ in range(profile.batch_size)]
+            failing = profile.failure_rate > 0 and self._rng.random() < profile.failure_rate
+            if profile.latency_s:
+                time.sleep(profile.latency_s)
+            if self.callback is not None:
+                self.emit_time = time.perf_counter()
+                cpu_start = time.thread_time()
+                try:
+                    self._deliver(batch, failing)
+                except Exception as e:  # the harness reports adapter exceptions
+                    self.errors.append(e)
+                self.adapter_cpu_s += time.thread_time() - cpu_start
+                self.reports_pushed += len(batch)
+                self.failures_injected += failing
+            if period:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_time = time.perf_counter()  # fell behind: don't burst to catch up
+
+    def _deliver(self, batch, failing: bool):
+        raise NotImplementedError
+
+
+def _rain_info(**overrides):
+    info = dict(model='FAKE', region='ETSI', firmware_version='1.0.0', antenna_count=4,
+                min_tx_power_dbm=10.0, max_tx_power_dbm=30.0, min_tx_power_cdbm=1000,
+                max_tx_power_cdbm=3000, serial_number='FAKE-0001')
+    info.update(overrides)
+    return SimpleNamespace(**info)
+
+
+class FakeNurApy(_FakeDriverBase):
+    """Batches of NurTagDataMeta; a failing batch arrives with stopped=True,
+    which the adapter answers by restarting the stream."""
+
+    def stop_all_cont(self):
+        pass
+
+    def get_reader_info(self):
+        return SimpleNamespace(name='FAKE NUR', sw_version='7.0', num_antennas=4)
+
+    def get_device_capabilities(self):
+        return SimpleNamespace(maxTxdBm=27, txSteps=20, txAttnStep=1)
+
+    def get_module_setup(self, setup_flags=None):
+        return SimpleNamespace(region_id=SimpleNamespace(name='EU'), tx_level=0, antenna_mask=1)
+
+    def set_module_setup(self, setup_flags=None, module_setup=None):
+        pass
+
+    def set_inventory_read_config(self, *args, **kwargs):
+        pass
+
+    def start_inventory_stream(self):
+        return self.start()
+
+    def stop_inventory_stream(self):
+        return self.stop()
+
+    def clear_notified_tags(self):
+        pass
+
+    def _deliver(self, batch, failing):
+        notification = SimpleNamespace(stopped=failing, rounds=1, collisions=0, last_q=4)
+        tags = [SimpleNamespace(epc=bytearray(epc), user_mem=bytearray(user_mem) if user_mem else None,
+                                rssi=-60, antenna_id=0, timestamp=0) for epc, user_mem in batch]
+        self.callback(notification, tags)
+
+
+class _FakeLlrpLike(_FakeDriverBase):
+    """LLRP / IoT style: one report object per tag with hex EPC and User
+    memory. A failing batch carries a corrupted EPC."""
+
+    def get_reader_info(self):
+        return _rain_info()
+
+    def set_tx_power(self, *args, **kwargs):
+        pass
+
+    def set_tx_power_dbm(self, *args, **kwargs):
+        pass
+
+    def get_tx_power_dbm(self):
+        return 30.0
+
+    def get_tx_power(self):
+        return 30.0
+
+    def set_antenna_config(self, *args, **kwargs):
+        pass
+
+    def get_antenna_config(self):
+        return [1]
+
+    def set_rf_mode(self, *args, **kwargs):
+        pass
+
+    def set_tag_memory_reads(self, *args, **kwargs):
+        pass
+
+    def set_tag_filter(self, *args, **kwargs):
+        pass
+
+    def _report(self, epc_hex, user_mem_hex):
+        return SimpleNamespace(epc=epc_hex, user_mem=user_mem_hex, antenna_port=1, peak_rssi_dbm=-60)
+
+    def _deliver(self, batch, failing):
+        for i, (epc, user_mem) in enumerate(batch):
+            epc_hex = 'ZZ' + epc.hex().upper() if failing and i == 0 else epc.hex().upper()
+            self.callback(self._report(epc_hex, user_mem.hex().upper() if user_mem else None))
+
+
+class FakeImpinjLlrp(_FakeLlrpLike):
+    pass
+
+
+class FakeZebraLlrp(_FakeLlrpLike):
+
+    def set_session(self, *args, **kwargs):
+        pass
+
+    def set_dual_target(self, *args, **kwargs):
+        pass
+
+    def set_trext(self, *args, **kwargs):
+        pass
+
+    def _report(self, epc_hex, user_mem_hex):
+        return SimpleNamespace(epc=epc_hex, user_mem=user_mem_hex, antenna_port=1, peak_rssi_dbm=-60,
+                               last_seen_timestamp=int(time.time() * 1e6))
+
+
+class FakeImpinjIot(_FakeLlrpLike):
+
+    def _report(self, epc_hex, user_mem_hex):
+        return SimpleNamespace(epc=epc_hex, user_mem=user_mem_hex, antenna_port=1, peak_rssi_cdbm=-6000)
+
+
+class FakeRedRcp(_FakeDriverBase):
+    """Auto-read notifications carry the EPC only; User memory comes from
+    explicit read() calls (SENSEREAD loop), which fail on a failing batch."""
+
+    def start_auto_read2(self):
+        return self.start()
+
+    def stop_auto_read2(self):
+        return self.stop()
+
+    def is_connected(self):
+        return True
+
+    def set_cw(self, on):
+        pass
+
+    def read(self, epc_hex, bank, word_ptr, word_count):
+        self.emit_time = time.perf_counter()
+        if self.profile.failure_rate and self._rng.random() < self.profile.failure_rate:
+            self.failures_injected += 1
+            raise TimeoutError('fake read timeout')
+        for epc, user_mem in self.profile.reports:
+            if epc.hex().upper() == epc_hex:
+                return user_mem
+        return None
+
+    def get_info_model(self):
+        return 'FAKE RED4S'
+
+    def get_info_fw_version(self):
+        return '2.2.1'
+
+    def get_info_detail(self):
+        return SimpleNamespace(region=SimpleNamespace(name='EU'), min_tx_power=10.0, max_tx_power=25.0)
+
+    def get_tx_power(self):
+        return 25.0
+
+    def set_tx_power(self, dbm):
+        pass
+
+    def _deliver(self, batch, failing):
+        for epc, _ in batch:
+            self.callback(SimpleNamespace(pc=bytearray(b'\x30\x00'), epc=bytearray(epc)))
+
+
+class FakeKlSbleLcr(_FakeDriverBase):
+    """BLE advertisements; a failing batch carries a truncated beacon."""
+
+    def get_tx_power(self):
+        return b'\x00\xfa'
+
+    def set_tx_power(self, dbm):
+        return True
+
+    def _deliver(self, batch, failing):
+        for i, (beacon, _) in enumerate(batch):
+            self.callback(beacon[:4].hex() if failing and i == 0 else beacon.hex())
+
+
+class FakeAcr1552(_FakeDriverBase):
+    """NTAG5 behind a PC/SC reader. The adapter polls, so the profile rate
+    does not apply; reports[i][0] is the NDEF area served to read_data()."""
+
+    def set_power(self, on):
+        pass
+
+    def is_pc_connected(self):
+        return True
+
+    def change_fw_mode(self, bulk):
+        pass
+
+    def get_uid(self):
+        self.emit_time = time.perf_counter()
+        if self.profile.failure_rate and self._rng.random() < self.profile.failure_rate:
+            self.failures_injected += 1
+            return None
+        return b'\xE0\x04\x01\x00\x00\x00\x00\x01'
+
+    def read_data(self, block, n_blocks):
+        area = self._next_report()[0]
+        self.reports_pushed += 1
+        return bytearray(area[block * 4:(block + n_blocks) * 4].ljust(n_blocks * 4, b'\x00'))
+
+
+FAKE_DRIVERS = {
+    'NURAPY': FakeNurApy,
+    'REDRCP': FakeRedRcp,
+    'IMPINJ_LLRP': FakeImpinjLlrp,
+    'ZEBRA_LLRP': FakeZebraLlrp,
+    'IMPINJ_IOT': FakeImpinjIot,
+    'KLSBLELCR': FakeKlSbleLcr,
+    'ACR1552': FakeAcr1552,
+}
+
+
+def create_adapter(name: str, profile: FakeProfile):
+    """Instantiate the real adapter for `name` with a fake vendor driver.
+    Returns (adapter, fake)."""
+    install_vendor_shims([name])
+    module_name, adapter_class_name, driver_class_name, _ = ADAPTERS[name]
+    module = importlib.import_module(module_name)
+    fake = FAKE_DRIVERS[name](profile)
+    original = getattr(module, driver_class_name)
+    setattr(module, driver_class_name, lambda *args, **kwargs: fake)
+    try:
+        adapter = getattr(module, adapter_class_name)()
+    finally:
+        setattr(module, driver_class_name, original)
+    return adapter, fake
@@ -0,0 +1,35 @@
+import logging
+import time
+from collections import Counter
+
+from src.senseid.parsers import SenseidTag
+from src.senseid.readers import (SenseidReaderConnectionInfo, SenseidReaderMode, SupportedSenseidReader,
+                                 create_SenseidReader)
+
+logging.basicConfig(level=logging.INFO)
+
+# 2000 tags in the field, up to 8000 singulations/s (about 10x a real reader)
+connection_info = SenseidReaderConnectionInfo(driver=SupportedSenseidReader.SIMULATED,
+                                              connection_string='SIMULATED?tags=2000&rate=8000&seed=1')
+sid_reader = create_SenseidReader(connection_info)
+sid_reader.connect(connection_info.connection_string)
+logging.info(sid_reader.get_details())
+
+sid_reader.set_antenna_config(antenna_config_array=[True, True, True, True])
+sid_reader.set_mode(SenseidReaderMode.SENSEREAD)
+
+counts = Counter()
+
+
+def notification_callback(tag: SenseidTag):
+    counts[tag.name] += 1
+
+
+logging.info('Starting inventory')
+sid_reader.start_inventory_async(notification_callback=notification_callback)
+time.sleep(5)
+logging.info('Stopping inventory')
+sid_reader.stop_inventory_async()
+
+logging.info(f'{sum(counts.values()) / 5:.0f} tags/s: {counts.most_common()}')
+sid_reader.disconnect()
@@ -0,0 +1,263 @@
+"""Tag presence tracking: enter / update / leave events per location.
+
+A location is a (reader, antenna) pair. Visible tags are kept in a hash
+table keyed by (tag id, reader, antenna); absence timeouts live in a
+hierarchical timing wheel, so a report and an expiry each cost O(1)
+whatever the number of visible tags::
+
+    def on_presence(event: SenseidPresenceEvent):
+        if event.kind is SenseidPresenceEventType.LEAVE:
+            print(event.tag_id, 'left', event.reader, 'after', event.dwell_s, 's')
+
+    tracker = SenseidPresenceTracker(on_presence, absence_timeout_s=2.0)
+    reader.start_inventory_async(tracker.callback('portal-1'))
+    tracker.start()  # expires absent tags from a background thread
+
+A report does not move its tag in the wheel: the tag only stores its new
+deadline. When the wheel reaches the old one, the tag is rescheduled if it
+has been read since, so a tag read continuously is touched by the wheel
+about once per timeout, not once per read.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from ..parsers import SenseidTag
+
+logger = logging.getLogger(__name__)
+
+_WHEEL_BITS = 8
+_WHEEL_SLOTS = 1 << _WHEEL_BITS
+_WHEEL_MASK = _WHEEL_SLOTS - 1
+_WHEEL_LEVELS = 4  # 2^32 ticks: over 6 years at 50 ms
+
+
+class SenseidPresenceEventType(Enum):
+    ENTER = 'enter'
+    UPDATE = 'update'
+    LEAVE = 'leave'
+
+
+class SenseidPresenceEvent(NamedTuple):
+    kind: SenseidPresenceEventType
+    tag_id: str
+    reader: Optional[Hashable]
+    antenna: Optional[int]
+    first_seen: datetime
+    last_seen: datetime
+    dwell_s: float          # first_seen to last_seen
+    read_count: int
+    tag: SenseidTag         # last tag read
+
+
+class _Presence:
+    __slots__ = ('key', 'first_seen', 'last_seen', 'reads', 'tag', 'deadline', 'last_update', 'visible')
+
+    def __init__(self, key: tuple, tag: SenseidTag, timestamp: datetime, deadline: int, now: float):
+        self.key = key
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.reads = 1
+        self.tag = tag
+        self.deadline = deadline  # wheel tick after which the tag is absent
+        self.last_update = now
+        self.visible = True
+
+    def event(self, kind: SenseidPresenceEventType) -> SenseidPresenceEvent:
+        tag_id, reader, antenna = self.key
+        return SenseidPresenceEvent(kind, tag_id, reader, antenna, self.first_seen, self.last_seen,
+                                    (self.last_seen - self.first_seen).total_seconds(), self.reads, self.tag)
+
+
+class SenseidPresenceTracker:
+    """Presence of tags per (reader, antenna), fed by notification
+    callbacks.
+
+    A tag enters a location on its first read and leaves it
+    `absence_timeout_s` after its last one, to within `tick_s`. UPDATE
+    events are sent for every read (`update_interval_s=0`), at most once
+    per interval and tag, or never (`None`). Events are sent to
+    `on_event` outside the tracker lock: ENTER and UPDATE from the reader
+    thread, LEAVE from the thread calling poll() (the background thread
+    after start())."""
+
+    def __init__(self, on_event: Callable[[SenseidPresenceEvent], None], absence_timeout_s: float = 2.0,
+                 tick_s: float = 0.05, update_interval_s: Optional[float] = 0.0):
+        if tick_s <= 0:
+            raise ValueError('tick_s must be > 0')
+        self.on_event = on_event
+        self.absence_timeout_s = absence_timeout_s
+        self.tick_s = tick_s
+        self.update_interval_s = update_interval_s
+        self._timeout_ticks = max(1, int(absence_timeout_s / tick_s + 0.5))
+        self._visible: Dict[tuple, _Presence] = {}
+        self._wheel: List[List[List[_Presence]]] = [[[] for _ in range(_WHEEL_SLOTS)] for _ in range(_WHEEL_LEVELS)]
+        self._origin = time.monotonic()
+        self._tick = 0  # last tick processed
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Hot path ─────────────────────────────
+
+    def __call__(self, tag: SenseidTag):
+        self.report(tag)
+
+    def callback(self, reader: Optional[Hashable] = None, antenna: Optional[int] = None) \
+            -> Callable[[SenseidTag], None]:
+        """Notification callback reporting its tags at (reader, antenna)."""
+        return lambda tag: self.report(tag, reader, antenna)
+
+    def report(self, tag: SenseidTag, reader: Optional[Hashable] = None, antenna: Optional[int] = None):
+        now = time.monotonic()
+        key = (tag.id, reader, antenna)
+        timestamp = tag.timestamp or datetime.now()
+        deadline = self._now_tick(now) + self._timeout_ticks
+        event = None
+        with self._lock:
+            presence = self._visible.get(key)
+            if presence is None:
+                presence = self._visible[key] = _Presence(key, tag, timestamp, deadline, now)
+                self._schedule(presence)
+                event = presence.event(SenseidPresenceEventType.ENTER)
+            else:
+                presence.reads += 1
+                presence.last_seen = timestamp
+                presence.tag = tag
+                presence.deadline = deadline
+                interval = self.update_interval_s
+                if interval is not None and now - presence.last_update >= interval:
+                    presence.last_update = now
+                    event = presence.event(SenseidPresenceEventType.UPDATE)
+        if event is not None:
+            self._emit(event)
+
+    # ── Timing wheel ─────────────────────────
+
+    def _now_tick(self, now: float) -> int:
+        return int((now - self._origin) / self.tick_s)
+
+    def _schedule(self, presence: _Presence):
+        deadline = presence.deadline
+        delta = deadline - self._tick
+        if delta <= 0:
+            # Due already: the next tick processed fires it
+            self._wheel[0][(self._tick + 1) & _WHEEL_MASK].append(presence)
+            return
+        for level in range(_WHEEL_LEVELS):
+            if delta < 1 << (_WHEEL_BITS * (level + 1)) or level == _WHEEL_LEVELS - 1:
+                self._wheel[level][(deadline >> (_WHEEL_BITS * level)) & _WHEEL_MASK].append(presence)
+                return
+
+    def _advance(self, now_tick: int) -> List[SenseidPresenceEvent]:
+        events = []
+        if not self._visible:
+            self._tick = max(self._tick, now_tick)
+            return events
+        wheel = self._wheel
+        while self._tick < now_tick:
+            self._tick += 1
+            tick = self._tick
+            index = tick & _WHEEL_MASK
+            if not index:
+                # Move the next block of each upper level down a level
+                for level in range(1, _WHEEL_LEVELS):
+                    upper = (tick >> (_WHEEL_BITS * level)) & _WHEEL_MASK
+                    slot = wheel[level][upper]
+                    if slot:
+                        wheel[level][upper] = []
+                        for presence in slot:
+                            if presence.deadline <= tick:
+                                wheel[0][index].append(presence)  # due this tick
+                            else:
+                                self._schedule(presence)
+                    if upper:
+                        break
+            slot = wheel[0][index]
+            if not slot:
+                continue
+            wheel[0][index] = []
+            for presence in slot:
+                if not presence.visible:
+                    continue
+                if presence.deadline > tick:
+                    self._schedule(presence)  # read since it was scheduled
+                    continue
+                presence.visible = False
+                del self._visible[presence.key]
+                events.append(presence.event(SenseidPresenceEventType.LEAVE))
+        return events
+
+    def poll(self) -> int:
+        """Send the LEAVE events due by now; returns how many were sent."""
+        with self._lock:
+            events = self._advance(self._now_tick(time.monotonic()))
+        for event in events:
+            self._emit(event)
+        return len(events)
+
+    def _emit(self, event: SenseidPresenceEvent):
+        try:
+            self.on_event(event)
+        except Exception:
+            logger.exception('Presence event callback failed for %s', event.tag_id)
+
+    # ── Queries ──────────────────────────────
+
+    def visible(self, reader: Optional[Hashable] = None, antenna: Optional[int] = None) -> List[SenseidPresenceEvent]:
+        """Snapshot of the tags visible now (as UPDATE events), optionally
+        only at `reader` / `antenna`."""
+        with self._lock:
+            return [presence.event(SenseidPresenceEventType.UPDATE) for (_, r, a), presence in self._visible.items()
+                    if (reader is None or r == reader) and (antenna is None or a == antenna)]
+
+    def is_visible(self, tag_id: str, reader: Optional[Hashable] = None, antenna: Optional[int] = None) -> bool:
+        return (tag_id, reader, antenna) in self._visible
+
+    def __len__(self):
+        return len(self._visible)
+
+    # ── Control ──────────────────────────────
+
+    def start(self):
+        """Poll every tick from a background thread."""
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='senseid-presence')
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.tick_s):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Presence tracker failed')
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self) -> int:
+        """Send LEAVE for every visible tag now (e.g. on shutdown)."""
+        with self._lock:
+            presences = list(self._visible.values())
+            self._visible.clear()
+            for level in self._wheel:
+                for slot in level:
+                    slot.clear()
+            for presence in presences:
+                presence.visible = False
+        for presence in presences:
+            self._emit(presence.event(SenseidPresenceEventType.LEAVE))
+        return len(presences)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
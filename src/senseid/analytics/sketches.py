@@ -0,0 +1,298 @@
+"""Constant-memory population statistics of tag streams.
+
+Counting distinct EPCs exactly needs a set as large as the tag field, and
+ranking the chattiest tags a counter per tag. The sketches here answer
+both within a fixed memory budget:
+
+- SenseidHyperLogLog: distinct count, about 1.6 % standard error in 4 KB
+  (precision 12). Sketches of different readers or minutes merge.
+- SenseidSpaceSaving: the k most frequent items with a bound on the error
+  of each count, in k counters.
+
+SenseidPopulationTracker applies them per reader and interval (a minute
+by default) and is attached to a reader's stream as its callback::
+
+    population = SenseidPopulationTracker(interval_s=60, top_k=20)
+    reader.start_inventory_async(population.callback('dock-1', notification_callback))
+    ...
+    stats = population.get_stats('dock-1')
+    stats.current.distinct_tags, stats.current.top_tags, stats.history
+"""
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from hashlib import blake2b
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from dataclasses_json import dataclass_json
+
+from ..parsers import SenseidTag
+
+_INVERSE_POWERS = [2.0 ** -r for r in range(66)]
+
+
+def _hash64(item: str | bytes) -> int:
+    if isinstance(item, str):
+        item = item.encode()
+    return int.from_bytes(blake2b(item, digest_size=8).digest(), 'big')
+
+
+class SenseidHyperLogLog:
+    """HyperLogLog distinct counter with 2^precision registers of one
+    byte. Standard error is about 1.04 / sqrt(2^precision). Items are
+    hashed with BLAKE2b, so sketches from other processes merge too."""
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 18:
+            raise ValueError('precision must be between 4 and 18')
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add(self, item: str | bytes):
+        x = _hash64(item)
+        index = x >> self._shift
+        rank = self._shift - (x & self._mask).bit_length() + 1
+        registers = self._registers
+        if rank > registers[index]:
+            registers[index] = rank
+
+    def update(self, items: Iterable[str | bytes]):
+        for item in items:
+            self.add(item)
+
+    def count(self) -> int:
+        registers = self._registers
+        m = len(registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(map(_INVERSE_POWERS.__getitem__, registers))
+        if estimate <= 2.5 * m:
+            zeros = registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return int(estimate + 0.5)
+
+    def merge(self, other: 'SenseidHyperLogLog'):
+        """Add the items counted by `other` (same precision) to this sketch."""
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precision')
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def copy(self) -> 'SenseidHyperLogLog':
+        sketch = SenseidHyperLogLog(self.precision)
+        sketch._registers[:] = self._registers
+        return sketch
+
+    def clear(self):
+        self._registers[:] = bytes(len(self._registers))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._registers)
+
+
+class SenseidSpaceSaving:
+    """SpaceSaving top-k: tracks at most `k` items. An untracked item
+    replaces the one with the smallest count and inherits it as its
+    error, so counts are overestimates by at most `error`. Any item more
+    frequent than total / k is guaranteed to be tracked."""
+
+    def __init__(self, k: int = 100):
+        if k < 1:
+            raise ValueError('k must be >= 1')
+        self.k = k
+        self.total = 0
+        self._counts: Dict[str, List[int]] = {}  # item -> [count, error]
+        # One (count, item) entry per tracked item; the count may lag
+        # behind the real one, which is fixed when it reaches the top
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, item: str, count: int = 1):
+        self.total += count
+        entry = self._counts.get(item)
+        if entry is not None:
+            entry[0] += count
+            return
+        heap = self._heap
+        if len(self._counts) < self.k:
+            self._counts[item] = [count, 0]
+            heapq.heappush(heap, (count, item))
+            return
+        while True:
+            smallest, victim = heap[0]
+            actual = self._counts[victim][0]
+            if actual == smallest:
+                break
+            heapq.heapreplace(heap, (actual, victim))
+        del self._counts[victim]
+        self._counts[item] = [smallest + count, smallest]
+        heapq.heapreplace(heap, (smallest + count, item))
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """(item, count, error) of the `n` (default all k) most frequent
+        items, most frequent first."""
+        ranked = sorted(((item, count, error) for item, (count, error) in self._counts.items()),
+                        key=lambda entry: entry[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    def clear(self):
+        self.total = 0
+        self._counts.clear()
+        self._heap.clear()
+
+    def __len__(self):
+        return len(self._counts)
+
+
+@dataclass_json
+@dataclass
+class SenseidTopTag:
+    tag_id: str
+    reads: int
+    error: int = 0  # reads may be overestimated by up to this much
+
+
+@dataclass_json
+@dataclass
+class SenseidPopulationInterval:
+    start: datetime
+    distinct_tags: int = 0  # estimate
+    reads: int = 0
+    top_tags: List[SenseidTopTag] = field(default_factory=list)
+
+
+@dataclass_json
+@dataclass
+class SenseidPopulationStats:
+    reader: Optional[str] = None
+    current: Optional[SenseidPopulationInterval] = None         # interval in progress
+    # Completed intervals, oldest first; intervals without reads are included
+    history: List[SenseidPopulationInterval] = field(default_factory=list)
+    distinct_tags_total: int = 0  # estimate, since created or reset
+    reads_total: int = 0
+
+
+class _ReaderPopulation:
+    __slots__ = ('interval', 'distinct', 'distinct_total', 'top', 'reads', 'reads_total', 'history')
+
+    def __init__(self, interval: int, precision: int, top_k: int, history: int):
+        self.interval = interval
+        self.distinct = SenseidHyperLogLog(precision)
+        self.distinct_total = SenseidHyperLogLog(precision)
+        self.top = SenseidSpaceSaving(top_k)
+        self.reads = 0
+        self.reads_total = 0
+        self.history: Deque[SenseidPopulationInterval] = deque(maxlen=history)
+
+
+class SenseidPopulationTracker:
+    """Distinct tags and chattiest tags per reader and interval.
+
+    Intervals are aligned to the wall clock (`interval_s` = 60 gives
+    calendar minutes); the last `history` completed ones are kept. Memory
+    per reader is two HyperLogLog sketches and `top_k` counters, whatever
+    the number of tags. Thread safe."""
+
+    def __init__(self, interval_s: float = 60.0, precision: int = 12, top_k: int = 20, history: int = 60):
+        self.interval_s = interval_s
+        self.precision = precision
+        self.top_k = top_k
+        self.history = history
+        self._readers: Dict[Optional[str], _ReaderPopulation] = {}
+        self._lock = threading.Lock()
+
+    # ── Hot path ─────────────────────────────
+
+    def __call__(self, tag: SenseidTag):
+        self.add(tag.id)
+
+    def callback(self, reader: Optional[str] = None,
+                 notification_callback: Optional[Callable[[SenseidTag], None]] = None) \
+            -> Callable[[SenseidTag], None]:
+        """Notification callback counting the tags of `reader`, then
+        passing them on to `notification_callback` when given."""
+        if notification_callback is None:
+            return lambda tag: self.add(tag.id, reader)
+
+        def observe(tag: SenseidTag):
+            self.add(tag.id, reader)
+            notification_callback(tag)
+        return observe
+
+    def add(self, tag_id: str, reader: Optional[str] = None):
+        interval = int(time.time() // self.interval_s)
+        with self._lock:
+            population = self._readers.get(reader)
+            if population is None:
+                population = self._readers[reader] = _ReaderPopulation(interval, self.precision, self.top_k,
+                                                                       self.history)
+            elif population.interval != interval:
+                self._roll(population, interval)
+            population.distinct.add(tag_id)
+            population.distinct_total.add(tag_id)
+            population.top.add(tag_id)
+            population.reads += 1
+            population.reads_total += 1
+
+    # ── Intervals ────────────────────────────
+
+    def _snapshot(self, population: _ReaderPopulation) -> SenseidPopulationInterval:
+        return SenseidPopulationInterval(
+            start=datetime.fromtimestamp(population.interval * self.interval_s),
+            distinct_tags=population.distinct.count() if population.reads else 0,
+            reads=population.reads,
+            top_tags=[SenseidTopTag(tag_id, reads, error) for tag_id, reads, error in population.top.top()])
+
+    def _roll(self, population: _ReaderPopulation, interval: int):
+        history = population.history
+        history.append(self._snapshot(population))
+        # Intervals without reads in between, as far back as history goes
+        for idle in range(max(population.interval + 1, interval - history.maxlen), interval):
+            history.append(SenseidPopulationInterval(start=datetime.fromtimestamp(idle * self.interval_s)))
+        population.interval = interval
+        population.distinct.clear()
+        population.top.clear()
+        population.reads = 0
+
+    # ── Stats ────────────────────────────────
+
+    def get_stats(self, reader: Optional[str] = None) -> SenseidPopulationStats:
+        """Snapshot for `reader` (the tags counted without a reader label
+        by default)."""
+        interval = int(time.time() // self.interval_s)
+        with self._lock:
+            population = self._readers.get(reader)
+            if population is None:
+                return SenseidPopulationStats(reader=reader)
+            if population.interval != interval:
+                self._roll(population, interval)
+            return SenseidPopulationStats(reader=reader, current=self._snapshot(population),
+                                          history=list(population.history),
+                                          distinct_tags_total=population.distinct_total.count(),
+                                          reads_total=population.reads_total)
+
+    def get_all_stats(self) -> List[SenseidPopulationStats]:
+        with self._lock:
+            readers = list(self._readers)
+        return [self.get_stats(reader) for reader in readers]
+
+    def distinct_tags(self, readers: Optional[Iterable[Optional[str]]] = None) -> int:
+        """Distinct tags seen by any of `readers` (default all) since
+        created or reset, counted once even when several readers saw them."""
+        with self._lock:
+            sketches = [population.distinct_total for name, population in self._readers.items()
+                        if readers is None or name in readers]
+            if not sketches:
+                return 0
+            merged = sketches[0].copy()
+            for sketch in sketches[1:]:
+                merged.merge(sketch)
+        return merged.count()
+
+    def reset(self):
+        with self._lock:
+            self._readers.clear()
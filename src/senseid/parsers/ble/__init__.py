@@ -129,4 +129,5 @@ class SenseidBleTag(SenseidTag):
             self.datasheet_url = None
             self.store_url = None
             self.data = None
-        logger.debug('Parsing done -> ' + str(self))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Parsing done -> %s', self)
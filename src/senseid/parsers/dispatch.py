@@ -0,0 +1,37 @@
+from typing import Optional
+
+from . import SenseidTag
+from .farsens import SenseidFarsensTag
+from .farsens.yaml import SENSEID_FARSENS_DEF
+from .rain import SenseidRainTag
+from .senseread import SenseidSenseReadTag, is_senseid_senseread_epc
+
+_FARSENS_PEN = bytes(SENSEID_FARSENS_DEF.pen_header)
+
+
+def parse_rain_report(epc: str | bytes | bytearray,
+                      user_mem: Optional[str | bytes | bytearray] = None) -> SenseidTag:
+    """Parse a RAIN inventory report with the parser of its tag family.
+
+    Farsens tags are recognised by their PEN. SenseID Rain and senseRead
+    tags share a PEN and are told apart by the family marker at byte 6
+    (see is_senseid_senseread_epc). Anything else is a standard Rain ID.
+    `user_mem` is only used by the senseRead and Farsens parsers; without
+    it they still identify the model and leave data=None. A malformed
+    EPC raises TypeError, as SenseidRainTag does.
+    """
+    if isinstance(epc, str):
+        try:
+            epc_bytes = bytes.fromhex(epc)
+        except (TypeError, ValueError):
+            raise TypeError('epc must be a hex string or bytearray') from None
+    else:
+        epc_bytes = epc = bytearray(epc) if isinstance(epc, bytes) else epc
+
+    if epc_bytes[:len(_FARSENS_PEN)] == _FARSENS_PEN:
+        return SenseidFarsensTag(epc=epc, user_mem_hex=user_mem)
+
+    if is_senseid_senseread_epc(epc_bytes):
+        return SenseidSenseReadTag(epc=epc, user_mem_hex=user_mem)
+
+    return SenseidRainTag(epc=epc)
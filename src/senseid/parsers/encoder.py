@@ -0,0 +1,231 @@
+"""Inverse of the SenseID parsers: build EPCs, User-memory datagrams, BLE
+advertisements and NFC NDEF areas from engineering values.
+
+Every function takes the sensor values in the order of the type's
+``data_def`` (BLE padding entries excluded), or as a mapping keyed by
+``magnitude_short``, and returns data the matching parser decodes back to
+those values (up to the resolution of the raw type)::
+
+    epc = encode_rain_epc(0x01, sn=0x123, values=[21.5])
+    SenseidRainTag(epc).data[0].value  # 21.5
+
+Raises ValueError when the type is unknown or a value cannot be
+represented in its raw field.
+"""
+import math
+import struct
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+from .ble.yaml import SENSEID_BLE_DEF
+from .farsens.yaml import SENSEID_FARSENS_DEF
+from .nfc.yaml import SENSEID_NFC_DEF
+from .rain.yaml import SENSEID_RAIN_DEF
+from .senseread.yaml import SENSEID_SENSEREAD_DEF
+
+# Raw value types shared by all definition files (compared by value, the
+# BLE and NFC loaders declare their own enums).
+_STRUCT_FORMATS = {
+    'uint16': '<H',
+    'int16': '<h',
+    'uint16be': '>H',
+    'int16be': '>h',
+    'float': '<f',
+}
+_INT_RANGES = {
+    'uint16': (0, 0xFFFF),
+    'int16': (-0x8000, 0x7FFF),
+    'uint16be': (0, 0xFFFF),
+    'int16be': (-0x8000, 0x7FFF),
+}
+_PADDING = 'padding'
+
+# Half bridge used by the SenseID thermistor inputs (see the parsers)
+_BRIDGE_RESISTOR = 10e3
+_ADC12_FULL_SCALE = 4095
+
+# Layout constants mirrored from the parsers
+_RAIN_SN_BYTES = 3
+_SENSEREAD_SN_BYTES = 5
+_FARSENS_PRODUCT_ID_BYTES = 5
+_BLE_MAC_BYTES = 6
+_BLE_HEADER_BYTES = 14  # MAC + AD length + AD type + local name, padded
+_NFC_DEFAULT_URL = '192.168.4.1:80/index.html'
+
+
+def _thermistor_resistance(data_def, value: float) -> float:
+    beta = data_def.coefficients[0]
+    r0 = data_def.coefficients[1]
+    t0 = data_def.coefficients[2] + 273.15
+    return r0 * math.exp(beta * (1 / (value + 273.15) - 1 / t0))
+
+
+def raw_from_value(data_def, value: float, thermistor_resistance_float: bool = False):
+    """Invert the transform of `data_def`, returning the raw field value
+    (int for integer types, float for 'float').
+
+    `thermistor_resistance_float` selects the Farsens convention, where a
+    float THERMISTOR_BETA field carries the resistance itself instead of
+    the ADC12 reading of the 10k half bridge."""
+    value_type = data_def.type.value
+    transform = data_def.transform.value
+    c = data_def.coefficients
+    if transform == 'linear':
+        if not c[1]:
+            raise ValueError(f'{data_def.magnitude}: LINEAR transform with zero gain cannot be inverted')
+        raw = (value - c[0]) / c[1]
+    elif transform == 'thermistor-beta':
+        r_thermistor = _thermistor_resistance(data_def, value)
+        if value_type == 'float' and thermistor_resistance_float:
+            raw = r_thermistor
+        else:
+            raw = _ADC12_FULL_SCALE * r_thermistor / (r_thermistor + _BRIDGE_RESISTOR)
+    elif transform == 'ldr':
+        # value = k * 2^exp * frac, frac 12 bits, exp 4 bits. Smallest
+        # exponent that fits keeps the most resolution.
+        k = c[0] if c else 1.0
+        if value < 0:
+            raise ValueError(f'{data_def.magnitude}: LDR value must be positive, got {value}')
+        for exp in range(16):
+            frac = round(value / (k * (2 ** exp)))
+            if frac <= 0x0FFF:
+                raw = (exp << 12) | frac
+                break
+        else:
+            raise ValueError(f'{data_def.magnitude}: {value} exceeds the LDR range')
+    else:
+        raw = value
+
+    if value_type == 'float':
+        return float(raw)
+    raw = int(round(raw))
+    lo, hi = _INT_RANGES.get(value_type, (-math.inf, math.inf))
+    if not lo <= raw <= hi:
+        raise ValueError(f'{data_def.magnitude}: {value} {data_def.unit_short} does not fit in {value_type}')
+    return raw
+
+
+def _ordered_values(data_defs, values: Sequence[float] | Mapping[str, float]) -> List[Optional[float]]:
+    fields = [d for d in data_defs if d.type.value != _PADDING]
+    if isinstance(values, Mapping):
+        try:
+            ordered = iter([values[d.magnitude_short] for d in fields])
+        except KeyError as e:
+            raise ValueError(f'Missing value for {e.args[0]}')
+    else:
+        if len(values) != len(fields):
+            raise ValueError(f'Expected {len(fields)} values, got {len(values)}')
+        ordered = iter(values)
+    return [None if d.type.value == _PADDING else next(ordered) for d in data_defs]
+
+
+def encode_payload(data_defs, values: Sequence[float] | Mapping[str, float],
+                   thermistor_resistance_float: bool = False) -> bytes:
+    """Raw sensor payload for `data_defs`, as laid out after the header."""
+    out = bytearray()
+    for data_def, value in zip(data_defs, _ordered_values(data_defs, values)):
+        value_type = data_def.type.value
+        if value_type == _PADDING:
+            out += b'\x00'
+            continue
+        fmt = _STRUCT_FORMATS.get(value_type)
+        if fmt is None:
+            # uint8/int8 are declared in some YAMLs but carry no bytes in the decoders
+            continue
+        out += struct.pack(fmt, raw_from_value(data_def, value, thermistor_resistance_float))
+    return bytes(out)
+
+
+def _type_def(definitions, type_id: int, family: str):
+    type_def = definitions.types.get(type_id)
+    if type_def is None:
+        raise ValueError(f'Unknown {family} type 0x{type_id:02X}')
+    return type_def
+
+
+def _fw_version(type_def, fw_version: Optional[int]) -> int:
+    if fw_version is not None:
+        return fw_version
+    return type_def.fw_versions[-1] if type_def.fw_versions else 1
+
+
+def _even(data: bytes | bytearray, min_length: int = 0) -> bytearray:
+    """Pad to at least `min_length` bytes and to a whole number of 16-bit words."""
+    length = max(len(data), min_length)
+    return bytearray(data).ljust(length + length % 2, b'\x00')
+
+
+def encode_rain_epc(type_id: int, sn: int, values: Sequence[float] | Mapping[str, float],
+                    fw_version: Optional[int] = None) -> bytearray:
+    """Standard SenseID EPC: PEN + type + fw_version + 3-byte SN + payload."""
+    type_def = _type_def(SENSEID_RAIN_DEF, type_id, 'SenseID RAIN')
+    epc = bytes(SENSEID_RAIN_DEF.pen_header) + bytes([type_id, _fw_version(type_def, fw_version)]) \
+        + sn.to_bytes(_RAIN_SN_BYTES, 'big') + encode_payload(type_def.data_def, values)
+    return _even(epc)
+
+
+def encode_senseread(type_id: int, sn: int, values: Sequence[float] | Mapping[str, float],
+                     fw_version: Optional[int] = None, qos: Optional[int] = None) -> Tuple[bytearray, bytearray]:
+    """senseRead (EPC, User memory). The EPC carries the family marker; the
+    datagram starts with fw_version and ends with the R100 QoS byte when
+    `qos` is given."""
+    type_def = _type_def(SENSEID_SENSEREAD_DEF, type_id, 'senseRead')
+    epc = bytes(SENSEID_SENSEREAD_DEF.pen_header) + bytes([type_id, SENSEID_SENSEREAD_DEF.epc_family_marker]) \
+        + sn.to_bytes(_SENSEREAD_SN_BYTES, 'big')
+    user_mem = _even(bytes([_fw_version(type_def, fw_version)]) + encode_payload(type_def.data_def, values),
+                     SENSEID_SENSEREAD_DEF.word_count * 2)
+    if qos is not None:
+        user_mem.append(qos)
+    return bytearray(epc), user_mem
+
+
+def encode_farsens(product_id: int, sn: int, values: Sequence[float] | Mapping[str, float],
+                   fw_version: Optional[int] = None, sn_length: int = 2) -> Tuple[bytearray, bytearray]:
+    """Farsens (EPC, User memory): PEN + 5-byte productId + SN, and a
+    datagram starting with the preamble and fw_version."""
+    type_def = _type_def(SENSEID_FARSENS_DEF, product_id, 'Farsens')
+    epc = bytes(SENSEID_FARSENS_DEF.pen_header) + product_id.to_bytes(_FARSENS_PRODUCT_ID_BYTES, 'big') \
+        + sn.to_bytes(sn_length, 'big')
+    header = bytes([SENSEID_FARSENS_DEF.preamble, _fw_version(type_def, fw_version)])
+    header = header.ljust(SENSEID_FARSENS_DEF.data_index, b'\x00')
+    payload = encode_payload(type_def.data_def, values, thermistor_resistance_float=True)
+    return _even(epc), _even(header + payload, SENSEID_FARSENS_DEF.word_count * 2)
+
+
+def encode_ble_beacon(type_id: int, mac: int | bytes, values: Sequence[float] | Mapping[str, float],
+                      fw_version: Optional[int] = None) -> bytearray:
+    """SenseID BLE advertisement as handed over by the KLSBLELCR driver:
+    MAC + local name AD structure + type + fw_version + payload."""
+    type_def = _type_def(SENSEID_BLE_DEF, type_id, 'SenseID BLE')
+    mac_bytes = mac.to_bytes(_BLE_MAC_BYTES, 'big') if isinstance(mac, int) else bytes(mac)
+    if len(mac_bytes) != _BLE_MAC_BYTES:
+        raise ValueError(f'MAC must be {_BLE_MAC_BYTES} bytes')
+    local_name = SENSEID_BLE_DEF.local_name.encode()
+    header = (mac_bytes + bytes([len(local_name) + 1, 0x09]) + local_name).ljust(_BLE_HEADER_BYTES, b'\x00')
+    return bytearray(header + bytes([type_id, _fw_version(type_def, fw_version)])
+                     + encode_payload(type_def.data_def, values))
+
+
+def encode_nfc_bulk_sample(values: Sequence[float] | Mapping[str, float],
+                           type_id: Optional[int] = None) -> List[int]:
+    """Raw integers of one bulk sample, as consumed by parse_nfc_bulk_sample."""
+    type_id = SENSEID_NFC_DEF.default_type if type_id is None else type_id
+    type_def = _type_def(SENSEID_NFC_DEF, type_id, 'SenseID NFC')
+    return [raw_from_value(d, v) for d, v in zip(type_def.data_def, _ordered_values(type_def.data_def, values))]
+
+
+def encode_nfc_ndef(values: Sequence[float] | Mapping[str, float], type_id: Optional[int] = None,
+                    url: str = _NFC_DEFAULT_URL) -> bytearray:
+    """Type 5 NDEF area (CC + NDEF TLV + URI record + terminator). The
+    default type uses the 'url#VAL1,VAL2' form; other types carry their id
+    in the path ('host:port/TYPE_HEX/VAL1,VAL2')."""
+    type_id = SENSEID_NFC_DEF.default_type if type_id is None else type_id
+    raw_values = ','.join(str(v) for v in encode_nfc_bulk_sample(values, type_id))
+    if type_id == SENSEID_NFC_DEF.default_type:
+        uri = f'{url}#{raw_values}'
+    else:
+        uri = f'{url.split("/", 1)[0]}/{type_id:02X}/{raw_values}'
+    uri_bytes = uri.encode()
+    record = bytes([0xD1, 0x01, len(uri_bytes) + 1, 0x55, 0x03]) + uri_bytes  # well-known 'U', "http://"
+    if len(record) > 0xFE:
+        raise ValueError('NDEF record too long for a short TLV')
+    return bytearray(bytes([0xE1, 0x40, 0x40, 0x01, 0x03, len(record)]) + record + b'\xFE')
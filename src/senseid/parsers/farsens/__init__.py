@@ -169,4 +169,5 @@ class SenseidFarsensTag(SenseidTag):
         self.datasheet_url = type_config.datasheet_url
         self.store_url = type_config.store_url
         self._decode_user_mem(type_config, user_mem)
-        logger.debug('Parsing Farsens tag done -> %s', self)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Parsing Farsens tag done -> %s', self)
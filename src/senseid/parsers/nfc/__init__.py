@@ -80,22 +80,22 @@ def parse_nfc_ndef(ndef_data: bytearray, uid: str = None) -> Tuple[Optional[Sens
     Returns (None, None) if NDEF is invalid.
     """
     if ndef_data is None or len(ndef_data) < 11:
-        logger.debug(f"NDEF packet too short: {len(ndef_data) if ndef_data else 0} bytes")
+        logger.debug('NDEF packet too short: %d bytes', len(ndef_data) if ndef_data else 0)
         return _unknown_tag(uid), None
 
     # Verify CC file (E1 40)
     if ndef_data[0] != 0xE1 or ndef_data[1] != 0x40:
-        logger.debug(f"Invalid CC file: {ndef_data[0]:02X} {ndef_data[1]:02X}")
+        logger.debug('Invalid CC file: %02X %02X', ndef_data[0], ndef_data[1])
         return _unknown_tag(uid), None
 
     # Verify NDEF TLV
     if ndef_data[4] != 0x03:
-        logger.debug(f"Invalid NDEF TLV: {ndef_data[4]:02X}")
+        logger.debug('Invalid NDEF TLV: %02X', ndef_data[4])
         return _unknown_tag(uid), None
 
     # Verify type 'U' (URI)
     if ndef_data[9] != 0x55:
-        logger.debug(f"NDEF type is not URI: {ndef_data[9]:02X}")
+        logger.debug('NDEF type is not URI: %02X', ndef_data[9])
         return _unknown_tag(uid), None
 
     # URI Identifier Code
@@ -134,7 +134,8 @@ def parse_nfc_ndef(ndef_data: bytearray, uid: str = None) -> Tuple[Optional[Sens
         datasheet_url=type_def.datasheet_url,
         store_url=type_def.store_url
     )
-    logger.debug(f'NDEF parsed -> {tag}')
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('NDEF parsed -> %s', tag)
     return tag, type_id
 
 
@@ -204,7 +205,7 @@ def _extract_type_and_values(url_part: str) -> Tuple[int, Optional[List[int]]]:
             return SENSEID_NFC_DEF.default_type, values
 
     except (ValueError, IndexError) as e:
-        logger.debug(f"Error extracting sensor data: {e}")
+        logger.debug('Error extracting sensor data: %s', e)
 
     return SENSEID_NFC_DEF.default_type, None
 
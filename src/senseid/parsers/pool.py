@@ -0,0 +1,316 @@
+"""Process-pool parse stage: decode raw RAIN/BLE reports on several cores.
+
+Raw reports (EPC / advertisement and User-memory bytes) are appended to a
+per-stream batch. Full (or `max_delay_s` old) batches are written into one
+of a set of shared-memory segments and decoded by a worker process, which
+returns one compact tuple per report. Results come back in submission
+order for each stream (one stream per reader), and are turned into the
+usual SenseidTag objects, timestamped when they were submitted, unless the
+stream asks for the compact tuples.
+
+    pool = SenseidParsePool(workers=4)
+    stream = pool.open_stream(on_tags)          # on_tags(list_of_tags, contexts)
+    stream.submit(SenseidTechnologies.RAIN, epc_bytes, user_mem_bytes)
+    ...
+    pool.close()
+
+Compact result of a report: None if it could not be parsed, else
+(kind, fw_version, sn, id, name, description, datasheet_url, store_url,
+data), with data None or a tuple of (magnitude, magnitude_short,
+unit_long, unit_short, value).
+"""
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import SenseidData, SenseidTag, SenseidTechnologies
+from .ble import SenseidBleTag
+from .dispatch import parse_rain_report
+from .farsens import SenseidFarsensTag
+from .rain import SenseidRainTag
+from .senseread import SenseidSenseReadTag
+
+logger = logging.getLogger(__name__)
+
+# record: u8 technology | u8 EPC length | u16 User-memory length (0xFFFF = none) | EPC | User memory
+_RECORD = struct.Struct('<BBH')
+_NO_USER_MEM = 0xFFFF
+_MAX_EPC_LENGTH = 0xFF
+_MAX_USER_MEM_LENGTH = _NO_USER_MEM - 1
+
+_TECHNOLOGY_CODES = {SenseidTechnologies.RAIN: 0, SenseidTechnologies.BLE: 1}
+
+_KIND_CLASSES = (SenseidRainTag, SenseidSenseReadTag, SenseidFarsensTag, SenseidBleTag)
+_KIND_CODES = {cls: kind for kind, cls in enumerate(_KIND_CLASSES)}
+_KIND_TECHNOLOGIES = (SenseidTechnologies.RAIN, SenseidTechnologies.RAIN, SenseidTechnologies.RAIN,
+                      SenseidTechnologies.BLE)
+
+CompactTag = Tuple[Any, ...]
+
+
+# ── Worker side ───────────────────────────
+
+_worker_segments: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _compact(tag: SenseidTag) -> CompactTag:
+    data = tag.data
+    if data is not None:
+        data = tuple((d.magnitude, d.magnitude_short, d.unit_long, d.unit_short, d.value) for d in data)
+    return (_KIND_CODES[type(tag)], tag.fw_version, tag.sn, tag.id, tag.name, tag.description,
+            tag.datasheet_url, tag.store_url, data)
+
+
+def decode_batch(buffer: bytes | bytearray | memoryview) -> List[Optional[CompactTag]]:
+    """Decode a batch of raw report records into compact results."""
+    results: List[Optional[CompactTag]] = []
+    append = results.append
+    unpack = _RECORD.unpack_from
+    header_size = _RECORD.size
+    offset = 0
+    end = len(buffer)
+    while offset < end:
+        technology, epc_length, user_mem_length = unpack(buffer, offset)
+        offset += header_size
+        epc = bytearray(buffer[offset:offset + epc_length])
+        offset += epc_length
+        user_mem = None
+        if user_mem_length != _NO_USER_MEM:
+            user_mem = bytes(buffer[offset:offset + user_mem_length])
+            offset += user_mem_length
+        try:
+            tag = parse_rain_report(epc, user_mem) if technology == 0 else SenseidBleTag(epc)
+            append(_compact(tag))
+        except Exception:
+            append(None)
+    return results
+
+
+def _decode_segment(name: str, length: int) -> List[Optional[CompactTag]]:
+    segment = _worker_segments.get(name)
+    if segment is None:
+        segment = _worker_segments[name] = shared_memory.SharedMemory(name=name)
+    return decode_batch(bytes(segment.buf[:length]))
+
+
+# ── Main process side ─────────────────────
+
+def materialize(compact: CompactTag, timestamp: Optional[datetime] = None) -> SenseidTag:
+    """Build the SenseidTag of a compact result, of the same class the
+    inline parsers return."""
+    kind, fw_version, sn, tag_id, name, description, datasheet_url, store_url, data = compact
+    tag = _KIND_CLASSES[kind].__new__(_KIND_CLASSES[kind])
+    tag.technology = _KIND_TECHNOLOGIES[kind]
+    tag.timestamp = timestamp or datetime.now()
+    tag.fw_version = fw_version
+    tag.sn = sn
+    tag.id = tag_id
+    tag.name = name
+    tag.description = description
+    tag.datasheet_url = datasheet_url
+    tag.store_url = store_url
+    tag.data = [SenseidData(*d) for d in data] if data is not None else None
+    return tag
+
+
+class SenseidParseStream:
+    """Ordered stream of reports into a SenseidParsePool; see open_stream()."""
+
+    def __init__(self, pool: 'SenseidParsePool', callback: Callable[[List, List], None], compact: bool):
+        self._pool = pool
+        self._callback = callback
+        self._compact = compact
+        self._lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+        self._buffer = bytearray()
+        self._contexts: List[Any] = []
+        self._timestamps: List[datetime] = []
+        self._batch_started = 0.0
+        self._pending: Deque[Tuple[Future, List[Any], List[datetime]]] = deque()
+        self.closed = False
+
+    def submit(self, technology: SenseidTechnologies, epc: str | bytes | bytearray,
+               user_mem: Optional[str | bytes | bytearray] = None, context: Any = None):
+        """Queue one report. `context` is handed back with its result.
+        Raises ValueError for reports that do not fit a record (EPC over
+        255 bytes, User memory over 65534 bytes)."""
+        if isinstance(epc, str):
+            epc = bytes.fromhex(epc)
+        elif not isinstance(epc, (bytes, bytearray)):
+            epc = bytes(epc)
+        if isinstance(user_mem, str):
+            user_mem = bytes.fromhex(user_mem)
+        elif user_mem is not None and not isinstance(user_mem, (bytes, bytearray)):
+            user_mem = bytes(user_mem)
+        if len(epc) > _MAX_EPC_LENGTH or (user_mem is not None and len(user_mem) > _MAX_USER_MEM_LENGTH):
+            raise ValueError('Report too long for the parse pool')
+        timestamp = None if self._compact else datetime.now()
+        record = _RECORD.pack(_TECHNOLOGY_CODES[technology], len(epc),
+                              _NO_USER_MEM if user_mem is None else len(user_mem))
+        pool = self._pool
+        with self._lock:
+            buffer = self._buffer
+            if len(buffer) + len(record) + len(epc) + (len(user_mem) if user_mem else 0) > pool.segment_size:
+                self._flush_locked()
+                buffer = self._buffer
+            if not buffer:
+                self._batch_started = time.monotonic()
+            buffer += record
+            buffer += epc
+            if user_mem:
+                buffer += user_mem
+            self._contexts.append(context)
+            self._timestamps.append(timestamp)
+            if len(self._contexts) >= pool.batch_size:
+                self._flush_locked()
+
+    @property
+    def pending_reports(self) -> int:
+        """Reports submitted and not delivered yet."""
+        with self._lock:
+            return len(self._contexts) + sum(len(contexts) for _, contexts, _ in self._pending)
+
+    def flush(self, older_than_s: float = 0.0):
+        with self._lock:
+            if self._contexts and time.monotonic() - self._batch_started >= older_than_s:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._contexts:
+            return
+        contexts, self._contexts = self._contexts, []
+        timestamps, self._timestamps = self._timestamps, []
+        future = self._pool._submit_batch(self._buffer)
+        self._buffer = bytearray()
+        self._pending.append((future, contexts, timestamps))
+        future.add_done_callback(lambda _: self._pool._ready.put(self))
+
+    def _drain(self):
+        # Runs on the pool delivery thread (and in wait()); delivering under
+        # one lock, head first, keeps the results in submission order.
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    if not self._pending or not self._pending[0][0].done():
+                        return
+                    future, contexts, timestamps = self._pending.popleft()
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error('Parse batch failed: %s', e)
+                    results = [None] * len(contexts)
+                if not self._compact:
+                    results = [materialize(r, timestamp) if r is not None else None
+                               for r, timestamp in zip(results, timestamps)]
+                try:
+                    self._callback(results, contexts)
+                except Exception:
+                    logger.exception('Error in parse stream callback')
+
+    def wait(self, timeout_s: Optional[float] = None) -> bool:
+        """Flush and wait until every submitted report has been delivered."""
+        self.flush()
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+                future = self._pending[-1][0]
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            try:
+                future.result(timeout=remaining)
+            except Exception:
+                pass
+            self._drain()
+
+    def close(self):
+        self.wait()
+        self.closed = True
+        self._pool._streams.discard(self)
+
+
+class SenseidParsePool:
+    """Pool of worker processes decoding report batches from shared memory.
+
+    `batch_size` reports (or whatever has been queued for `max_delay_s`)
+    go in one batch; `segment_size` bounds the bytes of one batch. Up to
+    `segments` batches are in flight, submit() blocks when all are busy."""
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 256, max_delay_s: float = 0.002,
+                 segment_size: int = 256 * 1024, segments: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_delay_s = max_delay_s
+        self.segment_size = segment_size
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._segments = [shared_memory.SharedMemory(create=True, size=segment_size)
+                          for _ in range(segments or 2 * self.workers + 1)]
+        self._free: 'queue.Queue[shared_memory.SharedMemory]' = queue.Queue()
+        for segment in self._segments:
+            self._free.put(segment)
+        self._streams = set()
+        # Results are delivered from a thread of our own: the executor's
+        # done callbacks must never wait on a stream that may itself be
+        # waiting for a free segment.
+        self._ready: 'queue.Queue[Optional[SenseidParseStream]]' = queue.Queue()
+        self._stop_event = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='senseid-parse-flush')
+        self._flusher.start()
+        self._deliverer = threading.Thread(target=self._deliver_loop, daemon=True, name='senseid-parse-deliver')
+        self._deliverer.start()
+
+    def open_stream(self, callback: Callable[[List, List], None], compact: bool = False) -> SenseidParseStream:
+        """New ordered stream. `callback(results, contexts)` receives each
+        batch: SenseidTag objects (compact tuples with compact=True), None
+        for reports that could not be parsed."""
+        stream = SenseidParseStream(self, callback, compact)
+        self._streams.add(stream)
+        return stream
+
+    def _submit_batch(self, batch: bytearray) -> Future:
+        segment = self._free.get()
+        length = len(batch)
+        segment.buf[:length] = batch
+        future = self._executor.submit(_decode_segment, segment.name, length)
+        future.add_done_callback(lambda _: self._free.put(segment))
+        return future
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.max_delay_s):
+            for stream in list(self._streams):
+                stream.flush(older_than_s=self.max_delay_s)
+
+    def _deliver_loop(self):
+        while True:
+            stream = self._ready.get()
+            if stream is None:
+                return
+            stream._drain()
+
+    def close(self):
+        for stream in list(self._streams):
+            stream.close()
+        self._stop_event.set()
+        self._flusher.join()
+        self._executor.shutdown()
+        self._ready.put(None)
+        self._deliverer.join()
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -191,4 +191,5 @@ class SenseidSenseReadTag(SenseidTag):
         self.datasheet_url = type_config.datasheet_url
         self.store_url = type_config.store_url
         self._decode_user_mem(type_config, user_mem)
-        logger.debug('Parsing senseRead tag done -> %s', self)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Parsing senseRead tag done -> %s', self)
@@ -1,11 +1,42 @@
-from dataclasses import dataclass
+import itertools
+import logging
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import List, Callable, Optional
+from typing import Any, List, Callable, Optional
 from abc import ABC, abstractmethod
 
 from dataclasses_json import dataclass_json
 
+from .latency import SenseidLatencyRecorder
 from ..parsers import SenseidTag, SenseidTechnologies
+from ..parsers.ble import SenseidBleTag
+from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.rain import SenseidRainTag
+from ..parsers.senseread import SenseidSenseReadTag
+from ..trace import TRACE
+
+logger = logging.getLogger(__name__)
+
+# Tags whose sensor data comes from a User-memory read in SENSEREAD mode
+_USER_MEM_TAGS = (SenseidSenseReadTag, SenseidFarsensTag)
+# Latency histogram family of each tag class; other tags use their technology
+_TAG_FAMILIES = {
+    SenseidRainTag: 'RAIN',
+    SenseidSenseReadTag: 'SENSEREAD',
+    SenseidFarsensTag: 'FARSENS',
+    SenseidBleTag: 'BLE',
+}
+_ROUND_RATE_WINDOW_S = 1.0
+
+# Every SenseidReader alive in the process, for the metrics exporter
+_READERS: 'weakref.WeakSet[SenseidReader]' = weakref.WeakSet()
+_READER_NUMBERS = itertools.count(1)
+# Called with (reader, details) whenever a driver learns its details
+_DETAILS_LISTENERS: List[Callable[['SenseidReader', 'SenseidReaderDetails'], None]] = []
 
 
 class SenseidReaderMode(Enum):
@@ -29,6 +60,8 @@ class SupportedSenseidReader(Enum):
     KLSBLELCR = 'KLSBLELCR'
     NURAPY = 'NURAPY'
     REDRCP = 'REDRCP'
+    REPLAY = 'REPLAY'
+    SIMULATED = 'SIMULATED'
     ZEBRA_LLRP = 'ZEBRA_LLRP'
 
 
@@ -54,8 +87,64 @@ class SenseidReaderDetails:
     serial_number: Optional[str] = None
 
 
+@dataclass_json
+@dataclass
+class SenseidReaderStats:
+    reports_received: int = 0           # raw reports handed over by the driver
+    tags_delivered: int = 0             # tags passed to the notification callback
+    parse_failures: int = 0
+    senseread_reads_attempted: int = 0  # SENSEREAD mode, senseRead/Farsens tags only
+    senseread_reads_succeeded: int = 0
+    senseread_reads_stale: int = 0      # User memory read but not refreshed/invalid
+    callback_time_s: float = 0.0        # total time spent in the notification callback
+    queue_depth: Optional[int] = None   # tags waiting inside the driver; None when the driver can't tell
+    reconnects: int = 0
+    inventory_rounds: int = 0
+    inventory_rounds_per_s: Optional[float] = None  # None when the driver can't tell rounds apart
+    flow_control_pauses: int = 0        # inventory paused because of the delivery backlog
+    flow_control_paused_s: float = 0.0  # total time paused by flow control
+    tags_shed: int = 0                  # plain IDs withheld by load shedding
+
+
 class SenseidReader(ABC):
     technology: SenseidTechnologies = SenseidTechnologies.RAIN
+    # Raw report capture (see capture.py). _deliver() hands every report to
+    # the driver's capture function before parsing it; nothing is recorded
+    # until start_capture() is called.
+    _capture = None
+    _capture_only = False  # captured reports are neither parsed nor delivered
+    _capture_owned = False
+    _capture_reader_index = 0
+    # Label of the reader in the metrics exporter; defaults to the serial
+    # number or model name.
+    stats_label: Optional[str] = None
+    _parse_stream = None
+    # Inventory state for flow control (flow.py). Drivers report the
+    # application's start/stop calls through _inventory_started() and
+    # _inventory_stopped().
+    _inventory_callbacks = None  # (notification, error) callbacks while the application runs an inventory
+    _inventory_running = False
+    _flow_switching = None       # thread id of the flow controller while it stops/starts the inventory
+    _flow_control = None
+    _load_shedder = None
+    # Set by create_SenseidReader(), for the details listeners
+    connection_info: Optional[SenseidReaderConnectionInfo] = None
+    _details: Optional[SenseidReaderDetails] = None
+
+    def __init__(self):
+        # Counters are plain attributes updated without locks: each driver
+        # updates them from its own report thread and readers only ever see
+        # a slightly stale snapshot.
+        self._stats = SenseidReaderStats()
+        self._stats_senseread = False
+        self._round_window_start = time.monotonic()
+        self._round_window_count = 0
+        self._round_rate: Optional[float] = None
+        self._latency = SenseidLatencyRecorder()
+        # Registration order, fixed for the life of the reader: tells apart
+        # readers sharing a stats label
+        self._reader_number = next(_READER_NUMBERS)
+        _READERS.add(self)
 
     @abstractmethod
     def connect(self, connection_string: str):
@@ -104,16 +193,354 @@ class SenseidReader(ABC):
         supported = self.get_supported_modes()
         if mode not in supported:
             raise ValueError(f'Mode {mode} not supported. Supported: {supported}')
+        self._stats_senseread = mode == SenseidReaderMode.SENSEREAD
 
     def resume_from_error(self):
         pass
 
+    @property
+    def details(self) -> Optional[SenseidReaderDetails]:
+        """Details cached by get_details(); drivers assign them once read
+        from the reader, which notifies the details listeners."""
+        return self._details
+
+    @details.setter
+    def details(self, details: Optional[SenseidReaderDetails]):
+        self._details = details
+        if details is None:
+            return
+        for listener in list(_DETAILS_LISTENERS):
+            try:
+                listener(self, details)
+            except Exception:
+                logger.exception('Reader details listener failed')
+
+    # ── Statistics ───────────────────────────
+
+    def get_stats(self) -> SenseidReaderStats:
+        """Snapshot of the reader counters since it was created."""
+        stats = replace(self._stats)
+        stats.queue_depth = self._queue_depth()
+        if stats.inventory_rounds:
+            elapsed = time.monotonic() - self._round_window_start
+            if self._round_rate is None or elapsed >= 2 * _ROUND_RATE_WINDOW_S:
+                # No complete window yet, or rounds stopped: use the open one
+                stats.inventory_rounds_per_s = (stats.inventory_rounds - self._round_window_count) / elapsed
+            else:
+                stats.inventory_rounds_per_s = self._round_rate
+        flow_control = self._flow_control
+        if flow_control is not None:
+            paused_since = flow_control.paused_since
+            if paused_since is not None:
+                stats.flow_control_paused_s += time.monotonic() - paused_since
+        return stats
+
+    def get_latency(self) -> SenseidLatencyRecorder:
+        """Latency histograms of the notification path, per tag family and
+        stage (see latency.py). Query with .histogram(stage, family) or
+        .summary(); clear with reset_latency()."""
+        return self._latency
+
+    def reset_latency(self):
+        self._latency.reset()
+
+    def get_stats_label(self) -> str:
+        if self.stats_label:
+            return self.stats_label
+        details = getattr(self, 'details', None)
+        if details is not None and (details.serial_number or details.model_name):
+            return details.serial_number or details.model_name
+        return type(self).__name__
+
+    def _queue_depth(self) -> Optional[int]:
+        """Tags buffered inside the driver, None when its library does not
+        expose them. Drivers with a reachable queue override it."""
+        return None
+
+    def _count_inventory_round(self):
+        stats = self._stats
+        stats.inventory_rounds += 1
+        now = time.monotonic()
+        elapsed = now - self._round_window_start
+        if elapsed >= _ROUND_RATE_WINDOW_S:
+            self._round_rate = (stats.inventory_rounds - self._round_window_count) / elapsed
+            self._round_window_start = now
+            self._round_window_count = stats.inventory_rounds
+
+    def _deliver(self, build_tag: Callable[[Any], Optional[SenseidTag]], report,
+                 user_mem: Optional[str | bytes | bytearray] = None, reader_lag_s: Optional[float] = None,
+                 epc: Optional[str | bytes | bytearray] = None, capture: Optional[Callable[[Any], None]] = None):
+        """Hot path shared by the drivers: count the report, parse it with
+        `build_tag` and hand the tag to the notification callback.
+        `user_mem` is the report's User memory, for the senseRead counters;
+        `reader_lag_s` the time since the reader stamped the report, when
+        the driver knows it. With a parse pool attached, reports that come
+        with their raw `epc` are decoded by the pool instead. `capture`
+        records the raw report while a capture is running."""
+        entry = time.perf_counter()
+        stats = self._stats
+        stats.reports_received += 1
+        callback = self.notification_callback
+        if callback is None:
+            return
+        if self._capture is not None and capture is not None:
+            capture(report)
+            if self._capture_only:
+                return
+        stream = self._parse_stream
+        if stream is not None and epc is not None:
+            try:
+                stream.submit(self.technology, epc, user_mem, (entry, user_mem, reader_lag_s))
+                return
+            except ValueError:
+                # Not valid hex or too long for a pool record: let the pool
+                # catch up and parse it inline, which keeps the tags in order
+                stream.wait()
+        try:
+            tag = build_tag(report)
+        except Exception as e:
+            tag = None
+            logger.debug('Could not parse report %r: %s', report, e)
+        if TRACE.enabled:
+            TRACE.record(type(self).__name__, 'report %r -> %s', report, tag)
+        self._deliver_tag(callback, tag, entry, user_mem, reader_lag_s)
+
+    def _deliver_tag(self, callback: Callable[[SenseidTag], None], tag: Optional[SenseidTag], entry: float,
+                     user_mem: Optional[str | bytes | bytearray], reader_lag_s: Optional[float]):
+        stats = self._stats
+        if tag is None:
+            stats.parse_failures += 1
+            return
+        if self._stats_senseread and isinstance(tag, _USER_MEM_TAGS):
+            stats.senseread_reads_attempted += 1
+            if tag.data is not None:
+                stats.senseread_reads_succeeded += 1
+            elif user_mem:
+                stats.senseread_reads_stale += 1
+        shedder = self._load_shedder
+        if shedder is not None and not shedder.admit(tag):
+            stats.tags_shed += 1
+            return
+        parsed = time.perf_counter()
+        callback(tag)
+        done = time.perf_counter()
+        stats.callback_time_s += done - parsed
+        stats.tags_delivered += 1
+        self._latency.record(_TAG_FAMILIES.get(type(tag)) or tag.technology.value, entry, parsed, done,
+                             reader_lag_s)
+
+    def _deliver_parsed(self, tags: List[Optional[SenseidTag]], contexts: List[tuple]):
+        """Parse pool callback: one decoded batch, in submission order."""
+        callback = self.notification_callback
+        if callback is None:
+            return
+        for tag, (entry, user_mem, reader_lag_s) in zip(tags, contexts):
+            self._deliver_tag(callback, tag, entry, user_mem, reader_lag_s)
+
+    def set_parse_pool(self, pool):
+        """Decode this reader's reports in a SenseidParsePool (see
+        parsers/pool.py) instead of on the driver thread; None goes back to
+        inline parsing. Tags keep the order of the reports."""
+        stream = self._parse_stream
+        self._parse_stream = None
+        if stream is not None:
+            stream.close()
+        if pool is not None:
+            if self.technology == SenseidTechnologies.NFC:
+                raise ValueError('NFC reports are not decoded by the parse pool')
+            self._parse_stream = pool.open_stream(self._deliver_parsed)
+
+    def _notify(self, callback: Optional[Callable[[SenseidTag], None]], tag: SenseidTag):
+        """Hand an already built tag to `callback`, counting it."""
+        if callback is None:
+            return
+        stats = self._stats
+        shedder = self._load_shedder
+        if shedder is not None and not shedder.admit(tag):
+            stats.tags_shed += 1
+            return
+        start = time.perf_counter()
+        callback(tag)
+        done = time.perf_counter()
+        stats.callback_time_s += done - start
+        stats.tags_delivered += 1
+        self._latency.record(_TAG_FAMILIES.get(type(tag)) or tag.technology.value, start, start, done)
+
+    # ── Flow control ─────────────────────────
+
+    def set_flow_control(self, high_watermark: Optional[int], low_watermark: Optional[int] = None,
+                         backlog: Optional[Callable[[], int]] = None, check_interval_s: float = 0.1,
+                         max_pause_s: Optional[float] = None, on_event: Optional[Callable[[Any], None]] = None):
+        """Pause the inventory while `high_watermark` or more tags wait to
+        be delivered and resume it once `low_watermark` (default half) or
+        fewer are left. `backlog()` counts the waiting tags; by default the
+        tags queued in the driver and in the parse pool plus the
+        `queue_depth` of the notification callback, if it has one (e.g. a
+        SenseidOrderedDispatcher). Only NURAPY and IMPINJ_IOT expose their
+        driver queue (IMPINJ_IOT's holds at most 4096 events: keep the high
+        watermark below that). With other drivers an inline callback builds
+        no visible backlog, so use a dispatcher, a parse pool or a custom
+        `backlog`. With `max_pause_s` the inventory resumes
+        after that long whatever the backlog, so it runs in bursts instead
+        of stopping. PAUSE / RESUME events go to `on_event` (see flow.py).
+        None disables flow control, resuming a paused inventory."""
+        from .flow import SenseidFlowController
+        controller = self._flow_control
+        self._flow_control = None
+        if controller is not None:
+            controller.stop()
+        if high_watermark is None:
+            return None
+        if low_watermark is None:
+            low_watermark = high_watermark // 2
+        if backlog is None and self._queue_depth() is None:
+            logger.warning('%s does not expose its report queue: flow control only sees the parse pool and '
+                           'the queue_depth of the notification callback', type(self).__name__)
+        self._flow_control = SenseidFlowController(self, high_watermark, low_watermark, backlog or self._backlog,
+                                                   check_interval_s, max_pause_s, on_event)
+        return self._flow_control
+
+    def _backlog(self) -> int:
+        backlog = self._queue_depth() or 0
+        stream = self._parse_stream
+        if stream is not None:
+            backlog += stream.pending_reports
+        callbacks = self._inventory_callbacks
+        depth = getattr(callbacks[0], 'queue_depth', None) if callbacks is not None else None
+        if isinstance(depth, int):
+            backlog += depth
+        return backlog
+
+    # ── Load shedding ────────────────────────
+
+    def set_load_shedding(self, high_watermark: Optional[int], low_watermark: Optional[int] = None,
+                          plain_ids=None, sample_every: int = 10, aggregate_interval_s: float = 1.0,
+                          max_callback_load: Optional[float] = 0.9, backlog: Optional[Callable[[], int]] = None):
+        """Under pressure, deliver every sensor tag but only some plain RAIN
+        IDs: one in `sample_every` (SAMPLE), each ID once per
+        `aggregate_interval_s` (AGGREGATE, default) or none (DROP); see
+        priority.py. Pressure starts when the backlog (as in
+        set_flow_control()) reaches `high_watermark` or the callback uses
+        more than `max_callback_load` of the time, and ends at
+        `low_watermark` (default half). Withheld tags are counted in
+        get_stats().tags_shed. None disables load shedding."""
+        from .priority import SenseidLoadShedder, SenseidPlainIdPolicy
+        if high_watermark is None:
+            self._load_shedder = None
+            return None
+        self._load_shedder = SenseidLoadShedder(
+            high_watermark, high_watermark // 2 if low_watermark is None else low_watermark,
+            backlog or self._backlog, lambda: self._stats.callback_time_s,
+            plain_ids or SenseidPlainIdPolicy.AGGREGATE, sample_every, aggregate_interval_s, max_callback_load)
+        return self._load_shedder
+
+    def get_load_shedding_stats(self):
+        """SenseidLoadSheddingStats snapshot, None without load shedding."""
+        shedder = self._load_shedder
+        return replace(shedder.stats) if shedder is not None else None
+
+    def _inventory_started(self, notification_callback: Optional[Callable[[SenseidTag], None]],
+                           error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        if self._flow_switching != threading.get_ident():
+            self._inventory_callbacks = (notification_callback, error_callback)
+        self._inventory_running = True
+
+    def _inventory_stopped(self):
+        if self._flow_switching != threading.get_ident():
+            self._inventory_callbacks = None
+        self._inventory_running = False
+
+    def _switch_inventory(self, run: bool):
+        """Stop or restart the inventory on behalf of the flow controller."""
+        callbacks = self._inventory_callbacks
+        self._flow_switching = threading.get_ident()
+        try:
+            if run:
+                self.start_inventory_async(*callbacks)
+            else:
+                self.stop_inventory_async()
+        finally:
+            self._flow_switching = None
+
+    # ── Raw capture ──────────────────────────
+
+    def start_capture(self, target, compress: bool = False, reader_id: Optional[str] = None,
+                      capture_only: bool = False):
+        """Append every raw report to a capture log. `target` is a file path
+        or a writer shared with other readers: a CaptureWriter, or a
+        SenseidRingWriter to stream the reports to other processes (see
+        senseid.transport.ring). `reader_id` defaults to the serial number
+        (or model) from get_details(). With `capture_only`, reports are
+        recorded without being parsed, and the notification callback gets
+        no tags until stop_capture()."""
+        from .capture import CaptureWriter
+        self.stop_capture()
+        if isinstance(target, (str, os.PathLike)):
+            writer, owned = CaptureWriter(target, compress=compress), True
+        else:
+            writer, owned = target, False
+        if reader_id is None:
+            details = self.get_details()
+            reader_id = (details.serial_number or details.model_name) if details else None
+            reader_id = reader_id or type(self).__name__
+        self._capture_reader_index = writer.register_reader(reader_id)
+        self._capture_owned = owned
+        self._capture_only = capture_only
+        self._capture = writer
+        return writer
+
+    def stop_capture(self):
+        capture = self._capture
+        self._capture = None
+        self._capture_only = False
+        if capture is not None and self._capture_owned:
+            capture.close()
+
+    def _capture_report(self, epc: str | bytes | bytearray, user_mem: Optional[str | bytes | bytearray] = None,
+                        antenna: int = 0, rssi_dbm: Optional[float] = None, reader_timestamp: Optional[int] = None):
+        capture = self._capture
+        if capture is None:
+            return
+        try:
+            if isinstance(epc, str):
+                epc = bytes.fromhex(epc)
+            if isinstance(user_mem, str):
+                user_mem = bytes.fromhex(user_mem)
+        except ValueError:
+            logger.debug('Not capturing report with invalid hex EPC/User memory: %r', epc)
+            return
+        capture.append(self._capture_reader_index, self.technology, epc, user_mem, antenna=antenna,
+                       rssi_dbm=rssi_dbm, reader_timestamp=reader_timestamp)
+
+
+def get_active_readers() -> List[SenseidReader]:
+    """Every SenseidReader instance alive in the process, oldest first."""
+    return sorted(_READERS, key=lambda reader: reader._reader_number)
+
+
+def add_details_listener(listener: Callable[[SenseidReader, SenseidReaderDetails], None]):
+    """Call `listener(reader, details)` each time a reader learns its
+    details (the scanner uses it to fill its discovery cache)."""
+    _DETAILS_LISTENERS.append(listener)
+
+
+def remove_details_listener(listener: Callable[[SenseidReader, SenseidReaderDetails], None]):
+    if listener in _DETAILS_LISTENERS:
+        _DETAILS_LISTENERS.remove(listener)
+
 
 def get_supported_readers():
     return [reader.value for reader in SupportedSenseidReader]
 
 
 def create_SenseidReader(reader_info: SenseidReaderConnectionInfo = None, notification_callback=None) -> SenseidReader:
+    reader = _new_reader(reader_info)
+    if reader is not None:
+        reader.connection_info = reader_info
+    return reader
+
+
+def _new_reader(reader_info: SenseidReaderConnectionInfo) -> Optional[SenseidReader]:
     if reader_info.driver == SupportedSenseidReader.REDRCP:
         from .redrcp import SenseidReaderRedRcp
         return SenseidReaderRedRcp()
@@ -135,3 +562,9 @@ def create_SenseidReader(reader_info: SenseidReaderConnectionInfo = None, notifi
     if reader_info.driver == SupportedSenseidReader.ZEBRA_LLRP:
         from .zebra_llrp import SenseidZebraLlrp
         return SenseidZebraLlrp()
+    if reader_info.driver == SupportedSenseidReader.REPLAY:
+        from .replay import SenseidReplayReader
+        return SenseidReplayReader()
+    if reader_info.driver == SupportedSenseidReader.SIMULATED:
+        from .simulated import SenseidSimulatedReader
+        return SenseidSimulatedReader()
@@ -30,6 +30,7 @@ class SenseidAcr1552(SenseidReader):
     MAX_CONSECUTIVE_FAILURES = 5
 
     def __init__(self):
+        super().__init__()
         self.driver = Acr1552()
         self.details: SenseidReaderDetails | None = None
         self._connection_string: str | None = None
@@ -119,11 +120,13 @@ class SenseidAcr1552(SenseidReader):
 
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback: Optional[Callable[[SenseidReaderError], None]] = None):
+        self._inventory_started(notification_callback, error_callback)
         self._notification_callback = notification_callback
         self._error_callback = error_callback
         self._start_polling()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         self._stop_polling()
 
     # -- Internal polling --
@@ -153,6 +156,7 @@ class SenseidAcr1552(SenseidReader):
         while not self._stop_event.is_set():
             try:
                 uid = self.driver.get_uid()
+                self._count_inventory_round()
                 if uid is not None:
                     had_tag = True
                     consecutive_failures = 0
@@ -163,8 +167,8 @@ class SenseidAcr1552(SenseidReader):
                         self._stop_event.wait(0.2)
                         continue
                     tag = self._read_and_parse_ndef(uid)
-                    if tag is not None and self._notification_callback:
-                        self._notification_callback(tag)
+                    if tag is not None:
+                        self._notify(self._notification_callback, tag)
                 else:
                     if had_tag:
                         consecutive_failures += 1
@@ -185,6 +189,7 @@ class SenseidAcr1552(SenseidReader):
         while not self._stop_event.is_set():
             try:
                 uid = self.driver.get_uid()
+                self._count_inventory_round()
                 if uid is not None:
                     had_tag = True
                     consecutive_failures = 0
@@ -208,6 +213,7 @@ class SenseidAcr1552(SenseidReader):
                                 continue
 
                             raw_values = convert_to_uint(raw_data, 2, Endianness.LITTLE.value)
+                            self._stats.reports_received += 1
                             if raw_values:
                                 self._last_bulk_index = current_index
                                 self._emit_bulk_samples(raw_values, uid)
@@ -243,9 +249,13 @@ class SenseidAcr1552(SenseidReader):
         if data is None:
             return None
 
+        self._stats.reports_received += 1
+        self._capture_report(bytes(uid) if uid else b'', bytes(data))
         uid_str = bytearray(uid).hex().upper() if uid else None
         tag, type_id = parse_nfc_ndef(bytearray(data), uid=uid_str)
 
+        if tag is None:
+            self._stats.parse_failures += 1
         if type_id is not None:
             self._detected_type_id = type_id
 
@@ -279,8 +289,10 @@ class SenseidAcr1552(SenseidReader):
             group = raw_values[start:start + group_size]
             sample_time = now - timedelta(milliseconds=self.BULK_SAMPLE_INTERVAL_MS * (total_samples - 1 - sample_idx))
             tag = parse_nfc_bulk_sample(group, sample_idx, type_id, uid=uid_str, timestamp=sample_time)
-            if tag is not None and self._notification_callback:
-                self._notification_callback(tag)
+            if tag is None:
+                self._stats.parse_failures += 1
+            else:
+                self._notify(self._notification_callback, tag)
 
     def _handle_error(self):
         """Handle comms error: notify Osiris, wait for user to resume, then reconnect.
@@ -317,6 +329,7 @@ class SenseidAcr1552(SenseidReader):
                             self._last_uid = None
                         self._stop_event.clear()
                         self._start_polling()
+                        self._stats.reconnects += 1
                         logger.info(f'NFC reconnected on attempt {attempt}')
                         if self._error_callback:
                             self._error_callback(SenseidReaderError('NFC_RECOVERED', 'NFC communication restored'))
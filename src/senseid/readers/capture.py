@@ -0,0 +1,265 @@
+"""Raw inventory capture: a compact binary log of driver reports.
+
+File layout (little-endian)::
+
+    header : magic b'SIDCAPT\\0' | u16 version | u16 flags (bit 0: zstd) | u32 reserved
+    block  : u32 stored length | u32 raw length | u32 record count | payload
+    record : u16 length | u8 kind | body
+
+    kind 0, tag report : f64 host time (unix s) | i64 reader timestamp (driver units, 0 = none)
+                         | i16 RSSI (cdBm, -32768 = none) | u8 antenna (0 = unknown)
+                         | u8 technology | u8 reader index | u8 EPC length
+                         | u16 User-memory length (0xFFFF = none) | EPC | User memory
+    kind 1, reader id  : u8 reader index | UTF-8 reader id
+
+For BLE the advertisement is stored as EPC; for NFC the UID is the EPC and
+the NDEF area the User memory. Blocks are compressed independently with
+zstd when the file is written with compress=True (needs `zstandard`).
+"""
+import logging
+import mmap
+import struct
+import threading
+import time
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from ..parsers import SenseidTag, SenseidTechnologies
+from ..parsers.ble import SenseidBleTag
+from ..parsers.dispatch import parse_rain_report
+from ..parsers.nfc import parse_nfc_ndef
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SIDCAPT\0'
+FORMAT_VERSION = 1
+FLAG_ZSTD = 0x0001
+
+_FILE_HEADER = struct.Struct('<8sHHI')
+_BLOCK_HEADER = struct.Struct('<III')
+_RECORD_LENGTH = struct.Struct('<H')
+_REPORT = struct.Struct('<BdqhBBBBH')  # kind + fixed tag-report fields
+_READER_ID = struct.Struct('<BB')
+
+_KIND_REPORT = 0
+_KIND_READER_ID = 1
+_NO_RSSI = -0x8000
+_NO_USER_MEM = 0xFFFF
+
+_TECHNOLOGY_CODES = {
+    SenseidTechnologies.RAIN: 0,
+    SenseidTechnologies.BLE: 1,
+    SenseidTechnologies.NFC: 2,
+}
+_TECHNOLOGIES = {code: technology for technology, code in _TECHNOLOGY_CODES.items()}
+
+
+class CapturedReport(NamedTuple):
+    host_time: float
+    reader_timestamp: int
+    rssi_dbm: Optional[float]
+    antenna: int
+    technology: SenseidTechnologies
+    reader_id: Optional[str]
+    epc: bytes
+    user_mem: Optional[bytes]
+
+
+def parse_captured_report(report: CapturedReport) -> Optional[SenseidTag]:
+    """Tag of a captured report, parsed as the live driver would."""
+    if report.technology == SenseidTechnologies.RAIN:
+        return parse_rain_report(report.epc, report.user_mem)
+    if report.technology == SenseidTechnologies.BLE:
+        return SenseidBleTag(bytearray(report.epc))
+    if report.user_mem is None:
+        return None
+    tag, _ = parse_nfc_ndef(bytearray(report.user_mem), uid=report.epc.hex().upper() or None)
+    return tag
+
+
+class CaptureWriter:
+    """Append-only capture log. Thread safe: several readers can share one
+    writer, each identified by the index returned by register_reader().
+
+    Records are buffered and written one block at a time, when the block
+    reaches `block_size` bytes or is older than `flush_interval_s` (checked
+    by a background thread, so a quiet capture still reaches the disk)."""
+
+    def __init__(self, path: str, compress: bool = False, block_size: int = 64 * 1024,
+                 flush_interval_s: float = 1.0, compression_level: int = 3):
+        self.path = path
+        self.block_size = block_size
+        self.flush_interval_s = flush_interval_s
+        self._compressor = None
+        if compress:
+            import zstandard
+            self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._lock = threading.Lock()
+        self._buffer = bytearray()
+        self._count = 0
+        self._block_started = 0.0
+        self._reader_ids: Dict[str, int] = {}
+        self._file = open(path, 'wb')
+        self._file.write(_FILE_HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_ZSTD if compress else 0, 0))
+        self._file.flush()  # a capture being written can be opened right away
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True, name='senseid-capture-flush')
+        self._flusher.start()
+
+    def register_reader(self, reader_id: str) -> int:
+        with self._lock:
+            index = self._reader_ids.get(reader_id)
+            if index is None:
+                index = len(self._reader_ids)
+                if index > 0xFF:
+                    raise ValueError('A capture file holds at most 256 readers')
+                self._reader_ids[reader_id] = index
+                body = _READER_ID.pack(_KIND_READER_ID, index) + reader_id.encode()
+                self._append_locked(body)
+            return index
+
+    def append(self, reader_index: int, technology: SenseidTechnologies, epc: bytes | bytearray,
+               user_mem: Optional[bytes | bytearray] = None, antenna: int = 0, rssi_dbm: Optional[float] = None,
+               reader_timestamp: Optional[int] = None, host_time: Optional[float] = None):
+        rssi = _NO_RSSI if rssi_dbm is None else max(min(int(round(rssi_dbm * 100)), 0x7FFF), -0x7FFF)
+        body = _REPORT.pack(_KIND_REPORT, time.time() if host_time is None else host_time,
+                            reader_timestamp or 0, rssi, antenna & 0xFF, _TECHNOLOGY_CODES[technology],
+                            reader_index, len(epc), _NO_USER_MEM if user_mem is None else len(user_mem))
+        with self._lock:
+            self._append_locked(body, epc, user_mem)
+
+    def _append_locked(self, body: bytes, epc: bytes | bytearray = b'',
+                       user_mem: Optional[bytes | bytearray] = None):
+        buffer = self._buffer
+        if not buffer:
+            self._block_started = time.monotonic()
+        length = len(body) + len(epc) + (len(user_mem) if user_mem else 0)
+        buffer += _RECORD_LENGTH.pack(length)
+        buffer += body
+        buffer += epc
+        if user_mem:
+            buffer += user_mem
+        self._count += 1
+        if len(buffer) >= self.block_size or time.monotonic() - self._block_started >= self.flush_interval_s:
+            self._write_block_locked()
+
+    def _flush_loop(self):
+        wait_s = self.flush_interval_s
+        while not self._closed.wait(wait_s):
+            with self._lock:
+                age = time.monotonic() - self._block_started if self._buffer else 0.0
+                if age >= self.flush_interval_s:
+                    self._write_block_locked()
+                    age = 0.0
+            # Wake up when the open block reaches flush_interval_s
+            wait_s = max(self.flush_interval_s - age, 0.01)
+
+    def _write_block_locked(self):
+        if not self._buffer or self._file is None:
+            return
+        raw = bytes(self._buffer)
+        stored = self._compressor.compress(raw) if self._compressor is not None else raw
+        self._file.write(_BLOCK_HEADER.pack(len(stored), len(raw), self._count))
+        self._file.write(stored)
+        self._file.flush()
+        self._buffer.clear()
+        self._count = 0
+
+    def flush(self):
+        with self._lock:
+            self._write_block_locked()
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
+        with self._lock:
+            self._write_block_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CaptureFile:
+    """Memory-mapped reader of a capture log. Iterating yields every
+    CapturedReport in file order; a block truncated by a crash ends the
+    iteration with a warning."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._file.close()
+            raise ValueError(f'{path} is not a SenseID capture file')
+        magic, version, flags, _ = _FILE_HEADER.unpack_from(self._map, 0) \
+            if len(self._map) >= _FILE_HEADER.size else (None, None, None, None)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a SenseID capture file (version {FORMAT_VERSION})')
+        self._decompressor = None
+        if flags & FLAG_ZSTD:
+            import zstandard
+            self._decompressor = zstandard.ZstdDecompressor()
+        self.reader_ids: Dict[int, str] = {}
+
+    def _blocks(self) -> Iterator[tuple]:
+        """Yield (buffer, start, end) of every block payload. Uncompressed
+        blocks are read in place from the map."""
+        data = self._map
+        offset = _FILE_HEADER.size
+        size = len(data)
+        while offset + _BLOCK_HEADER.size <= size:
+            stored_length, raw_length, _ = _BLOCK_HEADER.unpack_from(data, offset)
+            offset += _BLOCK_HEADER.size
+            if offset + stored_length > size:
+                logger.warning('%s: truncated block at offset %d, stopping', self.path, offset)
+                return
+            if self._decompressor is not None:
+                yield self._decompressor.decompress(data[offset:offset + stored_length],
+                                                    max_output_size=raw_length), 0, raw_length
+            else:
+                yield data, offset, offset + stored_length
+            offset += stored_length
+
+    def __iter__(self) -> Iterator[CapturedReport]:
+        unpack_length = _RECORD_LENGTH.unpack_from
+        unpack_report = _REPORT.unpack_from
+        report_size = _REPORT.size
+        reader_ids = self.reader_ids
+        for block, offset, end in self._blocks():
+            while offset < end:
+                length = unpack_length(block, offset)[0]
+                offset += 2
+                kind = block[offset]
+                if kind == _KIND_REPORT:
+                    (_, host_time, reader_timestamp, rssi, antenna, technology, reader_index, epc_length,
+                     user_mem_length) = unpack_report(block, offset)
+                    epc_start = offset + report_size
+                    epc_end = epc_start + epc_length
+                    yield CapturedReport(
+                        host_time, reader_timestamp, None if rssi == _NO_RSSI else rssi / 100.0, antenna,
+                        _TECHNOLOGIES[technology], reader_ids.get(reader_index), block[epc_start:epc_end],
+                        None if user_mem_length == _NO_USER_MEM
+                        else block[epc_end:epc_end + user_mem_length])
+                elif kind == _KIND_READER_ID:
+                    reader_ids[block[offset + 1]] = block[offset + 2:offset + length].decode()
+                offset += length
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
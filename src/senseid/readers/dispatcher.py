@@ -0,0 +1,215 @@
+"""Ordered parallel dispatch of tag notifications.
+
+Drivers call the notification callback on their own report thread, so a
+callback that blocks (database lookups, HTTP enrichment) stalls the radio
+stream. SenseidOrderedDispatcher is a notification callback that queues
+each tag to one of N worker threads, chosen by the hash of the tag id:
+tags of the same id reach the callback in report order, different tags
+are processed in parallel::
+
+    dispatcher = SenseidOrderedDispatcher(enrich_tag, workers=8, max_queue=10000,
+                                          overflow=SenseidOverflowPolicy.DROP_OLDEST)
+    reader.start_inventory_async(dispatcher)
+    ...
+    reader.stop_inventory_async()
+    dispatcher.close()   # waits for the queued tags
+
+Several readers can share a dispatcher; the order is then kept per tag id
+and reader thread. With `priority_lanes=True`, sensor tags (see
+priority.py) are queued ahead of plain IDs in each shard, and a full shard
+makes room for a sensor tag by dropping its oldest plain ID.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Deque, List, Optional
+
+from dataclasses_json import dataclass_json
+
+from .priority import is_priority_tag
+from ..parsers import SenseidTag
+
+logger = logging.getLogger(__name__)
+
+
+class SenseidOverflowPolicy(Enum):
+    BLOCK = 'BLOCK'              # the reader thread waits for room
+    DROP_NEWEST = 'DROP_NEWEST'  # the incoming tag is dropped
+    DROP_OLDEST = 'DROP_OLDEST'  # the oldest queued tag of the shard is dropped
+
+
+@dataclass_json
+@dataclass
+class SenseidDispatcherStats:
+    tags_queued: int = 0
+    tags_delivered: int = 0
+    tags_dropped: int = 0
+    callback_errors: int = 0
+    priority_tags_queued: int = 0  # priority_lanes only
+    queue_depth: int = 0      # all shards
+    max_shard_depth: int = 0
+
+
+class _Shard:
+    __slots__ = ('queue', 'priority', 'not_empty', 'not_full', 'thread', 'queued', 'priority_queued', 'delivered',
+                 'dropped', 'errors', 'busy', 'in_flight')
+
+    def __init__(self):
+        lock = threading.Lock()
+        self.queue: Deque[SenseidTag] = deque()
+        self.priority: Deque[SenseidTag] = deque()  # priority lane, served first
+        self.not_empty = threading.Condition(lock)
+        self.not_full = threading.Condition(lock)
+        self.thread: Optional[threading.Thread] = None
+        self.queued = 0
+        self.priority_queued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy = False  # the worker is running callbacks
+        self.in_flight = 0  # tags of the worker's batch not handed to the callback yet
+
+    def __len__(self):
+        return len(self.queue) + len(self.priority) + self.in_flight
+
+
+class SenseidOrderedDispatcher:
+    """Runs `callback(tag)` on `workers` threads, keeping the order of the
+    tags per tag id. Each worker holds up to `max_queue` tags, counting
+    the batch it is running; `overflow` decides what happens when it is
+    full. Exceptions raised by the callback are logged and counted, and
+    the worker goes on."""
+
+    def __init__(self, callback: Callable[[SenseidTag], None], workers: int = 4, max_queue: int = 10000,
+                 overflow: SenseidOverflowPolicy = SenseidOverflowPolicy.BLOCK, batch_size: int = 64,
+                 priority_lanes: bool = False):
+        if workers < 1:
+            raise ValueError('workers must be >= 1')
+        self.callback = callback
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.priority_lanes = priority_lanes
+        self._closed = False
+        self._shards: List[_Shard] = [_Shard() for _ in range(workers)]
+        for n, shard in enumerate(self._shards):
+            shard.thread = threading.Thread(target=self._run, args=(shard,), daemon=True,
+                                            name=f'senseid-dispatcher-{n}')
+            shard.thread.start()
+
+    # ── Hot path ─────────────────────────────
+
+    def __call__(self, tag: SenseidTag):
+        if self._closed:
+            raise RuntimeError('Dispatcher is closed')
+        shards = self._shards
+        shard = shards[hash(tag.id) % len(shards)]
+        priority = self.priority_lanes and is_priority_tag(tag)
+        with shard.not_empty:
+            queue = shard.priority if priority else shard.queue
+            if len(shard) >= self.max_queue:
+                policy = self.overflow
+                if priority and shard.queue:
+                    shard.queue.popleft()  # plain IDs make room for sensor tags
+                    shard.dropped += 1
+                elif policy is SenseidOverflowPolicy.BLOCK:
+                    while len(shard) >= self.max_queue and not self._closed:
+                        shard.not_full.wait()
+                    if self._closed:
+                        shard.dropped += 1
+                        return
+                elif policy is SenseidOverflowPolicy.DROP_NEWEST or not queue:
+                    shard.dropped += 1
+                    return
+                else:
+                    queue.popleft()
+                    shard.dropped += 1
+            queue.append(tag)
+            shard.queued += 1
+            if priority:
+                shard.priority_queued += 1
+            shard.not_empty.notify()
+
+    # ── Workers ──────────────────────────────
+
+    def _run(self, shard: _Shard):
+        callback = self.callback
+        queue = shard.queue
+        priority = shard.priority
+        batch_size = self.batch_size
+        while True:
+            with shard.not_empty:
+                while not queue and not priority:
+                    shard.busy = False
+                    shard.not_full.notify_all()  # wakes drain() as well
+                    if self._closed:
+                        return
+                    shard.not_empty.wait()
+                shard.busy = True
+                batch = [priority.popleft() for _ in range(min(batch_size, len(priority)))]
+                if len(batch) < batch_size:
+                    batch += [queue.popleft() for _ in range(min(batch_size - len(batch), len(queue)))]
+                shard.in_flight = len(batch)
+                shard.not_full.notify_all()  # room freed by the previous batch
+            for tag in batch:
+                try:
+                    callback(tag)
+                except Exception:
+                    shard.errors += 1
+                    logger.exception('Dispatcher callback failed for tag %s', tag.id)
+                shard.in_flight -= 1  # written by this worker only
+            shard.delivered += len(batch)
+
+    # ── Control ──────────────────────────────
+
+    @property
+    def queue_depth(self) -> int:
+        """Tags waiting in every shard, including the batches the workers
+        are running (the backlog seen by flow control)."""
+        return sum(len(shard) for shard in self._shards)
+
+    def get_stats(self) -> SenseidDispatcherStats:
+        depths = [len(shard) for shard in self._shards]
+        return SenseidDispatcherStats(
+            tags_queued=sum(shard.queued for shard in self._shards),
+            priority_tags_queued=sum(shard.priority_queued for shard in self._shards),
+            tags_delivered=sum(shard.delivered for shard in self._shards),
+            tags_dropped=sum(shard.dropped for shard in self._shards),
+            callback_errors=sum(shard.errors for shard in self._shards),
+            queue_depth=sum(depths),
+            max_shard_depth=max(depths))
+
+    def drain(self, timeout_s: Optional[float] = None) -> bool:
+        """Wait until every queued tag has been handed to the callback.
+        Returns False on timeout."""
+        deadline = None if timeout_s is None else time.monotonic() + timeout_s
+        for shard in self._shards:
+            with shard.not_full:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not shard.not_full.wait_for(lambda: not len(shard) and not shard.busy, remaining):
+                    return False
+        return True
+
+    def close(self, drain: bool = True):
+        """Stop accepting tags and end the workers, after delivering the
+        queued tags (`drain`) or dropping them."""
+        self._closed = True
+        for shard in self._shards:
+            with shard.not_empty:
+                if not drain:
+                    shard.dropped += len(shard)
+                    shard.queue.clear()
+                    shard.priority.clear()
+                shard.not_empty.notify_all()
+                shard.not_full.notify_all()
+        for shard in self._shards:
+            shard.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,137 @@
+"""Flow control: pause the inventory while the consumer is behind.
+
+Reports that the notification path cannot absorb pile up in the vendor
+libraries (NurAPY notification queues, sllurp report queues, Impinj IoT
+HTTP stream buffers) without bound. A SenseidFlowController watches the
+number of tags waiting to be delivered and stops the inventory above a
+high watermark, then restarts it with the same callbacks once the backlog
+is down to the low watermark::
+
+    dispatcher = SenseidOrderedDispatcher(store_tag, workers=4)
+    reader.start_inventory_async(dispatcher)
+    reader.set_flow_control(high_watermark=50000, low_watermark=10000, on_event=print)
+
+The default backlog includes the driver queue only for NURAPY and
+IMPINJ_IOT; the other drivers' libraries do not expose theirs, and with
+an inline callback they slow down instead of queueing. For those, put a
+SenseidOrderedDispatcher (or a parse pool) in the path, or pass
+`backlog`.
+
+Calls to start_inventory_async() / stop_inventory_async() made by the
+application take precedence: a reader stopped by the application while
+paused stays stopped.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Optional
+
+from dataclasses_json import dataclass_json
+
+logger = logging.getLogger(__name__)
+
+
+class SenseidFlowControlEventType(Enum):
+    PAUSE = 'PAUSE'
+    RESUME = 'RESUME'
+
+
+@dataclass_json
+@dataclass
+class SenseidFlowControlEvent:
+    kind: SenseidFlowControlEventType
+    timestamp: datetime
+    backlog: int            # tags waiting when the event was raised
+    paused_s: float = 0.0   # RESUME: time the inventory was paused
+
+
+class SenseidFlowController:
+    """Watches `backlog()` every `check_interval_s` from a thread and
+    pauses / resumes the inventory of `reader` (see
+    SenseidReader.set_flow_control(), which creates it)."""
+
+    def __init__(self, reader, high_watermark: int, low_watermark: int, backlog: Callable[[], int],
+                 check_interval_s: float = 0.1, max_pause_s: Optional[float] = None,
+                 on_event: Optional[Callable[[SenseidFlowControlEvent], None]] = None):
+        if low_watermark > high_watermark:
+            raise ValueError('low_watermark must not exceed high_watermark')
+        self.reader = reader
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.backlog = backlog
+        self.check_interval_s = check_interval_s
+        self.max_pause_s = max_pause_s
+        self.on_event = on_event
+        self.paused_since: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='senseid-flow-control')
+        self._thread.start()
+
+    @property
+    def paused(self) -> bool:
+        return self.paused_since is not None
+
+    def _run(self):
+        while not self._stop_event.wait(self.check_interval_s):
+            try:
+                self.check()
+            except Exception:
+                logger.exception('Flow control check failed')
+
+    def check(self):
+        """Compare the backlog with the watermarks once."""
+        reader = self.reader
+        if self.paused_since is None:
+            if reader._inventory_callbacks is None:
+                return  # inventory not running
+            backlog = self.backlog()
+            if backlog >= self.high_watermark:
+                self._pause(backlog)
+            return
+        if reader._inventory_callbacks is None or reader._inventory_running:
+            # The application stopped or restarted the inventory meanwhile
+            self._end_pause(self.backlog(), resume=False)
+            return
+        backlog = self.backlog()
+        overdue = self.max_pause_s is not None and time.monotonic() - self.paused_since >= self.max_pause_s
+        if backlog <= self.low_watermark or overdue:
+            self._end_pause(backlog, resume=True)
+
+    def _pause(self, backlog: int):
+        reader = self.reader
+        logger.warning('%s: %d tags waiting for delivery, pausing inventory', reader.get_stats_label(), backlog)
+        reader._switch_inventory(False)
+        self.paused_since = time.monotonic()
+        reader._stats.flow_control_pauses += 1
+        self._emit(SenseidFlowControlEvent(SenseidFlowControlEventType.PAUSE, datetime.now(), backlog))
+
+    def _end_pause(self, backlog: int, resume: bool):
+        reader = self.reader
+        paused_s = time.monotonic() - self.paused_since
+        self.paused_since = None
+        reader._stats.flow_control_paused_s += paused_s
+        if resume:
+            logger.info('%s: %d tags waiting for delivery, resuming inventory after %.1f s',
+                        reader.get_stats_label(), backlog, paused_s)
+            reader._switch_inventory(True)
+        self._emit(SenseidFlowControlEvent(SenseidFlowControlEventType.RESUME, datetime.now(), backlog, paused_s))
+
+    def _emit(self, event: SenseidFlowControlEvent):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event(event)
+        except Exception:
+            logger.exception('Flow control event callback failed')
+
+    def stop(self):
+        """Stop watching; a paused inventory is resumed."""
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        if self.paused_since is not None:
+            self._end_pause(self.backlog(), resume=self.reader._inventory_callbacks is not None
+                            and not self.reader._inventory_running)
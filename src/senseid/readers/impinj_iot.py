@@ -1,20 +1,21 @@
 import base64
+import http.client
 import json
 import logging
+import os
 import ssl
+import threading
 import urllib.error
 import urllib.request
-from typing import List, Callable, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Callable, Optional
 
 from impinj_iot import ImpinjIot, ImpinjIotTagReport, RfMode, DEFAULT_USER, DEFAULT_PASS
 
 from . import SenseidReader, SenseidReaderDetails, SenseidReaderError, SenseidReaderMode
 from ..parsers import SenseidTag
-from ..parsers.farsens import SenseidFarsensTag
-from ..parsers.farsens.yaml import SENSEID_FARSENS_DEF
-from ..parsers.senseread import SenseidSenseReadTag, is_senseid_senseread_epc
+from ..parsers.dispatch import parse_rain_report
 from ..parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
-from ..parsers.rain import SenseidRainTag
 
 logger = logging.getLogger(__name__)
 
@@ -22,25 +23,218 @@ _NO_VERIFY_CTX = ssl.create_default_context()
 _NO_VERIFY_CTX.check_hostname = False
 _NO_VERIFY_CTX.verify_mode = ssl.CERT_NONE
 
+_SYSTEM_IMAGE_PATH = '/api/v1/system/image'
+_PRESETS_SCHEMA_PATH = '/api/v1/profiles/inventory/presets-schema'
 
-def _find_schema_node(obj, key):
-    """Depth-first search for the first dict found under `key` anywhere in a
-    (possibly deeply nested) JSON-schema structure. Used to pull device
-    limits out of the inventory preset schema."""
-    if isinstance(obj, dict):
-        node = obj.get(key)
-        if isinstance(node, dict):
-            return node
-        for value in obj.values():
-            found = _find_schema_node(value, key)
-            if found is not None:
-                return found
-    elif isinstance(obj, list):
-        for value in obj:
-            found = _find_schema_node(value, key)
-            if found is not None:
-                return found
-    return None
+
+def _index_schema_nodes(schema, keys) -> Dict[str, dict]:
+    """Single-pass, preorder walk of a (possibly deeply nested) JSON-schema
+    structure returning, for each of `keys`, the first dict found under that
+    key. Matches what a separate depth-first search per key would return,
+    but walks the presets schema once instead of once per key."""
+    wanted = list(keys)
+    found = {}
+    stack = [schema]
+    while stack and wanted:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            for key in list(wanted):
+                node = obj.get(key)
+                if isinstance(node, dict):
+                    found[key] = node
+                    wanted.remove(key)
+            stack.extend(reversed(list(obj.values())))
+        elif isinstance(obj, list):
+            stack.extend(reversed(obj))
+    return found
+
+
+def _extract_capabilities(schema) -> dict:
+    """Pull device limits out of the inventory preset schema: antennaPort.maximum
+    is the antenna count and transmitPowerCdbm min/max are the power bounds
+    (in cdBm). Only the limits actually present are returned."""
+    nodes = _index_schema_nodes(schema, ('antennaPort', 'transmitPowerCdbm'))
+    capabilities = {}
+    ap = nodes.get('antennaPort')
+    tp = nodes.get('transmitPowerCdbm')
+    if ap and isinstance(ap.get('maximum'), int):
+        capabilities['antenna_count'] = ap['maximum']
+    if tp:
+        if isinstance(tp.get('minimum'), int):
+            capabilities['min_tx_power_cdbm'] = tp['minimum']
+        if isinstance(tp.get('maximum'), int):
+            capabilities['max_tx_power_cdbm'] = tp['maximum']
+    return capabilities
+
+
+class ImpinjIotCapabilitiesCache:
+    """Capabilities extracted from the presets schema, keyed by reader model
+    and Octane firmware build. Shared by every SenseidImpinjIot instance so
+    reconnecting, or bringing up many readers running the same build, skips
+    the schema download and walk. Set `path` to persist it as JSON across
+    restarts."""
+
+    _FORMAT_VERSION = 1
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._path: Optional[str] = None
+        if path is not None:
+            self.set_path(path)
+
+    @staticmethod
+    def _key(model: str, firmware: str) -> str:
+        return f'{model}|{firmware}'
+
+    def set_path(self, path: Optional[str]):
+        """Persist the cache to `path` (JSON), merging in what it already holds."""
+        with self._lock:
+            self._path = path
+            if path is None:
+                return
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+                if stored.get('version') == self._FORMAT_VERSION:
+                    for key, capabilities in stored.get('entries', {}).items():
+                        self._entries.setdefault(key, capabilities)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning('Ignoring unreadable Impinj IoT capabilities cache %s: %s', path, e)
+
+    def get(self, model: str, firmware: str) -> Optional[dict]:
+        with self._lock:
+            capabilities = self._entries.get(self._key(model, firmware))
+        return dict(capabilities) if capabilities is not None else None
+
+    def put(self, model: str, firmware: str, capabilities: dict):
+        with self._lock:
+            self._entries[self._key(model, firmware)] = dict(capabilities)
+            if self._path is not None:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._path is not None:
+                self._save()
+
+    def _save(self):
+        tmp_path = self._path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self._FORMAT_VERSION, 'entries': self._entries}, f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            logger.warning('Could not write Impinj IoT capabilities cache %s: %s', self._path, e)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+IMPINJ_IOT_CAPABILITIES_CACHE = ImpinjIotCapabilitiesCache()
+
+
+class _RestSession:
+    """Keep-alive HTTPS session against one reader's REST API.
+
+    Every urlopen() pays a fresh TCP + TLS handshake, which on an R700 costs
+    hundreds of milliseconds. This keeps a small pool of persistent
+    connections (one SSL context, one pre-built Basic auth header) and can
+    run several GETs in parallel, e.g. to prefetch what get_details() needs
+    while the driver is still connecting."""
+
+    def __init__(self, host: str, username: str, password: str,
+                 timeout: float = 4.0, max_connections: int = 4):
+        self._host = host
+        self._timeout = timeout
+        self._max_connections = max_connections
+        token = base64.b64encode(f"{username}:{password}".encode()).decode()
+        self._headers = {'Authorization': f'Basic {token}', 'Accept': 'application/json'}
+        self._lock = threading.Lock()
+        self._idle: List[http.client.HTTPSConnection] = []
+        self._pending: Dict[str, Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return http.client.HTTPSConnection(self._host, timeout=self._timeout, context=_NO_VERIFY_CTX), False
+
+    def _release(self, conn: http.client.HTTPSConnection):
+        with self._lock:
+            if len(self._idle) < self._max_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _get_json(self, path: str) -> Optional[dict]:
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request('GET', path, headers=self._headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if reused:
+                    # The reader drops idle keep-alive connections; a stale
+                    # pooled socket is not an error, retry on a fresh one.
+                    continue
+                return None
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if not 200 <= resp.status < 300:
+                return None
+            try:
+                return json.loads(body.decode())
+            except ValueError:
+                return None
+
+    def _submit(self, path: str) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_connections,
+                                                    thread_name_prefix=f'impinj-iot-{self._host}')
+            return self._executor.submit(self._get_json, path)
+
+    def prefetch(self, paths: List[str]):
+        """Start fetching `paths` in the background. The next get_json() of
+        each path returns the prefetched result instead of a new request."""
+        futures = {path: self._submit(path) for path in paths}
+        with self._lock:
+            self._pending.update(futures)
+
+    def get_json(self, path: str) -> Optional[dict]:
+        with self._lock:
+            future = self._pending.pop(path, None)
+        if future is not None:
+            return future.result()
+        return self._get_json(path)
+
+    def get_json_many(self, paths: List[str]) -> List[Optional[dict]]:
+        """GET several paths in parallel, results in the order of `paths`."""
+        with self._lock:
+            futures = [self._pending.pop(path, None) for path in paths]
+        futures = [future if future is not None else self._submit(path)
+                   for path, future in zip(paths, futures)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            idle, self._idle = self._idle, []
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for conn in idle:
+            conn.close()
 
 
 class SenseidImpinjIot(SenseidReader):
@@ -70,6 +264,7 @@ class SenseidImpinjIot(SenseidReader):
             return {'auth_required': False, 'auth_scheme': 'unreachable'}
 
     def __init__(self, username: Optional[str] = None, password: Optional[str] = None):
+        super().__init__()
         self.driver = ImpinjIot()
         self.notification_callback = None
         self.error_callback = None
@@ -78,25 +273,37 @@ class SenseidImpinjIot(SenseidReader):
         self._username = username or DEFAULT_USER
         self._password = password or DEFAULT_PASS
         self._ip: Optional[str] = None
+        self._rest: Optional[_RestSession] = None
 
-    def _api_get(self, path: str, timeout: float = 4.0) -> Optional[dict]:
+    def _api_get(self, path: str) -> Optional[dict]:
         """Authenticated GET against the reader's REST API, returning parsed
         JSON or None on any failure. Used for fields the low-level driver
         doesn't expose."""
-        if not self._ip:
-            return None
-        req = urllib.request.Request(f"https://{self._ip}{path}", method='GET')
-        token = base64.b64encode(f"{self._username}:{self._password}".encode()).decode()
-        req.add_header('Authorization', f'Basic {token}')
-        try:
-            with urllib.request.urlopen(req, timeout=timeout, context=_NO_VERIFY_CTX) as resp:
-                return json.loads(resp.read().decode())
-        except Exception:
+        if self._rest is None:
             return None
+        return self._rest.get_json(path)
+
+    def _api_get_many(self, paths: List[str]) -> List[Optional[dict]]:
+        """_api_get() of several paths, fetched in parallel."""
+        if self._rest is None:
+            return [None] * len(paths)
+        return self._rest.get_json_many(paths)
 
     def connect(self, connection_string: str):
         self._ip = connection_string
+        if self._rest is not None:
+            self._rest.close()
+        self._rest = _RestSession(connection_string, self._username, self._password)
+        # Fetch what get_details() needs while the driver does its own
+        # connect sequence, so the TLS handshakes overlap. With a warm
+        # capabilities cache the schema is most likely not needed at all.
+        if len(IMPINJ_IOT_CAPABILITIES_CACHE):
+            self._rest.prefetch([_SYSTEM_IMAGE_PATH])
+        else:
+            self._rest.prefetch([_SYSTEM_IMAGE_PATH, _PRESETS_SCHEMA_PATH])
         if not self.driver.connect(ip=connection_string, user=self._username, password=self._password):
+            self._rest.close()
+            self._rest = None
             return False
         self.driver.set_notification_callback(self._driver_notification_callback)
         self.get_details()
@@ -113,32 +320,26 @@ class SenseidImpinjIot(SenseidReader):
         return True
 
     def _driver_notification_callback(self, tag_report: ImpinjIotTagReport):
-        if self.notification_callback is None:
-            return
-        self.notification_callback(self._build_tag(tag_report))
+        self._deliver(self._build_tag, tag_report, tag_report.user_mem, epc=tag_report.epc,
+                      capture=self._capture_tag_report)
+
+    def _capture_tag_report(self, tag_report: ImpinjIotTagReport):
+        self._capture_report(tag_report.epc, tag_report.user_mem, antenna=tag_report.antenna_port,
+                             rssi_dbm=tag_report.peak_rssi_cdbm / 100
+                             if tag_report.peak_rssi_cdbm is not None else None)
 
     def _build_tag(self, tag_report: ImpinjIotTagReport) -> SenseidTag:
         # Identify the tag family from the EPC so both SENSEID and SENSEREAD
         # modes name the tag correctly. user_mem is only populated in
         # SENSEREAD mode; in SENSEID mode the senseRead/Farsens parsers still
         # recognise the model from the EPC and just leave data=None.
-        epc_hex = tag_report.epc
-        try:
-            epc_bytes = bytes.fromhex(epc_hex)
-        except (ValueError, TypeError):
-            return SenseidRainTag(epc=epc_hex)
-
-        farsens_pen = bytes(SENSEID_FARSENS_DEF.pen_header)
-        if epc_bytes[:len(farsens_pen)] == farsens_pen:
-            return SenseidFarsensTag(epc=epc_hex, user_mem_hex=tag_report.user_mem)
-
-        if is_senseid_senseread_epc(epc_bytes):
-            return SenseidSenseReadTag(epc=epc_hex, user_mem_hex=tag_report.user_mem)
-
-        return SenseidRainTag(epc=epc_hex)
+        return parse_rain_report(tag_report.epc, tag_report.user_mem)
 
     def disconnect(self):
         self.driver.disconnect()
+        if self._rest is not None:
+            self._rest.close()
+            self._rest = None
 
     def get_details(self) -> SenseidReaderDetails:
         if self.details is None:
@@ -150,29 +351,35 @@ class SenseidImpinjIot(SenseidReader):
             # spec version (1.x). The real Octane firmware lives in
             # /api/v1/system/image -> primaryFirmware ("10.3.0+git...build").
             firmware = info.firmware_version
-            image = self._api_get('/api/v1/system/image')
+            schema_fetched = not len(IMPINJ_IOT_CAPABILITIES_CACHE)
+            if schema_fetched:
+                # Cold cache: the schema will be needed, fetch both at once
+                image, schema = self._api_get_many([_SYSTEM_IMAGE_PATH, _PRESETS_SCHEMA_PATH])
+            else:
+                image, schema = self._api_get(_SYSTEM_IMAGE_PATH), None
+            firmware_build = None
             if image and image.get('primaryFirmware'):
-                firmware = image['primaryFirmware'].split('+')[0]
+                firmware_build = image['primaryFirmware']
+                firmware = firmware_build.split('+')[0]
 
             # /api/v1/caps is gone on Octane 10.3, so the driver returns
             # hardcoded antenna-count/power fallbacks. The authoritative
-            # limits live in the inventory preset schema: antennaPort.maximum
-            # is the antenna count and transmitPowerCdbm min/max are the power
-            # bounds (in cdBm).
-            antenna_count = info.antenna_count
-            min_cdbm = info.min_tx_power_cdbm
-            max_cdbm = info.max_tx_power_cdbm
-            schema = self._api_get('/api/v1/profiles/inventory/presets-schema')
-            if schema:
-                ap = _find_schema_node(schema, 'antennaPort')
-                tp = _find_schema_node(schema, 'transmitPowerCdbm')
-                if ap and isinstance(ap.get('maximum'), int):
-                    antenna_count = ap['maximum']
-                if tp:
-                    if isinstance(tp.get('minimum'), int):
-                        min_cdbm = tp['minimum']
-                    if isinstance(tp.get('maximum'), int):
-                        max_cdbm = tp['maximum']
+            # limits live in the inventory preset schema; they only change
+            # with the firmware build, so they are cached per model + build.
+            capabilities = None
+            if firmware_build is not None:
+                capabilities = IMPINJ_IOT_CAPABILITIES_CACHE.get(info.model, firmware_build)
+            if capabilities is None:
+                if not schema_fetched:
+                    schema = self._api_get(_PRESETS_SCHEMA_PATH)
+                if schema:
+                    capabilities = _extract_capabilities(schema)
+                    if firmware_build is not None:
+                        IMPINJ_IOT_CAPABILITIES_CACHE.put(info.model, firmware_build, capabilities)
+            capabilities = capabilities or {}
+            antenna_count = capabilities.get('antenna_count', info.antenna_count)
+            min_cdbm = capabilities.get('min_tx_power_cdbm', info.min_tx_power_cdbm)
+            max_cdbm = capabilities.get('max_tx_power_cdbm', info.max_tx_power_cdbm)
 
             self.details = SenseidReaderDetails(
                 model_name=info.model,
@@ -252,11 +459,19 @@ class SenseidImpinjIot(SenseidReader):
             self.driver.set_tag_filter(None)
             logger.info('Reader mode set to %s (no embedded memory reads)', mode.value)
 
+    def _queue_depth(self) -> Optional[int]:
+        # Stream events (one per tag report) read from the HTTP stream and
+        # waiting for the library's processing thread; bounded at 4096
+        event_queue = self.driver._event_queue
+        return event_queue.qsize() if event_queue is not None else 0
+
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        self._inventory_started(notification_callback, error_callback)
         self.notification_callback = notification_callback
         self.error_callback = error_callback
         return self.driver.start()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         return self.driver.stop()
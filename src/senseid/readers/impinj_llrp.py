@@ -5,11 +5,9 @@ from impinj_llrp import ImpinjLlrp, ImpinjLlrpTagReport, ImpinjReaderMode, Impin
 
 from . import SenseidReader, SenseidReaderDetails, SenseidReaderError, SenseidReaderMode
 from ..parsers import SenseidTag
-from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.dispatch import parse_rain_report
 from ..parsers.farsens.yaml import SENSEID_FARSENS_DEF
-from ..parsers.senseread import SenseidSenseReadTag, is_senseid_senseread_epc
 from ..parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
-from ..parsers.rain import SenseidRainTag
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +15,7 @@ logger = logging.getLogger(__name__)
 class SenseidImpinjLlrp(SenseidReader):
 
     def __init__(self):
+        super().__init__()
         self.driver = ImpinjLlrp()
         self.notification_callback = None
         self.error_callback = None
@@ -30,32 +29,16 @@ class SenseidImpinjLlrp(SenseidReader):
         self.get_details()
         return True
 
-    @staticmethod
-    def _epc_bytes(epc_hex: str) -> bytes:
-        try:
-            return bytes.fromhex(epc_hex)
-        except (ValueError, TypeError):
-            return b''
+    def _capture_tag_report(self, tag_report: ImpinjLlrpTagReport):
+        self._capture_report(tag_report.epc, tag_report.user_mem, antenna=tag_report.antenna_port,
+                             rssi_dbm=tag_report.peak_rssi_dbm)
 
     def _build_tag(self, tag_report: ImpinjLlrpTagReport) -> SenseidTag:
-        epc = tag_report.epc
-        epc_bytes = self._epc_bytes(epc)
-
-        farsens_pen = bytes(SENSEID_FARSENS_DEF.pen_header)
-        if epc_bytes[:len(farsens_pen)] == farsens_pen:
-            return SenseidFarsensTag(epc=epc, user_mem_hex=tag_report.user_mem)
-
-        # SenseID Rain and SenseID SenseRead share the same PEN header. They
-        # are told apart by the type byte: each senseRead product has its own
-        # type id registered in SENSEID_SENSEREAD_DEF.types.
-        if is_senseid_senseread_epc(epc_bytes):
-            return SenseidSenseReadTag(epc=epc, user_mem_hex=tag_report.user_mem)
-
-        return SenseidRainTag(epc=epc)
+        return parse_rain_report(tag_report.epc, tag_report.user_mem)
 
     def _driver_notification_callback(self, tag_report: ImpinjLlrpTagReport):
-        if self.notification_callback is not None:
-            self.notification_callback(self._build_tag(tag_report))
+        self._deliver(self._build_tag, tag_report, tag_report.user_mem, epc=tag_report.epc,
+                      capture=self._capture_tag_report)
 
     def disconnect(self):
         self.driver.disconnect()
@@ -136,9 +119,11 @@ class SenseidImpinjLlrp(SenseidReader):
 
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        self._inventory_started(notification_callback, error_callback)
         self.notification_callback = notification_callback
         self.error_callback = error_callback
         return self.driver.start()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         return self.driver.stop()
@@ -16,6 +16,7 @@ class SenseidKlSbleLcr(SenseidReader):
     technology = SenseidTechnologies.BLE
 
     def __init__(self):
+        super().__init__()
         self.details = None
         self.driver = KlSbleLcr()
         self.notification_callback = None
@@ -26,10 +27,11 @@ class SenseidKlSbleLcr(SenseidReader):
         self.driver.set_notification_callback(self._sble_notification_callback)
         return True
 
+    def _build_tag(self, beacon) -> SenseidTag:
+        return SenseidBleTag(beacon)
+
     def _sble_notification_callback(self, beacon):
-        if self.notification_callback is not None:
-            self.notification_callback(SenseidBleTag(beacon))
-        pass
+        self._deliver(self._build_tag, beacon, epc=beacon, capture=self._capture_report)
 
     def disconnect(self):
         self.driver.disconnect()
@@ -66,10 +68,12 @@ class SenseidKlSbleLcr(SenseidReader):
 
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback=None):
+        self._inventory_started(notification_callback, error_callback)
         self.notification_callback = notification_callback
         return self.driver.start()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         return self.driver.stop()
 
     def set_rf_channel(self, channel: int | None) -> bool:
@@ -0,0 +1,163 @@
+"""Latency histograms of the tag notification path.
+
+Every report delivered through SenseidReader._deliver() is timestamped at
+the driver callback entry, after parsing and when the user callback
+returns. Where the reader stamps its reports, the time between that stamp
+and the driver callback is recorded as well. Histograms are kept per tag
+family and merged per reader on query.
+"""
+from typing import Dict, Iterable, List, Optional
+
+STAGE_READER = 'reader'      # reader timestamp -> driver callback entry
+STAGE_PARSE = 'parse'        # driver callback entry -> parse done
+STAGE_CALLBACK = 'callback'  # parse done -> user callback return
+STAGE_TOTAL = 'total'        # driver callback entry -> user callback return
+STAGES = (STAGE_READER, STAGE_PARSE, STAGE_CALLBACK, STAGE_TOTAL)
+
+# Log-linear (HDR-style) buckets over integer microseconds: values below
+# 128 us are exact, above that every power of two is split in 64 buckets
+# (~1.6 % resolution) up to 2^40 us (~12 days).
+_SUB_BUCKET_BITS = 7
+_HALF_SUB_BUCKETS = 1 << (_SUB_BUCKET_BITS - 1)
+_EXACT_LIMIT = 1 << _SUB_BUCKET_BITS
+_MAX_VALUE_US = (1 << 40) - 1
+_BUCKET_COUNT = ((40 - _SUB_BUCKET_BITS + 1) << (_SUB_BUCKET_BITS - 1)) + _EXACT_LIMIT
+
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < _EXACT_LIMIT:
+        return value_us if value_us > 0 else 0
+    shift = value_us.bit_length() - _SUB_BUCKET_BITS
+    return (shift << (_SUB_BUCKET_BITS - 1)) + (value_us >> shift)
+
+
+def _bucket_range(index: int):
+    """(lowest, highest) value in us of bucket `index`."""
+    if index < _EXACT_LIMIT:
+        return index, index
+    shift = (index >> (_SUB_BUCKET_BITS - 1)) - 1
+    top = (index & (_HALF_SUB_BUCKETS - 1)) + _HALF_SUB_BUCKETS
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations in seconds. Recording
+    is a few integer operations and takes no lock; a concurrent reset()
+    can lose the records in flight."""
+
+    __slots__ = ('_counts', 'count', 'sum_s', 'max_s')
+
+    def __init__(self):
+        self._counts: List[int] = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.sum_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds: float):
+        value_us = int(seconds * 1000000)
+        if value_us > _MAX_VALUE_US:
+            value_us = _MAX_VALUE_US
+        self._counts[_bucket_index(value_us)] += 1
+        self.count += 1
+        self.sum_s += seconds
+        if seconds > self.max_s:
+            self.max_s = seconds
+
+    def reset(self):
+        self._counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.sum_s = 0.0
+        self.max_s = 0.0
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        counts = self._counts
+        for index, count in enumerate(other._counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        self.sum_s += other.sum_s
+        self.max_s = max(self.max_s, other.max_s)
+        return self
+
+    @property
+    def mean_s(self) -> Optional[float]:
+        return self.sum_s / self.count if self.count else None
+
+    def percentiles(self, ps: Iterable[float]) -> List[Optional[float]]:
+        """Values in seconds at the given percentiles (0-100), each reported
+        as the midpoint of its bucket and capped at the recorded maximum."""
+        ps = list(ps)
+        total = sum(self._counts)
+        if not total:
+            return [None] * len(ps)
+        targets = sorted((max(1, -(-p * total // 100)), i) for i, p in enumerate(ps))
+        results: List[Optional[float]] = [None] * len(ps)
+        seen = 0
+        t = 0
+        for index, count in enumerate(self._counts):
+            if not count:
+                continue
+            seen += count
+            while t < len(targets) and seen >= targets[t][0]:
+                low, high = _bucket_range(index)
+                results[targets[t][1]] = min((low + high) / 2e6, self.max_s)
+                t += 1
+            if t == len(targets):
+                break
+        return results
+
+    def percentile(self, p: float) -> Optional[float]:
+        return self.percentiles([p])[0]
+
+    def summary(self) -> dict:
+        p50, p90, p99, p999 = self.percentiles([50, 90, 99, 99.9])
+        return {'count': self.count, 'mean_s': self.mean_s, 'p50_s': p50, 'p90_s': p90,
+                'p99_s': p99, 'p999_s': p999, 'max_s': self.max_s if self.count else None}
+
+
+class SenseidLatencyRecorder:
+    """Latency histograms of one reader, per tag family and stage."""
+
+    def __init__(self):
+        self._families: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+    def _histograms(self, family: str) -> Dict[str, LatencyHistogram]:
+        histograms = self._families.get(family)
+        if histograms is None:
+            histograms = self._families.setdefault(family, {stage: LatencyHistogram() for stage in STAGES})
+        return histograms
+
+    def record(self, family: str, entry: float, parsed: float, done: float, reader_lag_s: Optional[float] = None):
+        """Record one delivery; `entry`, `parsed` and `done` are
+        time.perf_counter() readings."""
+        histograms = self._families.get(family) or self._histograms(family)
+        histograms[STAGE_PARSE].record(parsed - entry)
+        histograms[STAGE_CALLBACK].record(done - parsed)
+        histograms[STAGE_TOTAL].record(done - entry)
+        if reader_lag_s is not None:
+            histograms[STAGE_READER].record(reader_lag_s if reader_lag_s > 0 else 0.0)
+
+    def families(self) -> List[str]:
+        return list(self._families)
+
+    def histogram(self, stage: str = STAGE_TOTAL, family: Optional[str] = None) -> LatencyHistogram:
+        """Histogram of `stage` for `family`, or merged over every family."""
+        if stage not in STAGES:
+            raise ValueError(f'Unknown latency stage {stage}. Stages: {STAGES}')
+        merged = LatencyHistogram()
+        for name, histograms in list(self._families.items()):
+            if family is None or name == family:
+                merged.merge(histograms[stage])
+        return merged
+
+    def summary(self) -> Dict[str, Dict[str, dict]]:
+        """{family: {stage: summary}}, with the merged families under '*'."""
+        result = {family: {stage: histogram.summary() for stage, histogram in histograms.items()}
+                  for family, histograms in list(self._families.items())}
+        result['*'] = {stage: self.histogram(stage).summary() for stage in STAGES}
+        return result
+
+    def reset(self):
+        for histograms in list(self._families.values()):
+            for histogram in histograms.values():
+                histogram.reset()
@@ -0,0 +1,159 @@
+"""OpenMetrics (Prometheus) exporter of SenseidReader.get_stats() for every
+reader alive in the process.
+
+    from senseid.readers.metrics import start_metrics_server
+    server = start_metrics_server(port=9464)   # scrape http://host:9464/metrics
+"""
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import weakref
+from typing import Iterable, List, Optional, Tuple
+
+from . import SenseidReader, get_active_readers
+from .latency import STAGES
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# (metric name, SenseidReaderStats field, type, help)
+_METRICS = [
+    ('senseid_reader_reports_received', 'reports_received', 'counter', 'Raw reports received from the reader'),
+    ('senseid_reader_tags_delivered', 'tags_delivered', 'counter', 'Tags passed to the notification callback'),
+    ('senseid_reader_parse_failures', 'parse_failures', 'counter', 'Reports that could not be parsed'),
+    ('senseid_reader_senseread_reads_attempted', 'senseread_reads_attempted', 'counter',
+     'senseRead User-memory reads attempted'),
+    ('senseid_reader_senseread_reads_succeeded', 'senseread_reads_succeeded', 'counter',
+     'senseRead User-memory reads decoded'),
+    ('senseid_reader_senseread_reads_stale', 'senseread_reads_stale', 'counter',
+     'senseRead User-memory reads returning a stale or invalid datagram'),
+    ('senseid_reader_callback_seconds', 'callback_time_s', 'counter', 'Time spent in the notification callback'),
+    ('senseid_reader_reconnects', 'reconnects', 'counter', 'Reconnections after a communication error'),
+    ('senseid_reader_inventory_rounds', 'inventory_rounds', 'counter', 'Inventory rounds run'),
+    ('senseid_reader_flow_control_pauses', 'flow_control_pauses', 'counter',
+     'Inventory pauses because of the delivery backlog'),
+    ('senseid_reader_flow_control_paused_seconds', 'flow_control_paused_s', 'counter',
+     'Time the inventory was paused by flow control'),
+    ('senseid_reader_tags_shed', 'tags_shed', 'counter', 'Plain RAIN IDs withheld by load shedding'),
+    ('senseid_reader_queue_depth', 'queue_depth', 'gauge',
+     'Tags waiting inside the driver (drivers exposing their queue only)'),
+    ('senseid_reader_inventory_rounds_per_second', 'inventory_rounds_per_s', 'gauge',
+     'Inventory rounds per second, recent estimate'),
+]
+_LATENCY_METRIC = 'senseid_reader_latency_seconds'
+_LATENCY_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# (stats label, exported label) of every reader seen by render_metrics()
+_EXPORTED_LABELS: 'weakref.WeakKeyDictionary[SenseidReader, Tuple[str, str]]' = weakref.WeakKeyDictionary()
+_EXPORTED_LABELS_LOCK = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _exported_label(reader: SenseidReader) -> str:
+    """Label of `reader` in the exposition. Readers without serial number
+    share their model name: the first one keeps it and the others get their
+    registration number appended, so a series keeps its label for as long
+    as the reader lives."""
+    label = reader.get_stats_label()
+    with _EXPORTED_LABELS_LOCK:
+        assigned = _EXPORTED_LABELS.get(reader)
+        if assigned is not None and assigned[0] == label:
+            return assigned[1]
+        taken = any(exported == label for other, (_, exported) in _EXPORTED_LABELS.items() if other is not reader)
+        exported = f'{label}-{reader._reader_number}' if taken else label
+        _EXPORTED_LABELS[reader] = (label, exported)
+        return exported
+
+
+def render_metrics(readers: Optional[Iterable[SenseidReader]] = None) -> str:
+    """OpenMetrics text exposition of the stats of `readers` (default: every
+    reader in the process)."""
+    if readers is None:
+        readers = get_active_readers()
+    samples = []
+    for reader in readers:
+        labels = f'reader="{_escape(_exported_label(reader))}",driver="{type(reader).__name__}"'
+        samples.append((labels, reader.get_stats(), reader.get_latency()))
+
+    lines: List[str] = []
+    for name, field, metric_type, help_text in _METRICS:
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.append(f'# HELP {name} {help_text}')
+        if name.endswith('_seconds'):
+            lines.append(f'# UNIT {name} seconds')
+        suffix = '_total' if metric_type == 'counter' else ''
+        for labels, stats, _ in samples:
+            value = getattr(stats, field)
+            if value is not None:
+                lines.append(f'{name}{suffix}{{{labels}}} {value}')
+
+    lines.append(f'# TYPE {_LATENCY_METRIC} summary')
+    lines.append(f'# HELP {_LATENCY_METRIC} Notification path latency by stage (reader, parse, callback, total)')
+    lines.append(f'# UNIT {_LATENCY_METRIC} seconds')
+    for labels, _, latency in samples:
+        for stage in STAGES:
+            histogram = latency.histogram(stage)
+            if not histogram.count:
+                continue
+            stage_labels = f'{labels},stage="{stage}"'
+            values = histogram.percentiles([q * 100 for q in _LATENCY_QUANTILES])
+            for quantile, value in zip(_LATENCY_QUANTILES, values):
+                lines.append(f'{_LATENCY_METRIC}{{{stage_labels},quantile="{quantile}"}} {value}')
+            lines.append(f'{_LATENCY_METRIC}_count{{{stage_labels}}} {histogram.count}')
+            lines.append(f'{_LATENCY_METRIC}_sum{{{stage_labels}}} {histogram.sum_s}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug('%s - ' + format, self.address_string(), *args)
+
+
+class SenseidMetricsServer:
+    """HTTP server answering GET /metrics from a daemon thread."""
+
+    def __init__(self, port: int = 9464, host: str = ''):
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                            name='senseid-metrics')
+            self._thread.start()
+            logger.info('Serving reader metrics on port %d', self.port)
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+def start_metrics_server(port: int = 9464, host: str = '') -> SenseidMetricsServer:
+    server = SenseidMetricsServer(port=port, host=host)
+    server.start()
+    return server
@@ -10,10 +10,9 @@ from nurapy.protocol.command.module_setup import (ModuleSetupLinkFreq,
 
 from . import SenseidReader, SenseidReaderDetails, SenseidReaderError, SenseidReaderMode
 from ..parsers import SenseidTag
-from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.dispatch import parse_rain_report
 from ..parsers.farsens.yaml import SENSEID_FARSENS_DEF
-from ..parsers.senseread import SenseidSenseReadTag, is_senseid_senseread_epc
-from ..parsers.rain import SenseidRainTag
+from ..parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +20,7 @@ logger = logging.getLogger(__name__)
 class SenseidNurapy(SenseidReader):
 
     def __init__(self):
+        super().__init__()
         self.driver = NurAPY()
         self.notification_callback = None
         self.error_callback = None
@@ -74,29 +74,25 @@ class SenseidNurapy(SenseidReader):
         self.set_antenna_config(antenna_config_array=antenna_config)
         return True
 
+    def _capture_tag_report(self, tag: NurTagDataMeta):
+        self._capture_report(bytearray(tag.epc) if tag.epc is not None else bytearray(), tag.user_mem,
+                             antenna=tag.antenna_id + 1, rssi_dbm=tag.rssi, reader_timestamp=tag.timestamp)
+
     def _build_tag(self, tag: NurTagDataMeta) -> SenseidTag:
         epc_bytes = bytearray(tag.epc) if tag.epc is not None else bytearray()
-        epc_hex = bytes(epc_bytes).hex().upper()
-        user_mem_hex = (bytes(tag.user_mem).hex().upper()
-                        if tag.user_mem else None)
-
-        farsens_pen = bytes(SENSEID_FARSENS_DEF.pen_header)
-        if epc_bytes[:len(farsens_pen)] == farsens_pen:
-            return SenseidFarsensTag(epc=epc_hex, user_mem_hex=user_mem_hex)
-
-        if is_senseid_senseread_epc(epc_bytes):
-            return SenseidSenseReadTag(epc=epc_hex, user_mem_hex=user_mem_hex)
-
-        return SenseidRainTag(epc=epc_hex)
+        return parse_rain_report(epc_bytes, bytes(tag.user_mem) if tag.user_mem else None)
 
     def _nur_notification_callback(self, inventory_stream_notification: InventoryStreamNotification,
                                    tags: List[NurTagDataMeta]):
         if inventory_stream_notification.stopped:
             logger.info('Restarting inventory stream')
             self.driver.start_inventory_stream()
-        if self.notification_callback is not None:
-            for tag in tags:
-                self.notification_callback(self._build_tag(tag))
+        # One stream notification per inventory round. The NUR timestamp is
+        # an offset within the round, not a clock the host can compare with,
+        # so the `reader` latency stage is left unset for NUR.
+        self._count_inventory_round()
+        for tag in tags:
+            self._deliver(self._build_tag, tag, tag.user_mem, epc=tag.epc, capture=self._capture_tag_report)
         self.driver.clear_notified_tags()
 
     def disconnect(self):
@@ -208,11 +204,20 @@ class SenseidNurapy(SenseidReader):
             logger.info('Reader mode set to %s (no embedded memory reads)',
                         mode.value)
 
+    def _queue_depth(self) -> Optional[int]:
+        # Inventory notifications decoded by NurAPY and waiting for its
+        # callback thread, each with a list of tags
+        notification_queue = self.driver._rx_handler.notification_queue
+        with notification_queue.mutex:
+            return sum(len(tags) for _, tags in notification_queue.queue)
+
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        self._inventory_started(notification_callback, error_callback)
         self.notification_callback = notification_callback
         self.error_callback = error_callback
         return self.driver.start_inventory_stream()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         return self.driver.stop_inventory_stream()
@@ -0,0 +1,129 @@
+"""Priority of sensor tags over plain IDs under load.
+
+In mixed populations most reports are plain RAIN IDs (EPCs that are not
+SenseID tags) competing for the notification path with the few sensor
+tags. Under pressure the load shedder lets every sensor tag through and
+thins the plain IDs first::
+
+    reader.set_load_shedding(high_watermark=5000, plain_ids=SenseidPlainIdPolicy.AGGREGATE)
+
+Pressure is on when the delivery backlog (as for flow control) reaches
+`high_watermark`, or when the notification callback takes more than
+`max_callback_load` of the wall time; it is off again once the backlog is
+down to `low_watermark` and the load has dropped. SenseidOrderedDispatcher
+has a matching high-priority lane (`priority_lanes=True`).
+"""
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Optional, Set
+
+from dataclasses_json import dataclass_json
+
+from ..parsers import SenseidTag
+from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.senseread import SenseidSenseReadTag
+
+_SENSOR_FAMILIES = (SenseidSenseReadTag, SenseidFarsensTag)
+
+
+def is_priority_tag(tag: SenseidTag) -> bool:
+    """Sensor tags: with data, or of a family whose data comes from User
+    memory (senseRead, Farsens) even when the read failed."""
+    return tag.data is not None or isinstance(tag, _SENSOR_FAMILIES)
+
+
+class SenseidPlainIdPolicy(Enum):
+    SAMPLE = 'SAMPLE'        # deliver one plain ID report in `sample_every`
+    AGGREGATE = 'AGGREGATE'  # deliver each plain ID once per `aggregate_interval_s`
+    DROP = 'DROP'            # deliver no plain IDs
+
+
+@dataclass_json
+@dataclass
+class SenseidLoadSheddingStats:
+    under_pressure: bool = False
+    pressure_episodes: int = 0
+    priority_tags: int = 0        # sensor tags seen (never shed)
+    plain_ids: int = 0            # plain ID tags seen
+    plain_ids_sampled_out: int = 0
+    plain_ids_aggregated: int = 0  # repeated reads of an ID already delivered in the interval
+    plain_ids_dropped: int = 0
+
+    @property
+    def plain_ids_shed(self) -> int:
+        return self.plain_ids_sampled_out + self.plain_ids_aggregated + self.plain_ids_dropped
+
+
+class SenseidLoadShedder:
+    """Decides, tag by tag on the delivery thread, whether a tag reaches
+    the notification callback. Created by SenseidReader.set_load_shedding().
+    The pressure is re-evaluated every `check_interval_s`."""
+
+    def __init__(self, high_watermark: int, low_watermark: int, backlog: Callable[[], int],
+                 callback_time_s: Callable[[], float], plain_ids: SenseidPlainIdPolicy = SenseidPlainIdPolicy.AGGREGATE,
+                 sample_every: int = 10, aggregate_interval_s: float = 1.0, max_callback_load: Optional[float] = 0.9,
+                 check_interval_s: float = 0.05):
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.backlog = backlog
+        self.callback_time_s = callback_time_s
+        self.plain_ids = plain_ids
+        self.sample_every = sample_every
+        self.aggregate_interval_s = aggregate_interval_s
+        self.max_callback_load = max_callback_load
+        self.check_interval_s = check_interval_s
+        self.stats = SenseidLoadSheddingStats()
+        self._sample_count = 0
+        self._delivered_ids: Set[str] = set()  # plain IDs delivered in the current interval
+        self._interval_start = time.monotonic()
+        self._checked = time.monotonic()
+        self._checked_callback_s = callback_time_s()
+
+    def admit(self, tag: SenseidTag) -> bool:
+        stats = self.stats
+        if is_priority_tag(tag):
+            stats.priority_tags += 1
+            return True
+        stats.plain_ids += 1
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval_s:
+            self._check_pressure(now)
+        if not stats.under_pressure:
+            return True
+        policy = self.plain_ids
+        if policy is SenseidPlainIdPolicy.AGGREGATE:
+            if now - self._interval_start >= self.aggregate_interval_s:
+                self._interval_start = now
+                self._delivered_ids.clear()
+            if tag.id in self._delivered_ids:
+                stats.plain_ids_aggregated += 1
+                return False
+            self._delivered_ids.add(tag.id)
+            return True
+        if policy is SenseidPlainIdPolicy.SAMPLE:
+            self._sample_count += 1
+            if self._sample_count >= self.sample_every:
+                self._sample_count = 0
+                return True
+            stats.plain_ids_sampled_out += 1
+            return False
+        stats.plain_ids_dropped += 1
+        return False
+
+    def _check_pressure(self, now: float):
+        callback_s = self.callback_time_s()
+        load = (callback_s - self._checked_callback_s) / (now - self._checked)
+        self._checked = now
+        self._checked_callback_s = callback_s
+        backlog = self.backlog()
+        overloaded = self.max_callback_load is not None and load >= self.max_callback_load
+        stats = self.stats
+        if not stats.under_pressure:
+            if backlog >= self.high_watermark or overloaded:
+                stats.under_pressure = True
+                stats.pressure_episodes += 1
+                self._interval_start = now
+                self._delivered_ids.clear()
+        elif backlog <= self.low_watermark and not overloaded:
+            stats.under_pressure = False
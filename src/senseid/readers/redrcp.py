@@ -1,16 +1,15 @@
 import logging
 import threading
 import time
-from typing import List, Callable, Optional
+from typing import List, Callable, NamedTuple, Optional
 
 from redrcp import RedRcp, NotificationTpeCuiii, NotificationTpeCuiiiRssi, NotificationTpeCuiiiTid, ParamMemory
 
 from ..parsers import SenseidTag
-from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.dispatch import parse_rain_report
 from ..parsers.farsens.yaml import SENSEID_FARSENS_DEF
-from ..parsers.senseread import SenseidSenseReadTag, is_senseid_senseread_epc
+from ..parsers.senseread import is_senseid_senseread_epc
 from ..parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
-from ..parsers.rain import SenseidRainTag
 from ..readers import SenseidReader, SenseidReaderDetails, SenseidReaderMode
 
 logger = logging.getLogger(__name__)
@@ -21,9 +20,15 @@ SENSEREAD_INVENTORY_WINDOW_S = 0.08  # how long the inventory op holds the air
 SENSEREAD_USER_WORD_PTR = 0x100
 
 
+class RedRcpTagReport(NamedTuple):
+    epc: str
+    user_mem: Optional[str]
+
+
 class SenseidReaderRedRcp(SenseidReader):
 
     def __init__(self):
+        super().__init__()
         self.driver = RedRcp()
         self.notification_callback = None
         self.details = None
@@ -63,17 +68,15 @@ class SenseidReaderRedRcp(SenseidReader):
         # type id in SENSEID_SENSEREAD_DEF.types.
         return is_senseid_senseread_epc(epc_bytes)
 
+    def _capture_tag_report(self, tag_report: RedRcpTagReport):
+        self._capture_report(tag_report.epc, tag_report.user_mem)
+
+    def _build_tag(self, tag_report: RedRcpTagReport) -> SenseidTag:
+        return parse_rain_report(tag_report.epc, tag_report.user_mem)
+
     def _emit_tag(self, epc_hex: str, user_mem_hex: Optional[str]):
-        if self.notification_callback is None:
-            return
-        epc_bytes = self._epc_bytes(epc_hex)
-        if self._is_farsens_epc(epc_bytes):
-            tag = SenseidFarsensTag(epc=epc_hex, user_mem_hex=user_mem_hex)
-        elif self._is_senseread_epc(epc_bytes):
-            tag = SenseidSenseReadTag(epc=epc_hex, user_mem_hex=user_mem_hex)
-        else:
-            tag = SenseidRainTag(epc=epc_hex)
-        self.notification_callback(tag)
+        self._deliver(self._build_tag, RedRcpTagReport(epc_hex, user_mem_hex), user_mem_hex, epc=epc_hex,
+                      capture=self._capture_tag_report)
 
     def _redrcp_notification_callback(self, notif: NotificationTpeCuiii
                                                 | NotificationTpeCuiiiRssi
@@ -113,6 +116,7 @@ class SenseidReaderRedRcp(SenseidReader):
 
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback=None):
+        self._inventory_started(notification_callback, error_callback)
         self.notification_callback = notification_callback
         if self._mode == SenseidReaderMode.SENSEREAD:
             self._senseread_stop.clear()
@@ -123,6 +127,7 @@ class SenseidReaderRedRcp(SenseidReader):
         return self.driver.start_auto_read2()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         if self._senseread_thread is not None:
             self._senseread_stop.set()
             self._senseread_thread.join(timeout=2)
@@ -151,6 +156,7 @@ class SenseidReaderRedRcp(SenseidReader):
         seen_passthrough: set[str] = set()
 
         def do_inventory():
+            self._count_inventory_round()
             with self._senseread_seen_lock:
                 self._senseread_seen.clear()
             try:
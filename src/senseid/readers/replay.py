@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+from urllib.parse import parse_qsl
+
+from . import SenseidReader, SenseidReaderDetails, SenseidReaderError, SenseidReaderMode
+from .capture import CaptureFile, CapturedReport, parse_captured_report
+from ..__about__ import __version__
+from ..parsers import SenseidTag, SenseidTechnologies
+
+logger = logging.getLogger(__name__)
+
+_PROBE_RECORDS = 10000  # records scanned on connect to fill in the details
+
+
+class SenseidReplayReader(SenseidReader):
+    """Replays a capture log (see SenseidReader.start_capture) through the
+    same parsers as the live drivers.
+
+    The connection string is the file path, optionally followed by
+    options: 'inventory.sidcap?speed=10&loop=1'.
+
+    - speed: 1 replays in real time, N is N times faster, 'max' (or 0)
+      goes as fast as parsing allows.
+    - loop: 1 restarts from the beginning at the end of the file.
+    - timestamps: 'replay' (default) stamps tags at delivery time like a
+      live reader, 'capture' keeps the time they were captured.
+
+    Reports are replayed as captured, so modes only exist for API
+    compatibility; the antenna configuration filters replayed antennas."""
+
+    def __init__(self):
+        super().__init__()
+        self.path: Optional[str] = None
+        self.speed = 1.0
+        self.loop = False
+        self.capture_timestamps = False
+        self.notification_callback = None
+        self.error_callback = None
+        self.details = None
+        self.technology = SenseidTechnologies.RAIN
+        self._mode: SenseidReaderMode = SenseidReaderMode.SENSEID
+        self._tx_power = 0.0
+        self._antenna_config: List[bool] = [True]
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._finished = threading.Event()
+
+    def connect(self, connection_string: str):
+        path, _, query = connection_string.partition('?')
+        try:
+            for key, value in parse_qsl(query, strict_parsing=bool(query)):
+                if key == 'speed':
+                    self.speed = 0.0 if value == 'max' else float(value)
+                elif key == 'loop':
+                    self.loop = value.lower() in ('1', 'true', 'yes')
+                elif key == 'timestamps':
+                    if value not in ('replay', 'capture'):
+                        raise ValueError(f'timestamps must be replay or capture, not {value}')
+                    self.capture_timestamps = value == 'capture'
+                else:
+                    raise ValueError(f'unknown option {key}')
+            self._probe(path)
+        except (OSError, ValueError) as e:
+            logger.error('Cannot replay %r: %s', connection_string, e)
+            return False
+        self.path = path
+        return True
+
+    def _probe(self, path: str):
+        antenna_count = 1
+        reader_id = None
+        with CaptureFile(path) as capture:
+            for i, report in enumerate(capture):
+                if i == 0:
+                    self.technology = report.technology
+                    reader_id = report.reader_id
+                antenna_count = max(antenna_count, report.antenna)
+                if i >= _PROBE_RECORDS:
+                    break
+        self._antenna_config = [True] * antenna_count
+        self.details = SenseidReaderDetails(
+            model_name='SenseID Replay',
+            region='REPLAY',
+            firmware_version=__version__,
+            antenna_count=antenna_count,
+            min_tx_power=0.0,
+            max_tx_power=0.0,
+            technology=self.technology,
+            serial_number=reader_id,
+        )
+
+    def disconnect(self):
+        self.stop_inventory_async()
+
+    def _build_tag(self, report: CapturedReport) -> Optional[SenseidTag]:
+        tag = parse_captured_report(report)
+        if tag is not None and self.capture_timestamps:
+            tag.timestamp = datetime.fromtimestamp(report.host_time)
+        return tag
+
+    def _replay_loop(self, stop_event: threading.Event, finished: threading.Event):
+        # Both events belong to this run: a run stopped from its own
+        # callback may still be returning while the next one starts
+        try:
+            while not stop_event.is_set():
+                self._replay_once(stop_event)
+                if not self.loop:
+                    break
+        except Exception as e:
+            logger.exception('Replay of %s failed', self.path)
+            if self.error_callback is not None:
+                self.error_callback(SenseidReaderError('REPLAY_ERROR', str(e)))
+        finally:
+            finished.set()
+
+    def _replay_once(self, stop_event: threading.Event):
+        speed = self.speed
+        antenna_config = self._antenna_config
+        first_time = None
+        start = time.perf_counter()
+        with CaptureFile(self.path) as capture:
+            for report in capture:
+                if stop_event.is_set():
+                    return
+                antenna = report.antenna
+                if 0 < antenna <= len(antenna_config) and not antenna_config[antenna - 1]:
+                    continue
+                if speed > 0:
+                    if first_time is None:
+                        first_time = report.host_time
+                    delay = start + (report.host_time - first_time) / speed - time.perf_counter()
+                    if delay > 0.001 and stop_event.wait(delay):
+                        return
+                # The parse pool stamps tags itself, so capture timestamps
+                # keep the inline parser
+                pooled = report.technology == self.technology and not self.capture_timestamps
+                self._deliver(self._build_tag, report, report.user_mem, epc=report.epc if pooled else None)
+
+    def wait_until_finished(self, timeout_s: Optional[float] = None) -> bool:
+        """Block until the replay reaches the end of the file (never, with
+        loop=1). Returns False on timeout."""
+        return self._finished.wait(timeout_s)
+
+    def get_details(self) -> SenseidReaderDetails:
+        return self.details
+
+    def get_tx_power(self) -> float:
+        return self._tx_power
+
+    def set_tx_power(self, dbm: float):
+        logger.debug('TX power has no effect on a replay')
+        self._tx_power = dbm
+
+    def get_antenna_config(self) -> List[bool]:
+        return list(self._antenna_config)
+
+    def set_antenna_config(self, antenna_config_array: List[bool]):
+        if not (True in antenna_config_array):
+            antenna_config_array[0] = True
+            logger.warning('At least one antenna needs to be active. Enabling antenna 1.')
+        self._antenna_config = list(antenna_config_array)
+
+    def get_supported_modes(self) -> List[SenseidReaderMode]:
+        if self.technology == SenseidTechnologies.NFC:
+            return [SenseidReaderMode.NDEF]
+        if self.technology == SenseidTechnologies.RAIN:
+            return [SenseidReaderMode.SENSEID, SenseidReaderMode.SENSEREAD]
+        return [SenseidReaderMode.SENSEID]
+
+    def get_mode(self) -> SenseidReaderMode:
+        return self._mode
+
+    def set_mode(self, mode: SenseidReaderMode):
+        super().set_mode(mode)
+        self._mode = mode
+
+    def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
+                              error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        if self.path is None:
+            logger.error('Replay reader not connected')
+            return False
+        self._inventory_started(notification_callback, error_callback)
+        self.notification_callback = notification_callback
+        self.error_callback = error_callback
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        self._stop_event = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._replay_loop, args=(self._stop_event, self._finished),
+                                        daemon=True, name='replay-inventory')
+        self._thread.start()
+        return True
+
+    def stop_inventory_async(self):
+        self._inventory_stopped()
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():  # stopped from the notification callback
+            self._thread.join(timeout=2)
+        self._thread = None
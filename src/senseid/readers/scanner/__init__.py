@@ -1,9 +1,10 @@
-import datetime
 import logging
-import time
-from typing import List, Callable
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
 
-from .. import SenseidReaderConnectionInfo, SupportedSenseidReader
+from .. import (SenseidReader, SenseidReaderConnectionInfo, SenseidReaderDetails, SupportedSenseidReader,
+                add_details_listener, remove_details_listener)
+from .cache import DiscoveryCache
 from .multicast_dns_service_discovery import MulticastDnsServiceDiscoveryScanner
 from .pcsc import PcscScanner
 from .serialport import SerialPortScanner
@@ -15,10 +16,18 @@ logger = logging.getLogger(__name__)
 class SenseidReaderScanner:
 
     def __init__(self, notification_callback: Callable[[SenseidReaderConnectionInfo], None] = None,
-                 autostart: bool = False):
+                 autostart: bool = False, cache_path: Optional[str] = None):
         logger.info('Starting Reader Scanner')
         self.notification_callback = notification_callback
-        self.readers: List[SenseidReaderConnectionInfo] = []
+        # Readers found in previous runs (see DiscoveryCache), revalidated
+        # on start() so they are usable before the scanners find them again.
+        self.discovery_cache: Optional[DiscoveryCache] = DiscoveryCache(cache_path) if cache_path else None
+        self._cache_thread: Optional[threading.Thread] = None
+        # Registry shared by all scanner threads, indexed by driver type and
+        # connection string. Waiters block on the condition and are woken
+        # as soon as a reader is added.
+        self._readers_condition = threading.Condition()
+        self._readers: Dict[SupportedSenseidReader, Dict[str, SenseidReaderConnectionInfo]] = {}
         self.serial_port_scanner = SerialPortScanner(notification_callback=self._add_reader,
                                                      removal_callback=self._remove_reader)
         self.multicast_dns_service_discovery_scanner = MulticastDnsServiceDiscoveryScanner(
@@ -33,10 +42,20 @@ class SenseidReaderScanner:
 
     def start(self, reset: bool = False, notification_callback: Callable[[SenseidReaderConnectionInfo], None] = None):
         if reset:
-            self.readers: List[SenseidReaderConnectionInfo] = []
+            with self._readers_condition:
+                self._readers = {}
         if notification_callback is not None:
             self.notification_callback = notification_callback
 
+        if self.discovery_cache is not None:
+            # Readers created from our connection infos record their details
+            remove_details_listener(self._on_reader_details)
+            add_details_listener(self._on_reader_details)
+        if self.discovery_cache is not None and not reset:
+            self._cache_thread = threading.Thread(target=self.discovery_cache.revalidate,
+                                                  args=(self._add_reader,), daemon=True,
+                                                  name='discovery-cache-revalidate')
+            self._cache_thread.start()
         self.serial_port_scanner.start(reset=reset)
         self.multicast_dns_service_discovery_scanner.start()
         self.pcsc_scanner.start(reset=reset)
@@ -47,34 +66,106 @@ class SenseidReaderScanner:
         self.multicast_dns_service_discovery_scanner.stop()
         self.pcsc_scanner.stop()
         self.ws_discovery_scanner.stop()
+        if self._cache_thread is not None:
+            self._cache_thread.join(timeout=5)
+            self._cache_thread = None
+        if self.discovery_cache is not None:
+            remove_details_listener(self._on_reader_details)
+            self.discovery_cache.flush()
+
+    @property
+    def readers(self) -> List[SenseidReaderConnectionInfo]:
+        """Snapshot of the readers found so far. Assigning a list replaces
+        the registry; changing the returned list has no effect."""
+        with self._readers_condition:
+            return [connection_info
+                    for readers_of_type in self._readers.values()
+                    for connection_info in readers_of_type.values()]
+
+    @readers.setter
+    def readers(self, readers: Iterable[SenseidReaderConnectionInfo]):
+        registry: Dict[SupportedSenseidReader, Dict[str, SenseidReaderConnectionInfo]] = {}
+        for connection_info in readers:
+            registry.setdefault(connection_info.driver, {}).setdefault(connection_info.connection_string,
+                                                                       connection_info)
+        with self._readers_condition:
+            self._readers = registry
+            self._readers_condition.notify_all()
 
     def _add_reader(self, connection_info: SenseidReaderConnectionInfo):
-        self.readers.append(connection_info)
+        with self._readers_condition:
+            readers_of_type = self._readers.setdefault(connection_info.driver, {})
+            if connection_info.connection_string in readers_of_type:
+                return
+            readers_of_type[connection_info.connection_string] = connection_info
+            self._readers_condition.notify_all()
+        if self.discovery_cache is not None:
+            self.discovery_cache.add(connection_info)
         if self.notification_callback is not None:
             self.notification_callback(connection_info)
 
     def _remove_reader(self, connection_info: SenseidReaderConnectionInfo):
-        self.readers = [r for r in self.readers
-                        if not (r.driver == connection_info.driver
-                                and r.connection_string == connection_info.connection_string)]
+        with self._readers_condition:
+            readers_of_type = self._readers.get(connection_info.driver, {})
+            readers_of_type.pop(connection_info.connection_string, None)
+        if self.discovery_cache is not None:
+            self.discovery_cache.remove(connection_info)
         if self.notification_callback is not None:
             self.notification_callback(connection_info)
 
     def get_readers(self):
         return self.readers
 
-    def _get_first_reader_connection_info_of_type(self, reader_type: SupportedSenseidReader):
-        for reader_connection_info in self.readers:
-            if reader_connection_info.driver == reader_type:
-                return reader_connection_info
+    def set_reader_details(self, connection_info: SenseidReaderConnectionInfo, details: SenseidReaderDetails):
+        """Remember the details reported by a connected reader in the
+        discovery cache, so the next run can use them before connecting.
+        Readers created with create_SenseidReader() from a scanned
+        connection info are recorded automatically."""
+        if self.discovery_cache is not None:
+            self.discovery_cache.set_details(connection_info, details)
+
+    def _on_reader_details(self, reader: SenseidReader, details: SenseidReaderDetails):
+        connection_info = reader.connection_info
+        if connection_info is None:
+            return
+        with self._readers_condition:
+            known = connection_info.connection_string in self._readers.get(connection_info.driver, {})
+        if known:
+            self.discovery_cache.set_details(connection_info, details)
+
+    def get_cached_reader_details(self, connection_info: SenseidReaderConnectionInfo) \
+            -> Optional[SenseidReaderDetails]:
+        if self.discovery_cache is None:
+            return None
+        return self.discovery_cache.get_details(connection_info)
+
+    def _get_readers_of_types(self, reader_types: Optional[Iterable[SupportedSenseidReader]]) \
+            -> List[SenseidReaderConnectionInfo]:
+        # Must be called with _readers_condition held
+        if reader_types is None:
+            reader_types = list(self._readers)
+        return [connection_info
+                for reader_type in reader_types
+                for connection_info in self._readers.get(reader_type, {}).values()]
 
     def wait_for_reader_of_type(self, reader_type: SupportedSenseidReader, timeout_s=-1) -> SenseidReaderConnectionInfo:
-        timestamp_timeout = (datetime.datetime.now() + datetime.timedelta(seconds=timeout_s)) if timeout_s > 0 else None
-        while True:
-            reader_connection_info = self._get_first_reader_connection_info_of_type(reader_type)
-            if reader_connection_info is not None:
-                return reader_connection_info
-            time.sleep(0.1)
-            if timestamp_timeout is not None:
-                if datetime.datetime.now() > timestamp_timeout:
-                    break
+        """Block until a reader of `reader_type` is found and return it.
+        Returns None if `timeout_s` (> 0) expires first."""
+        readers = self.wait_for_readers(1, [reader_type], timeout_s=timeout_s)
+        return readers[0] if readers else None
+
+    def wait_for_readers(self, n: int, types: Optional[Iterable[SupportedSenseidReader]] = None,
+                         timeout_s=-1) -> List[SenseidReaderConnectionInfo]:
+        """Block until at least `n` readers of the given `types` (any type if
+        None) have been found and return them. If `timeout_s` (> 0) expires
+        first, returns whatever has been found so far."""
+        types = list(types) if types is not None else None
+        found: List[SenseidReaderConnectionInfo] = []
+
+        def enough():
+            found[:] = self._get_readers_of_types(types)
+            return len(found) >= n
+
+        with self._readers_condition:
+            self._readers_condition.wait_for(enough, timeout=timeout_s if timeout_s > 0 else None)
+        return found
@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .. import SenseidReaderConnectionInfo, SenseidReaderDetails, SupportedSenseidReader
+
+logger = logging.getLogger(__name__)
+
+LLRP_PORT = 5084
+
+_SERIAL_DRIVERS = (SupportedSenseidReader.NURAPY, SupportedSenseidReader.KLSBLELCR, SupportedSenseidReader.REDRCP)
+_LLRP_DRIVERS = (SupportedSenseidReader.IMPINJ_LLRP, SupportedSenseidReader.ZEBRA_LLRP)
+
+
+def _tcp_ping(host: str, port: int, timeout: float) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def _list_serial_ports() -> set:
+    import serial.tools.list_ports
+    ports = set()
+    for com_port in serial.tools.list_ports.comports():
+        ports.add(com_port.name)
+        ports.add(com_port.device)
+    return ports
+
+
+def _list_pcsc_readers() -> set:
+    from smartcard.System import readers
+    return {str(reader) for reader in readers()}
+
+
+class DiscoveryCache:
+    """Readers found in previous runs, persisted as JSON so a restarted
+    process can use them before the scanners rediscover them (network
+    readers otherwise only show up after their next announcement).
+
+    Each entry keeps the connection info (credentials are never stored) and,
+    optionally, the reader details last reported for it. On startup the
+    entries are revalidated in parallel with cheap checks: a TCP connect to
+    the LLRP port, the REST API probe used for IoT-mode detection, or the
+    presence of the serial port / PC/SC reader. A failed check is retried
+    `retries` times before the reader is dropped, so one lost packet does
+    not evict it.
+
+    Changes are written `save_delay_s` after the first one, so a burst of
+    discoveries rewrites the file once; flush() writes them at once. The
+    save timer does not keep the process alive: call flush() before exiting
+    (SenseidReaderScanner.stop() does)."""
+
+    _FORMAT_VERSION = 1
+
+    def __init__(self, path: str, timeout_s: float = 0.5, max_workers: int = 16, save_delay_s: float = 1.0,
+                 retries: int = 1):
+        self.path = path
+        self.timeout_s = timeout_s
+        self.retries = retries
+        self.max_workers = max_workers
+        self.save_delay_s = save_delay_s
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], dict] = {}
+        self._save_timer: Optional[threading.Timer] = None
+        self._load()
+
+    @staticmethod
+    def _key(connection_info: SenseidReaderConnectionInfo) -> Tuple[str, str]:
+        return connection_info.driver.value, connection_info.connection_string
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') != self._FORMAT_VERSION:
+                return
+            for entry in stored.get('readers', []):
+                SupportedSenseidReader(entry['driver'])  # drop drivers this version doesn't know
+                self._entries[(entry['driver'], entry['connection_string'])] = entry
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f'Ignoring unreadable discovery cache {self.path}: {e}')
+
+    def _schedule_save(self):
+        # Must be called with _lock held
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay_s, self.flush)
+            self._save_timer.name = 'discovery-cache-save'
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+            if timer is None:
+                return
+            timer.cancel()
+            self._save()
+
+    def _save(self):
+        # Must be called with _lock held
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self._FORMAT_VERSION, 'readers': list(self._entries.values())}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f'Could not write discovery cache {self.path}: {e}')
+
+    def add(self, connection_info: SenseidReaderConnectionInfo):
+        key = self._key(connection_info)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {'driver': key[0], 'connection_string': key[1], 'details': None}
+                self._entries[key] = entry
+            entry['last_seen'] = time.time()
+            self._schedule_save()
+
+    def remove(self, connection_info: SenseidReaderConnectionInfo):
+        with self._lock:
+            if self._entries.pop(self._key(connection_info), None) is not None:
+                self._schedule_save()
+
+    def set_details(self, connection_info: SenseidReaderConnectionInfo, details: SenseidReaderDetails):
+        key = self._key(connection_info)
+        with self._lock:
+            entry = self._entries.setdefault(key, {'driver': key[0], 'connection_string': key[1],
+                                                   'last_seen': time.time()})
+            entry['details'] = details.to_dict(encode_json=True) if details is not None else None
+            self._schedule_save()
+
+    def get_details(self, connection_info: SenseidReaderConnectionInfo) -> Optional[SenseidReaderDetails]:
+        with self._lock:
+            entry = self._entries.get(self._key(connection_info))
+            details = entry.get('details') if entry else None
+        return SenseidReaderDetails.from_dict(details) if details else None
+
+    def get_readers(self) -> List[SenseidReaderConnectionInfo]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return [SenseidReaderConnectionInfo(driver=SupportedSenseidReader(entry['driver']),
+                                            connection_string=entry['connection_string'])
+                for entry in entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._schedule_save()
+
+    # ── Revalidation ──────────────────────────
+
+    def _is_alive(self, connection_info: SenseidReaderConnectionInfo,
+                  serial_ports: Optional[set], pcsc_readers: Optional[set]) -> bool:
+        driver = connection_info.driver
+        target = connection_info.connection_string
+        if driver in _LLRP_DRIVERS:
+            return _tcp_ping(target, LLRP_PORT, self.timeout_s)
+        if driver == SupportedSenseidReader.IMPINJ_IOT:
+            # Must still be in IoT mode; if it was switched to LLRP the mDNS
+            # scanner reports it again with the right driver.
+            from .multicast_dns_service_discovery import _is_iot_mode
+            return _is_iot_mode(target, timeout=self.timeout_s)
+        if driver in _SERIAL_DRIVERS:
+            return serial_ports is not None and target in serial_ports
+        if driver == SupportedSenseidReader.ACR1552:
+            return pcsc_readers is not None and target in pcsc_readers
+        return False
+
+    def _check(self, connection_info: SenseidReaderConnectionInfo,
+               serial_ports: Optional[set], pcsc_readers: Optional[set]) -> bool:
+        for attempt in range(self.retries + 1):
+            try:
+                if self._is_alive(connection_info, serial_ports, pcsc_readers):
+                    return True
+            except Exception as e:
+                logger.debug(f'Discovery cache: check of {connection_info.connection_string} failed: {e}')
+        return False
+
+    def revalidate(self, on_valid: Callable[[SenseidReaderConnectionInfo], None]):
+        """Check every cached reader in parallel, calling `on_valid` as soon
+        as each one answers. Readers that fail every attempt are dropped
+        from the cache."""
+        candidates = self.get_readers()
+        if not candidates:
+            return
+        serial_ports = pcsc_readers = None
+        if any(c.driver in _SERIAL_DRIVERS for c in candidates):
+            try:
+                serial_ports = _list_serial_ports()
+            except Exception as e:
+                logger.debug(f'Discovery cache: serial port listing failed: {e}')
+        if any(c.driver == SupportedSenseidReader.ACR1552 for c in candidates):
+            try:
+                pcsc_readers = _list_pcsc_readers()
+            except Exception as e:
+                logger.debug(f'Discovery cache: PC/SC listing failed: {e}')
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(candidates)),
+                                thread_name_prefix='discovery-cache') as executor:
+            futures = {executor.submit(self._check, c, serial_ports, pcsc_readers): c
+                       for c in candidates}
+            for future in as_completed(futures):
+                connection_info = futures[future]
+                if future.result():
+                    logger.info(f'Cached reader still available: {connection_info.driver.value} '
+                                f'{connection_info.connection_string}')
+                    on_valid(connection_info)
+                else:
+                    self.remove(connection_info)
@@ -1,10 +1,13 @@
 import logging
+import re
 import select
 import socket
-import time
+import struct
 import threading
+import time
 import uuid
-from typing import Callable, List, Set
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
 
 from .. import SenseidReaderConnectionInfo, SupportedSenseidReader
 
@@ -27,8 +30,27 @@ PROBE_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
   </soap:Body>
 </soap:Envelope>"""
 
+# One pass over the SOAP document picks up every field we care about,
+# whatever namespace prefix the device uses (wsa:, wsd:, d:, ...).
+_FIELD_RE = re.compile(r'<(?:[\w.-]+:)?(Action|Address|Types|Scopes|XAddrs)\b[^>]*>([^<]*)</')
+# ISO 24791-3 RDMP is the RFID Reader Management Profile
+_RFID_READER_RE = re.compile(r'ISO24791-3|iso/24791|rdmpdev|FX9600|FX7500|zebra', re.IGNORECASE)
+_IPV4_RE = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+
+_ACTION_HELLO = 'Hello'
+_ACTION_BYE = 'Bye'
+_ACTION_PROBE_MATCHES = 'ProbeMatches'
+
 
 class WsDiscoveryScanner:
+    """Finds Zebra (RDMP) readers through WS-Discovery.
+
+    A single thread owns long-lived sockets: one bound to the WS-Discovery
+    port and joined to the multicast group on every interface, which
+    receives Hello/Bye announcements as they happen, and one probe socket
+    per interface that receives the unicast ProbeMatches. Probes are sent
+    when the set of interfaces changes and then at an exponential backoff,
+    so an idle scanner only wakes up for actual traffic."""
 
     def __init__(self, notification_callback: Callable[[SenseidReaderConnectionInfo], None],
                  removal_callback: Callable[[SenseidReaderConnectionInfo], None] = None,
@@ -38,8 +60,18 @@ class WsDiscoveryScanner:
         self._running = False
         self._thread: threading.Thread | None = None
         self._known_ips: Set[str] = set()
-        self._scan_interval = 5.0
-        self._probe_timeout = 2.0
+        self._endpoints: Dict[str, str] = {}  # endpoint reference address -> ip
+        self._probe_interval_min = 2.0
+        self._probe_interval_max = 60.0
+        # Without the multicast listener Hello announcements are missed, so
+        # keep probing at the legacy scan cadence instead of backing off.
+        self._probe_interval_no_listener = 5.0
+        self._interface_check_interval = 30.0
+        self._local_ips: List[str] = []
+        self._listen_sock: Optional[socket.socket] = None
+        self._probe_socks: Dict[str, socket.socket] = {}
+        self._wake_r: Optional[socket.socket] = None
+        self._wake_w: Optional[socket.socket] = None
 
         if autostart:
             self.start()
@@ -47,29 +79,28 @@ class WsDiscoveryScanner:
     def start(self, reset: bool = False):
         if reset:
             self._known_ips = set()
+            self._endpoints = {}
         if self._running:
             return
         self._running = True
+        self._wake_r, self._wake_w = socket.socketpair()
         self._thread = threading.Thread(target=self._scan_loop, daemon=True, name='ws-discovery-scanner')
         self._thread.start()
 
     def stop(self):
         self._running = False
+        if self._wake_w is not None:
+            try:
+                self._wake_w.send(b'\0')
+            except OSError:
+                pass
         if self._thread is not None:
             self._thread.join(timeout=5)
             self._thread = None
-
-    def _scan_loop(self):
-        while self._running:
-            try:
-                self._probe()
-            except Exception as e:
-                logger.debug(f'WS-Discovery probe error: {e}')
-            # Sleep in small increments so we can stop quickly
-            for _ in range(int(self._scan_interval * 10)):
-                if not self._running:
-                    break
-                threading.Event().wait(0.1)
+        for sock in (self._wake_r, self._wake_w):
+            if sock is not None:
+                sock.close()
+        self._wake_r = self._wake_w = None
 
     @staticmethod
     def _get_local_ips() -> List[str]:
@@ -86,62 +117,176 @@ class WsDiscoveryScanner:
             ips = ['0.0.0.0']
         return ips
 
-    def _probe(self):
-        message_id = str(uuid.uuid4())
-        probe = PROBE_TEMPLATE.format(message_id=message_id).encode('utf-8')
+    # ── Sockets ───────────────────────────────
+
+    def _open_listen_socket(self):
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                except OSError:
+                    pass
+            sock.bind(('', WS_DISCOVERY_PORT))
+            sock.setblocking(False)
+        except OSError as e:
+            # Typically the port is owned by the OS discovery service.
+            logger.debug(f'WS-Discovery: cannot listen for announcements: {e}')
+            return None
+        return sock
+
+    def _join_group(self, local_ip: str):
+        if self._listen_sock is None:
+            return
+        mreq = struct.pack('4s4s', socket.inet_aton(WS_DISCOVERY_MULTICAST), socket.inet_aton(local_ip))
+        try:
+            self._listen_sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        except OSError as e:
+            logger.debug(f'WS-Discovery: could not join group on {local_ip}: {e}')
+
+    def _open_probe_socket(self, local_ip: str) -> Optional[socket.socket]:
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(local_ip))
+            sock.setblocking(False)
+        except OSError as e:
+            logger.debug(f'WS-Discovery: could not open socket on {local_ip}: {e}')
+            return None
+        return sock
 
+    def _refresh_interfaces(self) -> bool:
+        """Sync sockets with the current local IPs. Returns True if they changed."""
         local_ips = self._get_local_ips()
-        sockets = []
+        if local_ips == self._local_ips:
+            return False
+        for ip in set(self._probe_socks) - set(local_ips):
+            self._probe_socks.pop(ip).close()
+        for ip in local_ips:
+            if ip not in self._probe_socks:
+                sock = self._open_probe_socket(ip)
+                if sock is not None:
+                    self._probe_socks[ip] = sock
+            if ip not in self._local_ips:
+                self._join_group(ip)
+        logger.debug(f'WS-Discovery: interfaces {local_ips}')
+        self._local_ips = local_ips
+        return True
 
-        for local_ip in local_ips:
+    def _close_sockets(self):
+        for sock in self._probe_socks.values():
+            sock.close()
+        self._probe_socks = {}
+        if self._listen_sock is not None:
+            self._listen_sock.close()
+            self._listen_sock = None
+        self._local_ips = []
+
+    # ── Loop ──────────────────────────────────
+
+    def _send_probes(self):
+        probe = PROBE_TEMPLATE.format(message_id=uuid.uuid4()).encode('utf-8')
+        for local_ip, sock in self._probe_socks.items():
             try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
-                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
-                                socket.inet_aton(local_ip))
-                sock.setblocking(False)
                 sock.sendto(probe, (WS_DISCOVERY_MULTICAST, WS_DISCOVERY_PORT))
-                sockets.append(sock)
-            except Exception as e:
+            except OSError as e:
                 logger.debug(f'WS-Discovery: could not send via {local_ip}: {e}')
 
-        if not sockets:
-            return
-
-        # Poll sockets for responses, notifying immediately on each reply
-        deadline = time.monotonic() + self._probe_timeout
+    def _scan_loop(self):
+        self._listen_sock = self._open_listen_socket()
+        max_interval = self._probe_interval_max if self._listen_sock is not None \
+            else self._probe_interval_no_listener
+        interval = self._probe_interval_min
+        next_probe = next_interface_check = time.monotonic()
         try:
-            while time.monotonic() < deadline:
-                remaining = deadline - time.monotonic()
-                if remaining <= 0:
-                    break
-                readable, _, _ = select.select(sockets, [], [], min(remaining, 0.1))
+            while self._running:
+                now = time.monotonic()
+                if now >= next_interface_check:
+                    next_interface_check = now + self._interface_check_interval
+                    if self._refresh_interfaces():
+                        interval = self._probe_interval_min
+                        next_probe = now
+                if now >= next_probe:
+                    self._send_probes()
+                    next_probe = now + interval
+                    interval = min(interval * 2, max_interval)
+
+                socks = list(self._probe_socks.values()) + [self._wake_r]
+                if self._listen_sock is not None:
+                    socks.append(self._listen_sock)
+                timeout = max(0.0, min(next_probe, next_interface_check) - time.monotonic())
+                try:
+                    readable, _, _ = select.select(socks, [], [], timeout)
+                except (OSError, ValueError) as e:
+                    logger.debug(f'WS-Discovery select error: {e}')
+                    continue
                 for sock in readable:
+                    if sock is self._wake_r:
+                        continue
                     try:
                         data, addr = sock.recvfrom(65535)
-                        ip = addr[0]
-                        response = data.decode('utf-8', errors='ignore')
-                        self._parse_response(response, ip)
                     except (BlockingIOError, OSError):
-                        pass
-                if not self._running:
-                    break
+                        continue
+                    try:
+                        self._handle_message(data.decode('utf-8', errors='ignore'), addr[0])
+                    except Exception as e:
+                        logger.debug(f'WS-Discovery message error: {e}')
         finally:
-            for sock in sockets:
-                sock.close()
+            self._close_sockets()
 
-    def _parse_response(self, response: str, ip: str):
-        # ISO 24791-3 RDMP is the RFID Reader Management Profile
-        rdmp_patterns = ['ISO24791-3', 'iso/24791', 'rdmpdev',
-                         'FX9600', 'FX7500', 'zebra', 'Zebra', 'ZEBRA']
-        is_rfid_reader = any(pattern in response for pattern in rdmp_patterns)
+    # ── Messages ──────────────────────────────
 
-        if is_rfid_reader and ip not in self._known_ips:
+    @staticmethod
+    def _parse_fields(message: str) -> Dict[str, List[str]]:
+        fields: Dict[str, List[str]] = {}
+        for match in _FIELD_RE.finditer(message):
+            fields.setdefault(match.group(1), []).append(match.group(2).strip())
+        return fields
+
+    @staticmethod
+    def _ip_from_xaddrs(xaddrs: List[str]) -> Optional[str]:
+        for value in xaddrs:
+            for url in value.split():
+                try:
+                    host = urlsplit(url).hostname
+                except ValueError:
+                    continue
+                if host and _IPV4_RE.match(host):
+                    return host
+        return None
+
+    def _handle_message(self, message: str, sender_ip: str):
+        fields = self._parse_fields(message)
+        action = fields.get('Action', [''])[0].rsplit('/', 1)[-1]
+        address = fields.get('Address', [None])[0]
+
+        if action == _ACTION_BYE:
+            ip = self._endpoints.pop(address, None) if address else None
+            if ip is not None and ip in self._known_ips:
+                logger.info(f'Zebra reader left via WS-Discovery: {ip}')
+                self._known_ips.discard(ip)
+                if self.removal_callback is not None:
+                    self.removal_callback(SenseidReaderConnectionInfo(
+                        driver=SupportedSenseidReader.ZEBRA_LLRP,
+                        connection_string=ip,
+                    ))
+            return
+
+        if action not in (_ACTION_HELLO, _ACTION_PROBE_MATCHES):
+            return  # our own Probe looped back, Resolve, etc.
+
+        descriptor = ' '.join(fields.get('Types', []) + fields.get('Scopes', []) + fields.get('XAddrs', []))
+        if not _RFID_READER_RE.search(descriptor):
+            return
+        ip = self._ip_from_xaddrs(fields.get('XAddrs', [])) or sender_ip
+        if address:
+            self._endpoints[address] = ip
+        if ip not in self._known_ips:
             logger.info(f'New Zebra reader found via WS-Discovery: {ip}')
             self._known_ips.add(ip)
-            conn_info = SenseidReaderConnectionInfo(
+            self.notification_callback(SenseidReaderConnectionInfo(
                 driver=SupportedSenseidReader.ZEBRA_LLRP,
                 connection_string=ip,
-            )
-            self.notification_callback(conn_info)
+            ))
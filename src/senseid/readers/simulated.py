@@ -0,0 +1,330 @@
+import logging
+import math
+import random
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+from urllib.parse import parse_qsl
+
+from . import SenseidReader, SenseidReaderDetails, SenseidReaderError, SenseidReaderMode
+from ..__about__ import __version__
+from ..parsers import SenseidTag
+from ..parsers.dispatch import parse_rain_report
+from ..parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
+from ..simulation.population import SenseidTagFamily, SenseidTagPopulation, SimulatedReport
+
+logger = logging.getLogger(__name__)
+
+SIMULATED_RAIN_MIX = {
+    SenseidTagFamily.RAIN: 0.5,
+    SenseidTagFamily.SENSEREAD: 0.2,
+    SenseidTagFamily.FARSENS: 0.1,
+    SenseidTagFamily.RAIN_ID: 0.2,
+}
+
+# Air time of each Gen2 slot outcome, as a fraction of a successful
+# singulation (1 / inventory_rate). A USER-memory read adds another one.
+_EMPTY_SLOT_FRACTION = 0.15
+_COLLISION_SLOT_FRACTION = 0.4
+_READ_SLOT_FRACTION = 1.0
+_COLLIDED_SLOT_TAGS = 2.39
+_MAX_Q = 15
+_MIN_ROUND_S = 0.005  # keep empty fields from spinning the inventory thread
+
+# Field geometry, normalised to the read range at max TX power. Every tag
+# sits close to a "home" antenna and further from the others; the range
+# scales with TX power as in free space (20 dB per decade).
+_HOME_RADIUS = 0.9
+_OTHER_ANTENNA_DISTANCE = (0.8, 2.0)
+
+# connection_string options: 'SIMULATED?tags=5000&rate=8000&antennas=2'
+_CONNECTION_OPTIONS = {
+    'tags': ('population_size', int),
+    'rate': ('inventory_rate', float),
+    'antennas': ('antenna_count', int),
+    'q': ('initial_q', int),
+    'churn': ('churn', float),
+    'update_ratio': ('update_ratio', float),
+    'read_success': ('read_success', float),
+    'seed': ('seed', int),
+}
+
+
+def _q_for(tag_estimate: float) -> int:
+    return min(max(int(round(math.log2(tag_estimate))), 0), _MAX_Q) if tag_estimate >= 1 else 0
+
+
+class SimulatedTagReport(NamedTuple):
+    epc: str
+    antenna_port: int
+    user_mem: Optional[str]
+
+
+class SenseidSimulatedReader(SenseidReader):
+    """RAIN reader simulated in software, for load testing without hardware.
+
+    A SenseidTagPopulation stands in the field. Each tag is placed at a
+    distance from every antenna and is powered when it is within the range
+    allowed by the current TX power. Inventory runs Gen2-like rounds
+    antenna by antenna: visible tags pick a slot among 2^Q, slots with a
+    single tag are singulated and Q adapts to the collisions seen. Time
+    advances with the air time of each round, so the delivered rate follows
+    `inventory_rate` (singulations/s with no collisions) and the population.
+    In SENSEREAD mode only SenseID-PEN tags take part and each singulation
+    performs a USER-memory read that succeeds with `read_success`.
+
+    Tags are delivered through parse_rain_report, like the hardware drivers.
+    """
+
+    def __init__(self, population: Optional[SenseidTagPopulation] = None, population_size: int = 200,
+                 inventory_rate: float = 800.0, antenna_count: int = 4, initial_q: int = 4,
+                 churn: float = 0.0, update_ratio: float = 0.05, read_success: float = 0.9,
+                 min_tx_power: float = 10.0, max_tx_power: float = 31.5, seed: Optional[int] = None):
+        super().__init__()
+        self.population = population
+        self.population_size = population_size
+        self.inventory_rate = inventory_rate
+        self.antenna_count = antenna_count
+        self.initial_q = initial_q
+        self.churn = churn
+        self.update_ratio = update_ratio
+        self.read_success = read_success
+        self.min_tx_power = min_tx_power
+        self.max_tx_power = max_tx_power
+        self.seed = seed
+        self.notification_callback = None
+        self.error_callback = None
+        self.details = None
+        self._mode: SenseidReaderMode = SenseidReaderMode.SENSEID
+        self._rng = random.Random(seed)
+        self._tx_power = max_tx_power
+        self._antenna_config: List[bool] = []
+        self._distances: List[List[float]] = []
+        self._visible: List[Set[int]] = []
+        self._q = initial_q
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def connect(self, connection_string: str):
+        _, _, query = connection_string.partition('?')
+        try:
+            for key, value in parse_qsl(query, strict_parsing=bool(query)):
+                attr, convert = _CONNECTION_OPTIONS[key]
+                setattr(self, attr, convert(value))
+        except (KeyError, ValueError) as e:
+            logger.error('Invalid simulated reader connection string %r: %s', connection_string, e)
+            return False
+        self._rng = random.Random(self.seed)
+        self._q = self.initial_q
+        self._tx_power = self.max_tx_power
+        if self.population is None:
+            self.population = SenseidTagPopulation(size=self.population_size, mix=SIMULATED_RAIN_MIX,
+                                                   churn=self.churn, update_ratio=self.update_ratio,
+                                                   seed=self.seed)
+        self._distances = [self._place_tag() for _ in range(self.population.size)]
+        self._antenna_config = [True] + [False] * (self.antenna_count - 1)
+        self._update_visibility()
+        self.details = None
+        self.get_details()
+        return True
+
+    def disconnect(self):
+        self.stop_inventory_async()
+
+    # ── Field model ───────────────────────────
+
+    def _place_tag(self) -> List[float]:
+        rng = self._rng
+        home = rng.randrange(self.antenna_count)
+        return [_HOME_RADIUS * rng.random() ** 0.5 if antenna == home
+                else rng.uniform(*_OTHER_ANTENNA_DISTANCE)
+                for antenna in range(self.antenna_count)]
+
+    def _read_range(self) -> float:
+        return 10 ** ((self._tx_power - self.max_tx_power) / 20)
+
+    def _update_visibility(self, slots: Optional[List[int]] = None):
+        read_range = self._read_range()
+        with self._lock:
+            if slots is None:
+                self._visible = [set() for _ in range(self.antenna_count)]
+                slots = range(len(self._distances))
+            for slot in slots:
+                for antenna, distance in enumerate(self._distances[slot]):
+                    if distance <= read_range:
+                        self._visible[antenna].add(slot)
+                    else:
+                        self._visible[antenna].discard(slot)
+
+    def _run_round(self, antenna: int, reports: List[SimulatedReport]) -> float:
+        """One inventory round on `antenna`; returns its air time."""
+        self._count_inventory_round()
+        rng = self._rng
+        with self._lock:
+            slots = list(self._visible[antenna])
+        senseread = self._mode == SenseidReaderMode.SENSEREAD
+        if senseread:
+            pen_first_byte = SENSEID_SENSEREAD_DEF.pen_header[0]
+            slots = [s for s in slots if reports[s].data[0] == pen_first_byte]
+
+        # Dynamic framed slotted ALOHA, as Gen2 readers run it: unread tags
+        # draw a slot in [0, 2^Q); singletons are singulated, collided tags
+        # go on to the next frame, whose Q is sized from the collisions seen
+        # (Schoute's estimate: 2.39 tags per collided slot). The first
+        # frame's estimate sets the Q the next round starts with.
+        unread = slots
+        q = self._q
+        singulated = []
+        empties = collisions = 0
+        first_frame = True
+        while unread:
+            frame = 1 << q
+            by_slot: Dict[int, List[int]] = {}
+            for slot in unread:
+                by_slot.setdefault(rng.randrange(frame), []).append(slot)
+            unread = []
+            frame_collisions = 0
+            for tags in by_slot.values():
+                if len(tags) == 1:
+                    singulated.append(tags[0])
+                else:
+                    frame_collisions += 1
+                    unread.extend(tags)
+            empties += frame - len(by_slot)
+            collisions += frame_collisions
+            backlog = _COLLIDED_SLOT_TAGS * frame_collisions
+            if first_frame:
+                self._q = _q_for(len(by_slot) - frame_collisions + backlog)
+                first_frame = False
+            q = _q_for(backlog)
+
+        t_success = 1.0 / self.inventory_rate
+        air_time = t_success * (len(singulated) + _EMPTY_SLOT_FRACTION * empties
+                                + _COLLISION_SLOT_FRACTION * collisions)
+        if senseread:
+            air_time += t_success * _READ_SLOT_FRACTION * len(singulated)
+
+        for slot in singulated:
+            report = reports[slot]
+            user_mem = None
+            if senseread and report.user_mem is not None and rng.random() < self.read_success:
+                user_mem = report.user_mem.hex().upper()
+            self._driver_notification_callback(
+                SimulatedTagReport(epc=report.data.hex().upper(), antenna_port=antenna + 1, user_mem=user_mem))
+        if singulated:
+            replaced = self.population.advance(len(singulated))
+            if replaced:
+                for slot in replaced:
+                    self._distances[slot] = self._place_tag()
+                self._update_visibility(replaced)
+        if not singulated:
+            air_time = max(air_time, _MIN_ROUND_S)
+        return air_time
+
+    def _inventory_loop(self, stop_event: threading.Event):
+        deadline = time.perf_counter()
+        while not stop_event.is_set():
+            antennas = [i for i, enabled in enumerate(self._antenna_config) if enabled]
+            for antenna in antennas:
+                deadline += self._run_round(antenna, self.population.current())
+                if stop_event.is_set():
+                    return
+                delay = deadline - time.perf_counter()
+                if delay > 0.001:
+                    if stop_event.wait(delay):
+                        return
+                elif delay < -1.0:
+                    # Consumer can't keep up: don't burst to catch up
+                    deadline = time.perf_counter()
+
+    # ── Tag delivery ──────────────────────────
+
+    def _capture_tag_report(self, tag_report: SimulatedTagReport):
+        self._capture_report(tag_report.epc, tag_report.user_mem, antenna=tag_report.antenna_port)
+
+    def _build_tag(self, tag_report: SimulatedTagReport) -> SenseidTag:
+        return parse_rain_report(tag_report.epc, tag_report.user_mem)
+
+    def _driver_notification_callback(self, tag_report: SimulatedTagReport):
+        try:
+            self._deliver(self._build_tag, tag_report, tag_report.user_mem, epc=tag_report.epc,
+                          capture=self._capture_tag_report)
+        except Exception:
+            logger.exception('Error in notification callback')
+
+    # ── Reader API ────────────────────────────
+
+    def get_details(self) -> SenseidReaderDetails:
+        if self.details is None:
+            self.details = SenseidReaderDetails(
+                model_name='SenseID Simulated Reader',
+                region='SIMULATED',
+                firmware_version=__version__,
+                antenna_count=self.antenna_count,
+                min_tx_power=self.min_tx_power,
+                max_tx_power=self.max_tx_power,
+                technology=self.technology,
+                serial_number=f'SIM-{self.seed}' if self.seed is not None else 'SIM',
+            )
+        return self.details
+
+    def get_tx_power(self) -> float:
+        return self._tx_power
+
+    def set_tx_power(self, dbm: float):
+        if not self.min_tx_power <= dbm <= self.max_tx_power:
+            logger.warning('TX power %s dBm out of range, clamping to [%s, %s]',
+                           dbm, self.min_tx_power, self.max_tx_power)
+            dbm = min(max(dbm, self.min_tx_power), self.max_tx_power)
+        self._tx_power = dbm
+        self._update_visibility()
+
+    def get_antenna_config(self) -> List[bool]:
+        return list(self._antenna_config)
+
+    def set_antenna_config(self, antenna_config_array: List[bool]):
+        config = list(antenna_config_array[:self.antenna_count])
+        config += [False] * (self.antenna_count - len(config))
+        if not (True in config):
+            config[0] = True
+            logger.warning('At least one antenna needs to be active. Enabling antenna 1.')
+        self._antenna_config = config
+
+    def get_supported_modes(self) -> List[SenseidReaderMode]:
+        return [SenseidReaderMode.SENSEID, SenseidReaderMode.SENSEREAD]
+
+    def get_mode(self) -> SenseidReaderMode:
+        return self._mode
+
+    def set_mode(self, mode: SenseidReaderMode):
+        super().set_mode(mode)
+        self._mode = mode
+        logger.info('Reader mode set to %s', mode.value)
+
+    def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
+                              error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        if self.population is None:
+            logger.error('Simulated reader not connected')
+            return False
+        self._inventory_started(notification_callback, error_callback)
+        self.notification_callback = notification_callback
+        self.error_callback = error_callback
+        if self._thread is not None:
+            return True
+        # One event per run: a loop stopped from its own callback may still be
+        # unwinding when the next one starts
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._inventory_loop, args=(self._stop_event,), daemon=True,
+                                        name='simulated-inventory')
+        self._thread.start()
+        return True
+
+    def stop_inventory_async(self):
+        self._inventory_stopped()
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        if self._thread is not threading.current_thread():  # stopped from the notification callback
+            self._thread.join(timeout=2)
+        self._thread = None
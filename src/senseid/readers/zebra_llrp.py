@@ -6,11 +6,9 @@ from zebra_llrp import ZebraLlrp, ZebraLlrpTagReport, FX9600RfMode, FX7500RfMode
 
 from . import SenseidReader, SenseidReaderDetails, SenseidReaderError, SenseidReaderMode
 from ..parsers import SenseidTag
-from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.dispatch import parse_rain_report
 from ..parsers.farsens.yaml import SENSEID_FARSENS_DEF
-from ..parsers.senseread import SenseidSenseReadTag, is_senseid_senseread_epc
 from ..parsers.senseread.yaml import SENSEID_SENSEREAD_DEF
-from ..parsers.rain import SenseidRainTag
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +16,7 @@ logger = logging.getLogger(__name__)
 class SenseidZebraLlrp(SenseidReader):
 
     def __init__(self):
+        super().__init__()
         self.driver = ZebraLlrp()
         self.notification_callback = None
         self.error_callback = None
@@ -61,32 +60,20 @@ class SenseidZebraLlrp(SenseidReader):
         self.driver.set_trext(True)
         return True
 
-    @staticmethod
-    def _epc_bytes(epc_hex: str) -> bytes:
-        try:
-            return bytes.fromhex(epc_hex)
-        except (ValueError, TypeError):
-            return b''
+    def _capture_tag_report(self, tag_report: ZebraLlrpTagReport):
+        self._capture_report(tag_report.epc, tag_report.user_mem, antenna=tag_report.antenna_port,
+                             rssi_dbm=tag_report.peak_rssi_dbm, reader_timestamp=tag_report.last_seen_timestamp)
 
     def _build_tag(self, tag_report: ZebraLlrpTagReport) -> SenseidTag:
-        epc = tag_report.epc
-        epc_bytes = self._epc_bytes(epc)
-
-        farsens_pen = bytes(SENSEID_FARSENS_DEF.pen_header)
-        if epc_bytes[:len(farsens_pen)] == farsens_pen:
-            return SenseidFarsensTag(epc=epc, user_mem_hex=tag_report.user_mem)
-
-        # SenseID Rain and SenseID SenseRead share the same PEN header
-        # ([00 00 00 F1 D3]). They are told apart by the type byte: each
-        # senseRead product has its own type id in SENSEID_SENSEREAD_DEF.types.
-        if is_senseid_senseread_epc(epc_bytes):
-            return SenseidSenseReadTag(epc=epc, user_mem_hex=tag_report.user_mem)
-
-        return SenseidRainTag(epc=epc)
+        return parse_rain_report(tag_report.epc, tag_report.user_mem)
 
     def _driver_notification_callback(self, tag_report: ZebraLlrpTagReport):
-        if self.notification_callback is not None:
-            self.notification_callback(self._build_tag(tag_report))
+        # LastSeenTimestampUTC is in microseconds; the lag is only meaningful
+        # with the reader clock synchronised (NTP).
+        seen_us = tag_report.last_seen_timestamp
+        self._deliver(self._build_tag, tag_report, tag_report.user_mem, epc=tag_report.epc,
+                      reader_lag_s=time.time() - seen_us / 1e6 if seen_us else None,
+                      capture=self._capture_tag_report)
 
     def disconnect(self):
         self.driver.disconnect()
@@ -164,9 +151,11 @@ class SenseidZebraLlrp(SenseidReader):
 
     def start_inventory_async(self, notification_callback: Callable[[SenseidTag], None],
                               error_callback: Optional[Callable[['SenseidReaderError'], None]] = None):
+        self._inventory_started(notification_callback, error_callback)
         self.notification_callback = notification_callback
         self.error_callback = error_callback
         return self.driver.start()
 
     def stop_inventory_async(self):
+        self._inventory_stopped()
         return self.driver.stop()
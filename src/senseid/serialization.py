@@ -0,0 +1,134 @@
+"""Fast JSON / MessagePack serialization of tags, reader details and the
+YAML definition classes.
+
+dataclasses_json resolves the type of every field on every to_json()
+call. Here the encoder of each class is built once, from its field types,
+as a single function returning a JSON-ready dict::
+
+    from senseid.serialization import to_json, to_json_batch
+    to_json(tag)             # same string as tag.to_json()
+    to_json_batch(tags)      # JSON array of the same objects
+    to_msgpack_batch(tags)   # MessagePack (needs `msgpack`)
+
+Values are encoded as dataclasses_json does: enums by value, datetimes
+as POSIX timestamps. Dates (which to_json() cannot encode) become ISO
+strings and bytearrays lists of ints, as in the YAML definitions.
+"""
+import dataclasses
+import json
+import types
+import typing
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+_Encoder = Callable[[Any], dict]
+
+_ENCODERS: Dict[type, _Encoder] = {}
+_PASSTHROUGH = (str, int, float, bool, type(None), Any)
+
+
+def _encode_value(value):
+    """Encoder of values whose type is only known at run time."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return list(value)
+    if dataclasses.is_dataclass(value):
+        return to_dict(value)
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_encode_value(v) for v in value]
+    return value
+
+
+def _nested_dataclass(value):
+    return None if value is None else (_ENCODERS.get(type(value)) or _compile(type(value)))(value)
+
+
+def _converter(tp) -> Optional[Callable[[Any], Any]]:
+    """Function encoding a value declared as `tp`, or None when the value
+    is JSON as it is. Every converter accepts None."""
+    if tp in _PASSTHROUGH:
+        return None
+    origin = typing.get_origin(tp)
+    if origin is typing.Union or origin is types.UnionType:
+        args = [arg for arg in typing.get_args(tp) if arg is not type(None)]
+        return _converter(args[0]) if len(args) == 1 else _encode_value
+    if origin in (list, List, tuple, set, frozenset):
+        args = typing.get_args(tp)
+        item = _converter(args[0]) if args else _encode_value
+        if item is None:
+            return None if origin in (list, List) else (lambda v: None if v is None else list(v))
+        return lambda v: None if v is None else [item(x) for x in v]
+    if origin in (dict, Dict):
+        args = typing.get_args(tp)
+        item = _converter(args[1]) if args else _encode_value
+        if item is None:
+            return None
+        return lambda v: None if v is None else {k: item(x) for k, x in v.items()}
+    if isinstance(tp, type):
+        if issubclass(tp, Enum):
+            return lambda v: None if v is None else v.value
+        if issubclass(tp, datetime):
+            return lambda v: None if v is None else v.timestamp()
+        if issubclass(tp, date):
+            return lambda v: None if v is None else v.isoformat()
+        if issubclass(tp, (bytes, bytearray)):
+            return lambda v: None if v is None else list(v)
+        if dataclasses.is_dataclass(tp):
+            return _nested_dataclass
+    return _encode_value
+
+
+def _compile(cls: type) -> _Encoder:
+    hints = typing.get_type_hints(cls)
+    namespace: Dict[str, Any] = {}
+    items = []
+    for i, field in enumerate(dataclasses.fields(cls)):
+        converter = _converter(hints.get(field.name, Any))
+        if converter is None:
+            items.append(f'{field.name!r}: obj.{field.name}')
+        else:
+            namespace[f'_c{i}'] = converter
+            items.append(f'{field.name!r}: _c{i}(obj.{field.name})')
+    source = f'def encode(obj):\n    return {{{", ".join(items)}}}\n'
+    exec(compile(source, f'<senseid.serialization {cls.__qualname__}>', 'exec'), namespace)
+    encoder = _ENCODERS[cls] = namespace['encode']
+    return encoder
+
+
+def to_dict(obj) -> dict:
+    """JSON-ready dict of a dataclass instance (to_dict(encode_json=True))."""
+    encoder = _ENCODERS.get(type(obj))
+    if encoder is None:
+        if not dataclasses.is_dataclass(obj) or isinstance(obj, type):
+            raise TypeError(f'Cannot serialize {type(obj).__name__}: not a dataclass instance')
+        encoder = _compile(type(obj))
+    return encoder(obj)
+
+
+def to_json(obj) -> str:
+    """Same string as obj.to_json()."""
+    return json.dumps(to_dict(obj))
+
+
+def to_json_batch(objs: Iterable) -> str:
+    return json.dumps([to_dict(obj) for obj in objs])
+
+
+def to_msgpack(obj) -> bytes:
+    import msgpack
+    return msgpack.packb(to_dict(obj))
+
+
+def to_msgpack_batch(objs: Iterable) -> bytes:
+    import msgpack
+    return msgpack.packb([to_dict(obj) for obj in objs])
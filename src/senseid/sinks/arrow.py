@@ -0,0 +1,268 @@
+"""Columnar archive of tag notifications in Parquet or Arrow IPC files.
+
+The sink is a notification callback: it appends each tag to in-memory
+column buffers and a background thread turns them into Arrow record
+batches and writes them out::
+
+    sink = SenseidArrowSink('/data/tags', reader='dock-1')
+    reader.start_inventory_async(sink)
+    ...
+    sink.close()
+
+Columns: reader, timestamp, technology, id, type (tag name), sn,
+fw_version, and one float column per magnitude, named 'magnitude (unit)'.
+String columns are plain: Parquet dictionary-encodes them itself.
+Files are written as '<prefix>-<start time>-<pid>-<n>.parquet.part' and
+renamed when closed (a name already taken in the directory is skipped),
+rolled after `roll_size_bytes` or `roll_interval_s`, and whenever a new
+magnitude column appears. Needs `pyarrow`.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..parsers import SenseidTag
+
+logger = logging.getLogger(__name__)
+
+FORMAT_PARQUET = 'parquet'
+FORMAT_ARROW = 'arrow'
+
+
+class _Columns:
+    """Row buffers of one batch. Magnitude columns are sparse (row, value)
+    lists, filled with nulls when the batch is built."""
+
+    __slots__ = ('reader', 'timestamp', 'technology', 'id', 'type', 'sn', 'fw_version', 'magnitudes')
+
+    def __init__(self):
+        self.reader: List[Optional[str]] = []
+        self.timestamp: List[datetime] = []
+        self.technology: List[str] = []
+        self.id: List[str] = []
+        self.type: List[str] = []
+        self.sn: List[Optional[int]] = []
+        self.fw_version: List[Optional[int]] = []
+        self.magnitudes: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def __len__(self):
+        return len(self.id)
+
+
+class SenseidArrowSink:
+    """Batching Parquet / Arrow IPC writer fed by notification callbacks.
+
+    A batch is written when it reaches `batch_rows` rows or is older than
+    `max_batch_age_s`. At most `max_buffered_rows` rows wait in memory;
+    tags arriving beyond that are dropped and counted in `dropped`, so a
+    slow disk never stalls the reader threads."""
+
+    def __init__(self, directory: str, reader: Optional[str] = None, file_format: str = FORMAT_PARQUET,
+                 prefix: str = 'senseid', batch_rows: int = 65536, max_batch_age_s: float = 1.0,
+                 max_buffered_rows: int = 1000000, roll_size_bytes: int = 256 * 1024 * 1024,
+                 roll_interval_s: Optional[float] = 3600, compression: Optional[str] = 'zstd'):
+        # Fail early without the optional dependency
+        import pyarrow  # noqa: F401
+        if file_format not in (FORMAT_PARQUET, FORMAT_ARROW):
+            raise ValueError(f'Unknown format {file_format}. Formats: {FORMAT_PARQUET}, {FORMAT_ARROW}')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.reader = reader
+        self.file_format = file_format
+        self.prefix = prefix
+        self.batch_rows = batch_rows
+        self.max_batch_age_s = max_batch_age_s
+        self.max_buffered_rows = max_buffered_rows
+        self.roll_size_bytes = roll_size_bytes
+        self.roll_interval_s = roll_interval_s
+        self.compression = compression
+        self.rows_written = 0
+        self.files_written: List[str] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._write_mutex = threading.Lock()  # file writes, writer thread vs flush()
+        self._columns = _Columns()
+        self._batch_started = time.monotonic()
+        self._pending_rows = 0  # rows taken by the writer thread, not yet written
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._writer = None
+        self._schema = None
+        self._path: Optional[str] = None
+        self._file_started = 0.0
+        self._file_count = 0
+        self._thread = threading.Thread(target=self._run, daemon=True, name='senseid-arrow-sink')
+        self._thread.start()
+
+    # ── Hot path ─────────────────────────────
+
+    def __call__(self, tag: SenseidTag):
+        self.append(tag, self.reader)
+
+    def callback(self, reader: Optional[str] = None) -> Callable[[SenseidTag], None]:
+        """Notification callback labelling its rows with `reader`, to share
+        one sink between readers."""
+        return lambda tag: self.append(tag, reader)
+
+    def append(self, tag: SenseidTag, reader: Optional[str] = None):
+        with self._lock:
+            columns = self._columns
+            row = len(columns.id)
+            if row + self._pending_rows >= self.max_buffered_rows:
+                self.dropped += 1
+                return
+            if not row:
+                self._batch_started = time.monotonic()
+            columns.reader.append(reader)
+            columns.timestamp.append(tag.timestamp)
+            columns.technology.append(tag.technology.value)
+            columns.id.append(tag.id)
+            columns.type.append(tag.name)
+            columns.sn.append(tag.sn)
+            columns.fw_version.append(tag.fw_version)
+            if tag.data:
+                magnitudes = columns.magnitudes
+                for data in tag.data:
+                    name = f'{data.magnitude} ({data.unit_short})' if data.unit_short else data.magnitude
+                    column = magnitudes.get(name)
+                    if column is None:
+                        column = magnitudes[name] = ([], [])
+                    column[0].append(row)
+                    column[1].append(data.value)
+            if row + 1 >= self.batch_rows:
+                self._wakeup.set()
+
+    # ── Writer thread ────────────────────────
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.max_batch_age_s / 2)
+            self._wakeup.clear()
+            try:
+                with self._write_mutex:
+                    self._flush(older_than_s=self.max_batch_age_s)
+                    self._roll_if_due()
+            except Exception:
+                logger.exception('Could not write tag batch to %s', self.directory)
+
+    def _take(self, older_than_s: float) -> Optional[_Columns]:
+        with self._lock:
+            columns = self._columns
+            if not len(columns):
+                return None
+            if len(columns) < self.batch_rows and time.monotonic() - self._batch_started < older_than_s:
+                return None
+            self._columns = _Columns()
+            self._pending_rows = len(columns)
+            return columns
+
+    def _flush(self, older_than_s: float = 0.0):
+        columns = self._take(older_than_s)
+        if columns is None:
+            return
+        try:
+            self._write(self._build_batch(columns))
+        finally:
+            with self._lock:
+                self._pending_rows = 0
+
+    def _build_batch(self, columns: _Columns):
+        import pyarrow as pa
+        rows = len(columns)
+        arrays = [
+            pa.array(columns.reader, pa.string()),
+            pa.array(columns.timestamp, pa.timestamp('us')),
+            pa.array(columns.technology, pa.string()),
+            pa.array(columns.id, pa.string()),
+            pa.array(columns.type, pa.string()),
+            pa.array(columns.sn, pa.int64()),
+            pa.array(columns.fw_version, pa.int32()),
+        ]
+        names = ['reader', 'timestamp', 'technology', 'id', 'type', 'sn', 'fw_version']
+        for name in sorted(columns.magnitudes):
+            row_indexes, values = columns.magnitudes[name]
+            dense: List[Optional[float]] = [None] * rows
+            for row, value in zip(row_indexes, values):
+                dense[row] = value
+            arrays.append(pa.array(dense, pa.float64()))
+            names.append(name)
+        return pa.RecordBatch.from_arrays(arrays, names=names)
+
+    def _write(self, batch):
+        import pyarrow as pa
+        if self._writer is not None and not set(batch.schema.names) <= set(self._schema.names):
+            self._close_file()  # new magnitude: start a file with the wider schema
+        if self._writer is None:
+            self._open_file(batch.schema)
+        if batch.schema != self._schema:
+            arrays = []
+            for field in self._schema:
+                index = batch.schema.get_field_index(field.name)
+                arrays.append(batch.column(index) if index >= 0 else pa.nulls(batch.num_rows, field.type))
+            batch = pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+        self._writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+
+    def _open_file(self, schema):
+        import pyarrow as pa
+        start = datetime.now().strftime('%Y%m%dT%H%M%S')
+        while True:
+            # Other sinks (or a restart) may share the directory and second
+            self._file_count += 1
+            self._path = os.path.join(self.directory, f'{self.prefix}-{start}-{os.getpid()}-{self._file_count}'
+                                                      f'.{self.file_format}')
+            part = self._path + '.part'
+            if not os.path.exists(self._path) and not os.path.exists(part):
+                break
+        if self.file_format == FORMAT_PARQUET:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(part, schema, compression=self.compression)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression) if self.compression else None
+            self._writer = pa.ipc.new_file(part, schema, options=options)
+        self._schema = schema
+        self._file_started = time.monotonic()
+
+    def _close_file(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        os.replace(self._path + '.part', self._path)
+        self.files_written.append(self._path)
+        logger.info('Closed tag archive %s', self._path)
+
+    def _roll_if_due(self):
+        if self._writer is None:
+            return
+        if ((self.roll_interval_s is not None and time.monotonic() - self._file_started >= self.roll_interval_s)
+                or os.path.getsize(self._path + '.part') >= self.roll_size_bytes):
+            self._close_file()
+
+    # ── Control ──────────────────────────────
+
+    @property
+    def buffered_rows(self) -> int:
+        return len(self._columns) + self._pending_rows
+
+    def flush(self):
+        """Write the buffered rows now, from the calling thread."""
+        with self._write_mutex:
+            self._flush()
+
+    def close(self):
+        """Write what is buffered and close the current file."""
+        self._stop_event.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._flush()
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,248 @@
+"""In-memory store of the recent sensor values of every tag.
+
+Each (tag id, magnitude) keeps its last `capacity` samples in two
+preallocated arrays (timestamps and values) used as a ring, so storing a
+reading allocates nothing per sample. Fed directly as a notification
+callback, it answers the usual dashboard questions::
+
+    recent = SenseidRecentValues(capacity=256, max_series=100000)
+    reader.start_inventory_async(recent)
+    ...
+    recent.latest(tag_id, 'Temperature')              # (datetime, value)
+    recent.window_stats(tag_id, 'Temperature', 600)   # count/min/max/mean
+    recent.scan('Temperature', above=8.0, window_s=600)
+
+Memory is bounded by `max_series` series of `capacity` samples: the least
+recently seen tags are evicted first, as are tags idle for longer than
+`idle_timeout_s`. Queries assume each series arrives in time order, as
+it does from one reader.
+"""
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..parsers import SenseidTag
+
+
+class SenseidWindowStats(NamedTuple):
+    count: int
+    min: float
+    max: float
+    mean: float
+    first: datetime
+    last: datetime
+
+
+class SenseidThresholdMatch(NamedTuple):
+    tag_id: str
+    timestamp: datetime  # of the most extreme matching sample
+    value: float
+    count: int           # matching samples in the window
+
+
+class _Series:
+    __slots__ = ('times', 'values', 'head', 'count', 'unit')
+
+    def __init__(self, capacity: int, unit: Optional[str]):
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.head = 0  # next slot to write
+        self.count = 0
+        self.unit = unit
+
+    def append(self, timestamp: float, value: float):
+        head = self.head
+        self.times[head] = timestamp
+        self.values[head] = value
+        head += 1
+        capacity = len(self.times)
+        self.head = head if head < capacity else 0
+        if self.count < capacity:
+            self.count += 1
+
+    def newest_first(self, since: float):
+        """Slot indexes newer than or at `since`, newest first."""
+        capacity = len(self.times)
+        times = self.times
+        index = self.head
+        for _ in range(self.count):
+            index = index - 1 if index else capacity - 1
+            if times[index] < since:
+                return
+            yield index
+
+
+class SenseidRecentValues:
+    """Per-tag ring buffers of recent values. Thread safe: callbacks from
+    several readers and queries can run concurrently."""
+
+    def __init__(self, capacity: int = 64, max_series: int = 100000, idle_timeout_s: Optional[float] = None):
+        if capacity < 1:
+            raise ValueError('capacity must be >= 1')
+        self.capacity = capacity
+        self.max_series = max_series
+        self.idle_timeout_s = idle_timeout_s
+        self.evicted_tags = 0
+        # tag id -> ({magnitude: series}, last seen); least recently seen first
+        self._tags: 'OrderedDict[str, Tuple[Dict[str, _Series], float]]' = OrderedDict()
+        self._series_count = 0
+        self._lock = threading.Lock()
+
+    # ── Hot path ─────────────────────────────
+
+    def __call__(self, tag: SenseidTag):
+        data = tag.data
+        if not data:
+            return
+        timestamp = tag.timestamp.timestamp()
+        now = time.time()
+        with self._lock:
+            tags = self._tags
+            entry = tags.get(tag.id)
+            if entry is None:
+                series_map: Dict[str, _Series] = {}
+            else:
+                series_map = entry[0]
+                tags.move_to_end(tag.id)
+            tags[tag.id] = (series_map, now)
+            for d in data:
+                series = series_map.get(d.magnitude)
+                if series is None:
+                    series = series_map[d.magnitude] = _Series(self.capacity, d.unit_short)
+                    self._series_count += 1
+                if d.value is not None:
+                    series.append(timestamp, d.value)
+            if self._series_count > self.max_series or self.idle_timeout_s is not None:
+                self._evict_locked(now)
+
+    def _evict_locked(self, now: float):
+        tags = self._tags
+        idle_before = now - self.idle_timeout_s if self.idle_timeout_s is not None else None
+        while len(tags) > 1:
+            tag_id, (series_map, last_seen) = next(iter(tags.items()))
+            if self._series_count <= self.max_series and (idle_before is None or last_seen >= idle_before):
+                break
+            del tags[tag_id]
+            self._series_count -= len(series_map)
+            self.evicted_tags += 1
+
+    def evict_idle(self):
+        """Drop the tags idle for longer than idle_timeout_s now, without
+        waiting for the next report."""
+        with self._lock:
+            self._evict_locked(time.time())
+
+    # ── Queries ──────────────────────────────
+
+    def _series(self, tag_id: str, magnitude: str) -> Optional[_Series]:
+        entry = self._tags.get(tag_id)
+        return entry[0].get(magnitude) if entry is not None else None
+
+    def latest(self, tag_id: str, magnitude: str) -> Optional[Tuple[datetime, float]]:
+        with self._lock:
+            series = self._series(tag_id, magnitude)
+            if series is None or not series.count:
+                return None
+            index = (series.head or len(series.times)) - 1
+            return datetime.fromtimestamp(series.times[index]), series.values[index]
+
+    def values(self, tag_id: str, magnitude: str, window_s: Optional[float] = None) -> List[Tuple[datetime, float]]:
+        """Samples of the last `window_s` seconds (all kept ones by
+        default), oldest first."""
+        since = time.time() - window_s if window_s is not None else float('-inf')
+        with self._lock:
+            series = self._series(tag_id, magnitude)
+            if series is None:
+                return []
+            samples = [(series.times[i], series.values[i]) for i in series.newest_first(since)]
+        samples.reverse()
+        return [(datetime.fromtimestamp(t), v) for t, v in samples]
+
+    def window_stats(self, tag_id: str, magnitude: str, window_s: float) -> Optional[SenseidWindowStats]:
+        """Statistics of the samples of the last `window_s` seconds, None
+        without samples."""
+        since = time.time() - window_s
+        with self._lock:
+            series = self._series(tag_id, magnitude)
+            if series is None:
+                return None
+            values = series.values
+            count = 0
+            total = 0.0
+            low = float('inf')
+            high = float('-inf')
+            first = last = None
+            for i in series.newest_first(since):
+                value = values[i]
+                if last is None:
+                    last = i
+                first = i
+                count += 1
+                total += value
+                if value < low:
+                    low = value
+                if value > high:
+                    high = value
+            if not count:
+                return None
+            first_time, last_time = series.times[first], series.times[last]
+        return SenseidWindowStats(count, low, high, total / count, datetime.fromtimestamp(first_time),
+                                  datetime.fromtimestamp(last_time))
+
+    def scan(self, magnitude: str, above: Optional[float] = None, below: Optional[float] = None,
+             window_s: float = 600.0) -> List[SenseidThresholdMatch]:
+        """Tags with a `magnitude` sample above `above` (or below `below`)
+        in the last `window_s` seconds, with their most extreme one."""
+        if (above is None) == (below is None):
+            raise ValueError('Give exactly one of above, below')
+        since = time.time() - window_s
+        matches = []
+        with self._lock:
+            for tag_id, (series_map, _) in self._tags.items():
+                series = series_map.get(magnitude)
+                if series is None:
+                    continue
+                values = series.values
+                count = 0
+                extreme = None
+                for i in series.newest_first(since):
+                    value = values[i]
+                    if (above is not None and value > above) or (below is not None and value < below):
+                        count += 1
+                        if extreme is None or (value > values[extreme] if above is not None
+                                               else value < values[extreme]):
+                            extreme = i
+                if count:
+                    matches.append((tag_id, series.times[extreme], values[extreme], count))
+        return [SenseidThresholdMatch(tag_id, datetime.fromtimestamp(t), v, n) for tag_id, t, v, n in matches]
+
+    def tag_ids(self) -> List[str]:
+        """Tags in the store, least recently seen first."""
+        with self._lock:
+            return list(self._tags)
+
+    def magnitudes(self, tag_id: str) -> List[Tuple[str, Optional[str]]]:
+        """(magnitude, unit) pairs kept for `tag_id`."""
+        with self._lock:
+            entry = self._tags.get(tag_id)
+            return [(name, series.unit) for name, series in entry[0].items()] if entry is not None else []
+
+    @property
+    def series_count(self) -> int:
+        return self._series_count
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the sample arrays (the bulk of the memory used)."""
+        return self._series_count * self.capacity * 16
+
+    def clear(self):
+        with self._lock:
+            self._tags.clear()
+            self._series_count = 0
+
+    def __len__(self):
+        return len(self._tags)
@@ -0,0 +1,310 @@
+"""Local time-series store of sensor readings in SQLite (WAL mode).
+
+Meant for gateways that must buffer readings through network outages.
+The sink is a notification callback; a writer thread inserts the
+readings in batched transactions and enforces the retention limits::
+
+    store = SenseidSqliteSink('/var/lib/senseid/readings.db', retention_s=48 * 3600)
+    reader.start_inventory_async(store)
+    ...
+    store.query('000000F1D301012265B1', start=datetime(2026, 5, 1))
+
+Schema: `series` maps each (tag id, magnitude) to a small integer, and
+`readings` holds (series, timestamp in us, value) rows, clustered by
+series and time. Tags without sensor data are not stored.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..parsers import SenseidTag
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS series ('
+    ' series_id INTEGER PRIMARY KEY,'
+    ' tag_id TEXT NOT NULL,'
+    ' magnitude TEXT NOT NULL,'
+    ' unit TEXT,'
+    ' tag_name TEXT,'
+    ' UNIQUE (tag_id, magnitude))',
+    'CREATE TABLE IF NOT EXISTS readings ('
+    ' series_id INTEGER NOT NULL,'
+    ' timestamp_us INTEGER NOT NULL,'
+    ' value REAL,'
+    ' PRIMARY KEY (series_id, timestamp_us)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS readings_timestamp ON readings (timestamp_us)',
+)
+_INSERT = 'INSERT INTO readings (series_id, timestamp_us, value) VALUES (?, ?, ?)'
+
+# (tag id, tag name, timestamp, data) as queued by the callback
+_PendingTag = Tuple[str, str, datetime, list]
+
+
+class SenseidReading(NamedTuple):
+    timestamp: datetime
+    tag_id: str
+    magnitude: str
+    unit: Optional[str]
+    value: Optional[float]
+
+
+class SenseidSqliteSink:
+    """SQLite store fed by notification callbacks.
+
+    Readings are inserted every `flush_interval_s` (or sooner, once
+    `batch_size` tags are queued) in one transaction. Up to
+    `max_pending_tags` tags wait in memory; beyond that they are dropped
+    and counted in `dropped`. Every `retention_check_s`, readings older
+    than `retention_s` are deleted, then the oldest ones until the data
+    fits in `max_size_bytes`, and the freed pages are returned to the file
+    system with an incremental vacuum.
+
+    Readings are keyed by series and microsecond. A second reading of a
+    series in the same microsecond (e.g. one tag seen by two readers) is
+    kept at the next free microsecond and counted in `readings_shifted`."""
+
+    def __init__(self, path: str, retention_s: Optional[float] = None, max_size_bytes: Optional[int] = None,
+                 flush_interval_s: float = 0.5, batch_size: int = 10000, max_pending_tags: int = 500000,
+                 retention_check_s: float = 60.0):
+        self.path = path
+        self.retention_s = retention_s
+        self.max_size_bytes = max_size_bytes
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.max_pending_tags = max_pending_tags
+        self.retention_check_s = retention_check_s
+        self.readings_written = 0
+        self.readings_deleted = 0
+        self.readings_shifted = 0
+        self.dropped = 0
+        self._pending: List[_PendingTag] = []
+        self._queued = 0      # tags accepted by the callback
+        self._committed = 0   # of them, tags written
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)  # _committed advanced
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._series: Dict[Tuple[str, str], int] = {}
+        self._read_connection: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._connection = self._connect(check_same_thread=False)
+        self._create_schema()
+        self._load_series()
+        self._last_retention = 0.0
+        self._thread = threading.Thread(target=self._run, daemon=True, name='senseid-sqlite-sink')
+        self._thread.start()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=check_same_thread)
+        # auto_vacuum only takes effect on a new database, before WAL mode
+        # or the first table initialise it
+        connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _create_schema(self):
+        connection = self._connection
+        for statement in _SCHEMA:
+            connection.execute(statement)
+
+    def _load_series(self):
+        for series_id, tag_id, magnitude in self._connection.execute(
+                'SELECT series_id, tag_id, magnitude FROM series'):
+            self._series[(tag_id, magnitude)] = series_id
+
+    # ── Hot path ─────────────────────────────
+
+    def __call__(self, tag: SenseidTag):
+        if not tag.data:
+            return
+        with self._lock:
+            pending = self._pending
+            if len(pending) >= self.max_pending_tags:
+                self.dropped += 1
+                return
+            pending.append((tag.id, tag.name, tag.timestamp, tag.data))
+            self._queued += 1
+            if len(pending) >= self.batch_size:
+                self._wakeup.set()
+
+    # ── Writer thread ────────────────────────
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            try:
+                self._write_pending()
+                if time.monotonic() - self._last_retention >= self.retention_check_s:
+                    self._last_retention = time.monotonic()
+                    self.enforce_retention()
+            except Exception:
+                logger.exception('Could not write readings to %s', self.path)
+
+    def _series_id(self, tag_id: str, magnitude: str, unit: Optional[str], tag_name: str) -> int:
+        series_id = self._series.get((tag_id, magnitude))
+        if series_id is None:
+            connection = self._connection
+            connection.execute('INSERT OR IGNORE INTO series (tag_id, magnitude, unit, tag_name) VALUES (?, ?, ?, ?)',
+                               (tag_id, magnitude, unit, tag_name))
+            series_id = connection.execute('SELECT series_id FROM series WHERE tag_id = ? AND magnitude = ?',
+                                           (tag_id, magnitude)).fetchone()[0]
+            self._series[(tag_id, magnitude)] = series_id
+        return series_id
+
+    def _write_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        connection = self._connection
+        series = self._series
+        rows = []
+        connection.execute('BEGIN')
+        try:
+            for tag_id, tag_name, timestamp, data in pending:
+                timestamp_us = int(timestamp.timestamp() * 1000000)
+                for d in data:
+                    series_id = series.get((tag_id, d.magnitude))
+                    if series_id is None:
+                        series_id = self._series_id(tag_id, d.magnitude, d.unit_short, tag_name)
+                    rows.append((series_id, timestamp_us, d.value))
+            self._insert(rows)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            self._series.clear()
+            self._load_series()
+            raise
+        finally:
+            with self._written:
+                self._committed += len(pending)
+                self._written.notify_all()
+        self.readings_written += len(rows)
+
+    def _insert(self, rows: List[Tuple[int, int, Optional[float]]]):
+        connection = self._connection
+        connection.execute('SAVEPOINT readings')
+        try:
+            connection.executemany(_INSERT, rows)
+        except sqlite3.IntegrityError:
+            # Same series and microsecond as another reading: insert one by
+            # one, moving the clashing ones to the next free microsecond
+            connection.execute('ROLLBACK TO readings')
+            for series_id, timestamp_us, value in rows:
+                shifted = False
+                while True:
+                    try:
+                        connection.execute(_INSERT, (series_id, timestamp_us, value))
+                        break
+                    except sqlite3.IntegrityError:
+                        timestamp_us += 1
+                        shifted = True
+                self.readings_shifted += shifted
+        connection.execute('RELEASE readings')
+
+    def enforce_retention(self):
+        """Apply the retention limits now. Runs on the writer thread;
+        call it from elsewhere only after close()."""
+        connection = self._connection
+        deleted = 0
+        if self.retention_s is not None:
+            cutoff_us = int((time.time() - self.retention_s) * 1000000)
+            deleted += connection.execute('DELETE FROM readings WHERE timestamp_us < ?', (cutoff_us,)).rowcount
+        if self.max_size_bytes is not None:
+            while self._data_size() > self.max_size_bytes:
+                count = connection.execute('SELECT count(*) FROM readings').fetchone()[0]
+                if not count:
+                    break
+                # Drop the oldest tenth and measure again
+                row = connection.execute('SELECT timestamp_us FROM readings ORDER BY timestamp_us LIMIT 1 OFFSET ?',
+                                         (count // 10,)).fetchone()
+                deleted += connection.execute('DELETE FROM readings WHERE timestamp_us <= ?', (row[0],)).rowcount
+        if deleted:
+            # executescript() steps the pragma to completion; execute()
+            # would free a single page
+            connection.executescript('PRAGMA incremental_vacuum;')
+            connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            self.readings_deleted += deleted
+            logger.info('Retention removed %d readings from %s', deleted, self.path)
+
+    def _data_size(self) -> int:
+        connection = self._connection
+        page_size = connection.execute('PRAGMA page_size').fetchone()[0]
+        page_count = connection.execute('PRAGMA page_count').fetchone()[0]
+        free_pages = connection.execute('PRAGMA freelist_count').fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    # ── Queries ──────────────────────────────
+
+    def _query(self, sql: str, parameters: tuple) -> list:
+        # Readers see the last committed transaction; WAL lets them run
+        # alongside the writer thread.
+        with self._read_lock:
+            if self._read_connection is None:
+                self._read_connection = self._connect(check_same_thread=False)
+            return self._read_connection.execute(sql, parameters).fetchall()
+
+    def query(self, tag_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              magnitude: Optional[str] = None) -> List[SenseidReading]:
+        """Readings of `tag_id` with start <= timestamp < end, oldest first."""
+        sql = ('SELECT r.timestamp_us, s.tag_id, s.magnitude, s.unit, r.value FROM series s'
+               ' JOIN readings r ON r.series_id = s.series_id'
+               ' WHERE s.tag_id = ? AND r.timestamp_us >= ? AND r.timestamp_us < ?')
+        parameters = [tag_id,
+                      int(start.timestamp() * 1000000) if start is not None else -(1 << 63),
+                      int(end.timestamp() * 1000000) if end is not None else (1 << 63) - 1]
+        if magnitude is not None:
+            sql += ' AND s.magnitude = ?'
+            parameters.append(magnitude)
+        sql += ' ORDER BY r.timestamp_us, s.magnitude'
+        return [SenseidReading(datetime.fromtimestamp(timestamp_us / 1000000), *rest)
+                for timestamp_us, *rest in self._query(sql, tuple(parameters))]
+
+    def tag_ids(self) -> List[str]:
+        return [row[0] for row in self._query('SELECT DISTINCT tag_id FROM series ORDER BY tag_id', ())]
+
+    def magnitudes(self, tag_id: str) -> List[Tuple[str, Optional[str]]]:
+        """(magnitude, unit) pairs stored for `tag_id`."""
+        return self._query('SELECT magnitude, unit FROM series WHERE tag_id = ? ORDER BY magnitude', (tag_id,))
+
+    # ── Control ──────────────────────────────
+
+    @property
+    def pending_tags(self) -> int:
+        return len(self._pending)
+
+    def flush(self, timeout_s: Optional[float] = None) -> bool:
+        """Wait until the tags queued so far are written (or failed).
+        Returns False on timeout."""
+        with self._written:
+            target = self._queued
+            self._wakeup.set()
+            self._written.wait_for(lambda: self._committed >= target or not self._thread.is_alive(), timeout_s)
+            return self._committed >= target
+
+    def close(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._write_pending()
+        if self._read_connection is not None:
+            self._read_connection.close()
+            self._read_connection = None
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,113 @@
+"""Sampled debug trace of the tag path, kept in an in-memory ring buffer.
+
+DEBUG logging of every tag is too expensive in production. The trace keeps
+the last `capacity` events instead, optionally sampling 1 in N and capping
+the events per second, and formats them only when dumped::
+
+    from senseid.trace import TRACE
+    TRACE.enable(capacity=10000, sample_every=100, max_per_s=1000)
+    ...
+    print('\\n'.join(TRACE.dump()))
+
+While disabled, tracing costs one attribute check per tag.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TraceEvent(NamedTuple):
+    timestamp: float
+    thread: str
+    source: str
+    message: str
+    args: Tuple[Any, ...]
+
+    def format(self) -> str:
+        try:
+            message = self.message % self.args if self.args else self.message
+        except (TypeError, ValueError):
+            message = f'{self.message} {self.args!r}'
+        time_str = datetime.fromtimestamp(self.timestamp).isoformat(timespec='microseconds')
+        return f'{time_str} [{self.thread}] {self.source}: {message}'
+
+
+class SenseidTrace:
+    """Ring buffer of trace events. `record()` keeps the arguments and
+    formats them with `message % args` on dump, so the arguments should not
+    be mutated afterwards."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_every = 1
+        self.max_per_s: Optional[float] = None
+        self.dropped = 0
+        self._events: Deque[TraceEvent] = deque(maxlen=10000)
+        self._seen = 0
+        self._tokens = 0.0
+        self._last_refill = 0.0
+        self._lock = threading.Lock()
+
+    def enable(self, capacity: int = 10000, sample_every: int = 1, max_per_s: Optional[float] = None):
+        """Start tracing: keep 1 in `sample_every` events, at most
+        `max_per_s` per second, and the last `capacity` of them."""
+        if sample_every < 1:
+            raise ValueError('sample_every must be >= 1')
+        with self._lock:
+            if capacity != self._events.maxlen:
+                self._events = deque(self._events, maxlen=capacity)
+            self.sample_every = sample_every
+            self.max_per_s = max_per_s
+            self._tokens = max_per_s or 0.0
+            self._last_refill = time.monotonic()
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def record(self, source: str, message: str, *args):
+        """Trace an event. Call it behind `if TRACE.enabled:` on hot paths."""
+        if not self.enabled:
+            return
+        self._seen += 1
+        if self._seen % self.sample_every:
+            return
+        if self.max_per_s is not None:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.max_per_s, self._tokens + (now - self._last_refill) * self.max_per_s)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.dropped += 1
+                    return
+                self._tokens -= 1
+        self._events.append(TraceEvent(time.time(), threading.current_thread().name, source, message, args))
+
+    def events(self) -> List[TraceEvent]:
+        return list(self._events)
+
+    def dump(self, clear: bool = False) -> List[str]:
+        """Formatted events, oldest first."""
+        events = self.events()
+        if clear:
+            self.clear()
+        return [event.format() for event in events]
+
+    def dump_to_logger(self, level: int = logging.INFO, clear: bool = False):
+        for line in self.dump(clear=clear):
+            logger.log(level, line)
+
+    def clear(self):
+        self._events.clear()
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._events)
+
+
+TRACE = SenseidTrace()
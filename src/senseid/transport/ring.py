@@ -0,0 +1,399 @@
+"""Shared-memory ring buffer streaming raw tag reports between processes.
+
+A producer process (typically one per reader, so that each vendor driver
+runs under its own GIL) writes fixed-size records into a ring in shared
+memory. Any number of consumer processes attach to it by name and read
+every record at their own pace: no locks across processes, no pickling
+and no broker in between.
+
+    # reader process
+    ring = SenseidRingWriter('senseid-nur0')
+    ring.attach(reader)                          # start_capture + inventory
+
+    # consumer process
+    consumer = SenseidRingConsumer(['senseid-nur0', 'senseid-llrp0'], on_tag)
+    consumer.start()
+
+Layout (little-endian)::
+
+    header : magic b'SIDRING\\0' | u16 version | u16 reserved | u32 slot size | u64 capacity (slots)
+             | u64 head (records written) | u8 closed | u8 reader count | padding to 64 bytes
+             | 16 x (u8 length | 31 bytes UTF-8 reader id)
+    slot   : u64 sequence (position + 1, 0 while being written) | f64 host time (unix s)
+             | i64 reader timestamp (driver units, 0 = none) | i16 RSSI (cdBm, -32768 = none)
+             | u8 antenna (0 = unknown) | u8 technology | u8 reader index | u8 EPC length
+             | u16 User-memory length (0xFFFF = none) | EPC | User memory
+
+Records are the raw reports of the capture log (see readers/capture.py)
+and are parsed on the consumer side only: an attached reader without a
+notification callback captures its reports without decoding them. The producer never waits for its
+consumers: one that falls more than `capacity` records behind loses the
+oldest and counts them in `dropped`. A consumer copies a slot only between
+two reads of its sequence number, so a slot overwritten while being read
+is discarded (and counted) instead of returned torn.
+"""
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..parsers import SenseidTag, SenseidTechnologies
+from ..readers.capture import CapturedReport, parse_captured_report
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SIDRING\0'
+FORMAT_VERSION = 1
+MAX_READERS = 16
+
+_HEADER = struct.Struct('<8sHHIQ')
+_U64 = struct.Struct('<Q')
+_SLOT = struct.Struct('<dqhBBBBH')  # slot fields after the sequence number
+_HEAD_OFFSET = 24
+_CLOSED_OFFSET = 32
+_READER_COUNT_OFFSET = 33
+_READER_IDS_OFFSET = 64
+_READER_ID_SIZE = 32
+_HEADER_SIZE = _READER_IDS_OFFSET + MAX_READERS * _READER_ID_SIZE
+_SLOT_HEADER_SIZE = _U64.size + _SLOT.size
+
+_NO_RSSI = -0x8000
+_NO_USER_MEM = 0xFFFF
+
+_TECHNOLOGY_CODES = {
+    SenseidTechnologies.RAIN: 0,
+    SenseidTechnologies.BLE: 1,
+    SenseidTechnologies.NFC: 2,
+}
+_TECHNOLOGIES = {code: technology for technology, code in _TECHNOLOGY_CODES.items()}
+
+
+def _discard(tag: SenseidTag):
+    pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 attaching also registers the segment with this
+    # process's resource tracker, which would unlink it under the producer
+    # when the consumer exits.
+    segment = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class SenseidRingWriter:
+    """Producer side of a ring. Thread safe: readers of the same process
+    can share one writer, each identified by the index returned by
+    register_reader(); there must be a single writer process per ring.
+
+    It has the interface of a CaptureWriter, so any SenseidReader can
+    stream its raw reports with reader.start_capture(ring)."""
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 65536, slot_size: int = 128):
+        if slot_size % 8 or slot_size <= _SLOT_HEADER_SIZE:
+            raise ValueError(f'slot_size must be a multiple of 8 larger than {_SLOT_HEADER_SIZE}')
+        if capacity < 1:
+            raise ValueError('capacity must be >= 1')
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self.dropped = 0  # reports too large for a slot
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + capacity * slot_size)
+        self._buf = self._shm.buf
+        _HEADER.pack_into(self._buf, 0, MAGIC, FORMAT_VERSION, 0, slot_size, capacity)
+        self._head = 0
+        self._data_size = slot_size - _SLOT_HEADER_SIZE
+        self._reader_ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._attached = []
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def register_reader(self, reader_id: str) -> int:
+        with self._lock:
+            index = self._reader_ids.get(reader_id)
+            if index is None:
+                index = len(self._reader_ids)
+                if index >= MAX_READERS:
+                    raise ValueError(f'A ring holds at most {MAX_READERS} readers')
+                encoded = reader_id.encode()[:_READER_ID_SIZE - 1]
+                offset = _READER_IDS_OFFSET + index * _READER_ID_SIZE
+                self._buf[offset] = len(encoded)
+                self._buf[offset + 1:offset + 1 + len(encoded)] = encoded
+                self._buf[_READER_COUNT_OFFSET] = index + 1
+                self._reader_ids[reader_id] = index
+            return index
+
+    def append(self, reader_index: int, technology: SenseidTechnologies, epc: bytes | bytearray,
+               user_mem: Optional[bytes | bytearray] = None, antenna: int = 0, rssi_dbm: Optional[float] = None,
+               reader_timestamp: Optional[int] = None, host_time: Optional[float] = None) -> bool:
+        """Write one report; False if it does not fit in a slot."""
+        epc_length = len(epc)
+        user_mem_length = len(user_mem) if user_mem is not None else 0
+        if epc_length > 0xFF or epc_length + user_mem_length > self._data_size:
+            self.dropped += 1
+            logger.debug('Report too large for a %d byte ring slot: %d + %d bytes',
+                         self.slot_size, epc_length, user_mem_length)
+            return False
+        rssi = _NO_RSSI if rssi_dbm is None else max(min(int(round(rssi_dbm * 100)), 0x7FFF), -0x7FFF)
+        fields = (time.time() if host_time is None else host_time, reader_timestamp or 0, rssi, antenna & 0xFF,
+                  _TECHNOLOGY_CODES[technology], reader_index,
+                  epc_length, _NO_USER_MEM if user_mem is None else user_mem_length)
+        with self._lock:
+            buf = self._buf
+            position = self._head
+            offset = _HEADER_SIZE + (position % self.capacity) * self.slot_size
+            # Invalidate the slot first, then fill it, then publish it
+            _U64.pack_into(buf, offset, 0)
+            _SLOT.pack_into(buf, offset + _U64.size, *fields)
+            data = offset + _SLOT_HEADER_SIZE
+            buf[data:data + epc_length] = epc
+            if user_mem_length:
+                buf[data + epc_length:data + epc_length + user_mem_length] = user_mem
+            _U64.pack_into(buf, offset, position + 1)
+            self._head = position + 1
+            _U64.pack_into(buf, _HEAD_OFFSET, position + 1)
+        return True
+
+    def attach(self, reader, notification_callback: Optional[Callable[[SenseidTag], None]] = None,
+               reader_id: Optional[str] = None):
+        """Stream the raw reports of `reader` into the ring and start its
+        inventory. Without `notification_callback` the reader only captures
+        its reports, leaving the parsing to the consumers; with one it also
+        parses them and hands it the tags."""
+        reader.start_capture(self, reader_id=reader_id, capture_only=notification_callback is None)
+        reader.start_inventory_async(notification_callback or _discard)
+        self._attached.append(reader)
+
+    def detach(self, reader):
+        reader.stop_inventory_async()
+        reader.stop_capture()
+        if reader in self._attached:
+            self._attached.remove(reader)
+
+    def flush(self):
+        pass  # records are visible as soon as they are written
+
+    def close(self, unlink: bool = True):
+        """Mark the ring closed (consumers finish once they have read it
+        all) and release it; `unlink` removes the segment name."""
+        for reader in list(self._attached):
+            self.detach(reader)
+        if self._buf is None:
+            return
+        with self._lock:
+            self._buf[_CLOSED_OFFSET] = 1
+            self._buf = None
+        self._shm.close()
+        if unlink:
+            if os.name == 'posix':
+                # A consumer sharing our resource tracker may have dropped
+                # the registration unlink() expects
+                resource_tracker.register(self._shm._name, 'shared_memory')
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SenseidRingReader:
+    """Consumer side of a ring, attached by name. Starts at the newest
+    record, or at the oldest one still in the ring with from_start=True.
+    Not thread safe; use one reader per consumer thread."""
+
+    def __init__(self, name: str, from_start: bool = False):
+        self.name = name
+        self._shm = _attach(name)
+        self._buf = self._shm.buf
+        magic, version, _, slot_size, capacity = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{name} is not a SenseID ring')
+        if version > FORMAT_VERSION:
+            self.close()
+            raise ValueError(f'Unsupported ring version {version}')
+        self.slot_size = slot_size
+        self.capacity = capacity
+        self.dropped = 0  # records lost to overruns
+        head = self._read_head()
+        self._position = max(0, head - capacity) if from_start else head
+        self._reader_ids: List[Optional[str]] = []
+
+    def _read_head(self) -> int:
+        return _U64.unpack_from(self._buf, _HEAD_OFFSET)[0]
+
+    def _reader_id(self, index: int) -> Optional[str]:
+        reader_ids = self._reader_ids
+        if index >= len(reader_ids):
+            buf = self._buf
+            reader_ids.clear()
+            for i in range(min(buf[_READER_COUNT_OFFSET], MAX_READERS)):
+                offset = _READER_IDS_OFFSET + i * _READER_ID_SIZE
+                reader_ids.append(bytes(buf[offset + 1:offset + 1 + buf[offset]]).decode(errors='replace'))
+            if index >= len(reader_ids):
+                return None
+        return reader_ids[index]
+
+    @property
+    def lag(self) -> int:
+        """Records written and not read yet."""
+        return self._read_head() - self._position
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._buf[_CLOSED_OFFSET])
+
+    @property
+    def exhausted(self) -> bool:
+        """Closed by the writer and fully read."""
+        return self.closed and self._position >= self._read_head()
+
+    def read(self, max_records: int = 1024) -> List[CapturedReport]:
+        """Reports written since the last call, oldest first, at most
+        `max_records`. Never blocks."""
+        buf = self._buf
+        capacity = self.capacity
+        slot_size = self.slot_size
+        head = self._read_head()
+        position = self._position
+        if head - position > capacity:
+            self.dropped += head - capacity - position
+            position = head - capacity
+        end = min(head, position + max_records)
+        reports: List[CapturedReport] = []
+        append = reports.append
+        sequence_at = _U64.unpack_from
+        unpack = _SLOT.unpack_from
+        while position < end:
+            offset = _HEADER_SIZE + (position % capacity) * slot_size
+            expected = position + 1
+            position = expected
+            if sequence_at(buf, offset)[0] != expected:
+                self.dropped += 1
+                continue
+            (host_time, reader_timestamp, rssi, antenna, technology, reader_index,
+             epc_length, user_mem_length) = unpack(buf, offset + _U64.size)
+            data = offset + _SLOT_HEADER_SIZE
+            epc = bytes(buf[data:data + epc_length])
+            user_mem = None
+            if user_mem_length != _NO_USER_MEM:
+                user_mem = bytes(buf[data + epc_length:data + epc_length + user_mem_length])
+            if sequence_at(buf, offset)[0] != expected:
+                # Overwritten while we were copying it
+                self.dropped += 1
+                continue
+            append(CapturedReport(host_time, reader_timestamp, None if rssi == _NO_RSSI else rssi / 100, antenna,
+                                  _TECHNOLOGIES[technology], self._reader_id(reader_index), epc, user_mem))
+        self._position = position
+        return reports
+
+    def close(self):
+        if self._buf is not None:
+            self._buf = None
+            self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SenseidRingConsumer:
+    """Reads one or more rings from a thread and hands every tag to
+    `notification_callback(tag)`, like a SenseidReader would. Tags are
+    stamped with the time the producer received the report; reports that
+    cannot be parsed are counted in `parse_failures`. The thread ends when
+    every ring has been closed by its writer and read."""
+
+    def __init__(self, names: Iterable[str], notification_callback: Callable[[SenseidTag], None],
+                 from_start: bool = False, idle_sleep_s: float = 0.0005, batch_size: int = 1024):
+        self.notification_callback = notification_callback
+        self.idle_sleep_s = idle_sleep_s
+        self.batch_size = batch_size
+        self.reports_received = 0
+        self.parse_failures = 0
+        self._rings = [SenseidRingReader(name, from_start=from_start) for name in names]
+        self._stop_event = threading.Event()
+        self._finished = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dropped(self) -> int:
+        return sum(ring.dropped for ring in self._rings)
+
+    def poll(self) -> int:
+        """Deliver what is available in every ring once; returns the number
+        of reports read."""
+        callback = self.notification_callback
+        count = 0
+        for ring in self._rings:
+            reports = ring.read(self.batch_size)
+            count += len(reports)
+            for report in reports:
+                try:
+                    tag = parse_captured_report(report)
+                except Exception as e:
+                    tag = None
+                    logger.debug('Could not parse report %r: %s', report, e)
+                if tag is None:
+                    self.parse_failures += 1
+                    continue
+                tag.timestamp = datetime.fromtimestamp(report.host_time)
+                callback(tag)
+        self.reports_received += count
+        return count
+
+    def start(self):
+        if self._thread is None:
+            self._stop_event.clear()
+            self._finished.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name='senseid-ring-consumer')
+            self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                if self.poll():
+                    continue
+                if all(ring.exhausted for ring in self._rings):
+                    break
+                self._stop_event.wait(self.idle_sleep_s)
+        except Exception:
+            logger.exception('Ring consumer failed')
+        finally:
+            self._finished.set()
+
+    def wait_until_finished(self, timeout_s: Optional[float] = None) -> bool:
+        """Block until every ring is closed and read. Returns False on timeout."""
+        return self._finished.wait(timeout_s)
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        for ring in self._rings:
+            ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,327 @@
+"""Compact binary wire format for streams of decoded tags.
+
+A JSON tag repeats its name, description, URLs and unit strings on every
+reading. On the wire each distinct string is sent once per stream and
+each tag type (class, technology, strings, data layout) becomes a schema,
+so a reading is reduced to its schema id, tag id, serial numbers, a
+timestamp delta and its float32 values::
+
+    encoder = SenseidWireEncoder()
+    payload = encoder.encode_batch(tags)         # bytes to send
+    ...
+    decoder = SenseidWireDecoder()
+    tags = decoder.feed(payload)                 # any split of the stream
+
+Stream layout: magic b'SIDW' | u8 version, then frames. Integers are
+unsigned LEB128 varints; "str" is a string id + 1 (0 = None)::
+
+    0x00 reset  : clears strings, schemas and the timestamp base
+    0x01 string : varint length | UTF-8 (ids are assigned in order)
+    0x02 schema : varint class | u8 technology | str name | str description | str datasheet URL
+                  | str store URL | varint data count | count x (str magnitude | str magnitude short
+                  | str unit long | str unit short)           (ids are assigned in order)
+    0x03 tag    : varint schema | str id | varint fw_version + 1 (0 = None) | varint sn + 1 (0 = None)
+                  | u8 flags (bit 0: data, bit 1: timestamp) | [zigzag varint timestamp delta, us]
+                  | [data count x f32 value]
+
+Values are restored to the 6 significant digits a float32 holds.
+Timestamps are deltas from the previous tag of the stream and round-trip
+to the microsecond.
+"""
+import struct
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..parsers import SenseidData, SenseidTag, SenseidTechnologies
+from ..parsers.ble import SenseidBleTag
+from ..parsers.farsens import SenseidFarsensTag
+from ..parsers.rain import SenseidRainTag
+from ..parsers.senseread import SenseidSenseReadTag
+
+MAGIC = b'SIDW'
+FORMAT_VERSION = 1
+
+_FRAME_RESET = 0x00
+_FRAME_STRING = 0x01
+_FRAME_SCHEMA = 0x02
+_FRAME_TAG = 0x03
+
+_FLAG_DATA = 0x01
+_FLAG_TIMESTAMP = 0x02
+
+_TAG_CLASSES = (SenseidTag, SenseidRainTag, SenseidSenseReadTag, SenseidFarsensTag, SenseidBleTag)
+_TAG_CLASS_CODES = {cls: code for code, cls in enumerate(_TAG_CLASSES)}
+_TECHNOLOGY_CODES = {
+    SenseidTechnologies.RAIN: 0,
+    SenseidTechnologies.BLE: 1,
+    SenseidTechnologies.NFC: 2,
+}
+_TECHNOLOGIES = {code: technology for technology, code in _TECHNOLOGY_CODES.items()}
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SenseidWireError(Exception):
+    pass
+
+
+class _Incomplete(Exception):
+    """The buffer ends in the middle of a frame."""
+
+
+def _varint(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) if value >= 0 else ((-value << 1) - 1)
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+
+def _timestamp_us(timestamp: datetime) -> int:
+    # Naive datetimes (what the parsers produce) are local time; the delta
+    # encoding only needs a consistent origin.
+    delta = timestamp.replace(tzinfo=None) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class SenseidWireEncoder:
+    """Encodes tags into one wire stream. Strings and schemas are sent the
+    first time a tag needs them; after `max_strings` distinct strings (tag
+    ids included) the dictionaries are reset to bound memory on both ends."""
+
+    def __init__(self, max_strings: int = 65536):
+        self.max_strings = max_strings
+        self._strings: Dict[str, int] = {}
+        self._schemas: Dict[tuple, Tuple[int, int]] = {}  # key -> (id, data count)
+        self._last_us = 0
+        self._started = False
+
+    def reset(self) -> bytes:
+        """Frame clearing both dictionaries; the next tags resend them."""
+        self._strings.clear()
+        self._schemas.clear()
+        self._last_us = 0
+        return bytes((_FRAME_RESET,))
+
+    def _string(self, value: Optional[str], out: bytearray) -> int:
+        if value is None:
+            return 0
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = len(self._strings)
+            encoded = value.encode()
+            out.append(_FRAME_STRING)
+            out += _varint(len(encoded))
+            out += encoded
+        return string_id + 1
+
+    def _schema(self, tag: SenseidTag, out: bytearray) -> Tuple[int, int]:
+        data = tag.data
+        layout = tuple((d.magnitude, d.magnitude_short, d.unit_long, d.unit_short) for d in data) if data else ()
+        key = (type(tag), tag.technology, tag.name, tag.description, tag.datasheet_url, tag.store_url, layout)
+        schema = self._schemas.get(key)
+        if schema is not None:
+            return schema
+        class_code = _TAG_CLASS_CODES.get(type(tag))
+        if class_code is None:
+            class_code = next(code for code, cls in enumerate(_TAG_CLASSES) if isinstance(tag, cls))
+        refs = [self._string(tag.name, out), self._string(tag.description, out),
+                self._string(tag.datasheet_url, out), self._string(tag.store_url, out), len(layout)]
+        for strings in layout:
+            refs.extend(self._string(s, out) for s in strings)
+        out.append(_FRAME_SCHEMA)
+        out += _varint(class_code)
+        out.append(_TECHNOLOGY_CODES[tag.technology])
+        for ref in refs:
+            out += _varint(ref)
+        schema = self._schemas[key] = (len(self._schemas), len(layout))
+        return schema
+
+    def encode(self, tag: SenseidTag) -> bytes:
+        out = bytearray()
+        self._encode_into(tag, out)
+        return bytes(out)
+
+    def encode_batch(self, tags: Iterable[SenseidTag]) -> bytes:
+        out = bytearray()
+        for tag in tags:
+            self._encode_into(tag, out)
+        return bytes(out)
+
+    def _encode_into(self, tag: SenseidTag, out: bytearray):
+        if not self._started:
+            out += MAGIC
+            out.append(FORMAT_VERSION)
+            self._started = True
+        if len(self._strings) >= self.max_strings:
+            out += self.reset()
+        schema_id, data_count = self._schema(tag, out)
+        id_ref = self._string(tag.id, out)
+        out.append(_FRAME_TAG)
+        out += _varint(schema_id)
+        out += _varint(id_ref)
+        out += _varint(0 if tag.fw_version is None else tag.fw_version + 1)
+        out += _varint(0 if tag.sn is None else tag.sn + 1)
+        flags = 0
+        if tag.data is not None:
+            flags |= _FLAG_DATA
+        if tag.timestamp is not None:
+            flags |= _FLAG_TIMESTAMP
+        out.append(flags)
+        if tag.timestamp is not None:
+            timestamp_us = _timestamp_us(tag.timestamp)
+            out += _varint(_zigzag(timestamp_us - self._last_us))
+            self._last_us = timestamp_us
+        if tag.data is not None:
+            out += struct.pack(f'<{data_count}f', *(d.value for d in tag.data))
+
+
+class SenseidWireDecoder:
+    """Decodes a wire stream back into SenseidTag objects. feed() accepts
+    the stream in chunks of any size and keeps incomplete frames for the
+    next call."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._strings: List[str] = []
+        self._schemas: List[tuple] = []
+        self._last_us = 0
+        self._started = False
+
+    def feed(self, data: bytes | bytearray | memoryview) -> List[SenseidTag]:
+        buffer = self._buffer
+        buffer += data
+        tags: List[SenseidTag] = []
+        position = 0
+        if not self._started:
+            if len(buffer) < len(MAGIC) + 1:
+                return tags
+            if buffer[:len(MAGIC)] != MAGIC:
+                raise SenseidWireError('Not a SenseID wire stream')
+            if buffer[len(MAGIC)] > FORMAT_VERSION:
+                raise SenseidWireError(f'Unsupported wire format version {buffer[len(MAGIC)]}')
+            position = len(MAGIC) + 1
+            self._started = True
+        try:
+            while position < len(buffer):
+                position = self._frame(buffer, position, tags)
+        except _Incomplete:
+            pass
+        del buffer[:position]
+        return tags
+
+    def _frame(self, buffer: bytearray, position: int, tags: List[SenseidTag]) -> int:
+        """Decode the frame at `position`; state only changes once the
+        whole frame is in the buffer."""
+        kind = buffer[position]
+        position += 1
+        if kind == _FRAME_TAG:
+            schema_id, position = self._read_varint(buffer, position)
+            id_ref, position = self._read_varint(buffer, position)
+            fw_version, position = self._read_varint(buffer, position)
+            sn, position = self._read_varint(buffer, position)
+            if position >= len(buffer):
+                raise _Incomplete
+            flags = buffer[position]
+            position += 1
+            timestamp_us = None
+            if flags & _FLAG_TIMESTAMP:
+                delta, position = self._read_varint(buffer, position)
+                timestamp_us = self._last_us + _unzigzag(delta)
+            try:
+                cls, technology, name, description, datasheet_url, store_url, layout = self._schemas[schema_id]
+            except IndexError:
+                raise SenseidWireError(f'Unknown schema {schema_id}') from None
+            data = None
+            if flags & _FLAG_DATA:
+                end = position + 4 * len(layout)
+                if end > len(buffer):
+                    raise _Incomplete
+                values = struct.unpack_from(f'<{len(layout)}f', buffer, position)
+                position = end
+                data = [SenseidData(*strings, float('%.6g' % value)) for strings, value in zip(layout, values)]
+            tag = cls.__new__(cls)
+            tag.technology = technology
+            tag.fw_version = fw_version - 1 if fw_version else None
+            tag.sn = sn - 1 if sn else None
+            tag.id = self._lookup(id_ref)
+            tag.name = name
+            tag.description = description
+            tag.datasheet_url = datasheet_url
+            tag.store_url = store_url
+            tag.data = data
+            tag.timestamp = None
+            if timestamp_us is not None:
+                self._last_us = timestamp_us
+                tag.timestamp = _EPOCH + timedelta(microseconds=timestamp_us)
+            tags.append(tag)
+        elif kind == _FRAME_STRING:
+            length, position = self._read_varint(buffer, position)
+            end = position + length
+            if end > len(buffer):
+                raise _Incomplete
+            self._strings.append(bytes(buffer[position:end]).decode())
+            position = end
+        elif kind == _FRAME_SCHEMA:
+            class_code, position = self._read_varint(buffer, position)
+            if position >= len(buffer):
+                raise _Incomplete
+            technology = buffer[position]
+            position += 1
+            refs = []
+            for _ in range(5):
+                ref, position = self._read_varint(buffer, position)
+                refs.append(ref)
+            data_count = refs.pop()
+            layout = []
+            for _ in range(data_count):
+                strings = []
+                for _ in range(4):
+                    ref, position = self._read_varint(buffer, position)
+                    strings.append(self._lookup(ref))
+                layout.append(tuple(strings))
+            try:
+                cls = _TAG_CLASSES[class_code]
+                technology = _TECHNOLOGIES[technology]
+            except (IndexError, KeyError):
+                raise SenseidWireError(f'Invalid schema: class {class_code}, technology {technology}') from None
+            self._schemas.append((cls, technology, *(self._lookup(ref) for ref in refs), tuple(layout)))
+        elif kind == _FRAME_RESET:
+            self._strings.clear()
+            self._schemas.clear()
+            self._last_us = 0
+        else:
+            raise SenseidWireError(f'Unknown frame type 0x{kind:02X}')
+        return position
+
+    @staticmethod
+    def _read_varint(buffer: bytearray, position: int) -> Tuple[int, int]:
+        result = 0
+        shift = 0
+        while True:
+            if position >= len(buffer):
+                raise _Incomplete
+            byte = buffer[position]
+            position += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result, position
+            shift += 7
+
+    def _lookup(self, ref: int) -> Optional[str]:
+        if not ref:
+            return None
+        try:
+            return self._strings[ref - 1]
+        except IndexError:
+            raise SenseidWireError(f'Unknown string {ref - 1}') from None
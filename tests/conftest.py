@@ -0,0 +1,15 @@
+import pytest
+
+from senseid.parsers.ble import SenseidBleTag
+from senseid.parsers.dispatch import parse_rain_report
+
+from .samples import ble_beacons, farsens_reports, plain_epcs, rain_epcs, senseread_reports
+
+
+@pytest.fixture(scope='session')
+def sample_tags():
+    """Parsed tags of every family, with and without sensor data."""
+    tags = [parse_rain_report(epc) for epc in rain_epcs(40) + plain_epcs(5)]
+    tags += [parse_rain_report(epc, user_mem) for epc, user_mem in senseread_reports(20) + farsens_reports(20)]
+    tags += [SenseidBleTag(bytearray.fromhex(beacon)) for beacon in ble_beacons(10)]
+    return tags
@@ -0,0 +1,36 @@
+"""Sample reports for the unit tests, drawn from the synthetic tag
+population (every member is a distinct tag)."""
+from typing import List, Tuple
+
+from senseid.simulation.population import SenseidTagFamily, SenseidTagPopulation
+
+
+def _reports(family: SenseidTagFamily, n: int, seed: int):
+    return SenseidTagPopulation(size=n, mix={family: 1.0}, seed=seed).current()
+
+
+def rain_epcs(n: int, seed: int = 1) -> List[str]:
+    """SenseID EPCs with sensor data in the EPC."""
+    return [report.data.hex().upper() for report in _reports(SenseidTagFamily.RAIN, n, seed)]
+
+
+def plain_epcs(n: int, seed: int = 2) -> List[str]:
+    """Plain (non SenseID) RAIN EPCs."""
+    return [report.data.hex().upper() for report in _reports(SenseidTagFamily.RAIN_ID, n, seed)]
+
+
+def senseread_reports(n: int, seed: int = 3) -> List[Tuple[str, str]]:
+    """(EPC, User-memory) pairs of senseRead tags."""
+    return [(report.data.hex().upper(), report.user_mem.hex().upper())
+            for report in _reports(SenseidTagFamily.SENSEREAD, n, seed)]
+
+
+def farsens_reports(n: int, seed: int = 4) -> List[Tuple[str, str]]:
+    """(EPC, User-memory) pairs of Farsens tags."""
+    return [(report.data.hex().upper(), report.user_mem.hex().upper())
+            for report in _reports(SenseidTagFamily.FARSENS, n, seed)]
+
+
+def ble_beacons(n: int, seed: int = 5) -> List[str]:
+    """SenseID BLE advertisements."""
+    return [report.data.hex().upper() for report in _reports(SenseidTagFamily.BLE, n, seed)]
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.sinks.arrow import FORMAT_ARROW, FORMAT_PARQUET, SenseidArrowSink
+
+from .samples import plain_epcs, rain_epcs
+
+pa = pytest.importorskip('pyarrow')
+
+
+def _read(path, file_format):
+    if file_format == FORMAT_PARQUET:
+        import pyarrow.parquet as pq
+        return pq.read_table(path)
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+@pytest.mark.parametrize('file_format', [FORMAT_PARQUET, FORMAT_ARROW])
+def test_round_trip(tmp_path, file_format):
+    tags = [parse_rain_report(epc) for epc in rain_epcs(30) + plain_epcs(10)]
+    with SenseidArrowSink(str(tmp_path), reader='dock-1', file_format=file_format) as sink:
+        for tag in tags:
+            sink(tag)
+    assert [os.path.basename(path) for path in sink.files_written] == sorted(os.listdir(tmp_path))
+    table = pa.concat_tables([_read(path, file_format) for path in sink.files_written], promote_options='default')
+    assert table.num_rows == len(tags) == sink.rows_written
+    rows = sorted(table.to_pylist(), key=lambda row: row['id'])
+    for tag, row in zip(sorted(tags, key=lambda tag: tag.id), rows):
+        assert (row['reader'], row['id'], row['type'], row['sn']) == ('dock-1', tag.id, tag.name, tag.sn)
+        for data in tag.data or []:
+            name = f'{data.magnitude} ({data.unit_short})' if data.unit_short else data.magnitude
+            assert row[name] == pytest.approx(data.value)
+
+
+def test_sinks_sharing_a_directory_do_not_overwrite_each_other(tmp_path):
+    tag = parse_rain_report(rain_epcs(1)[0])
+    sinks = [SenseidArrowSink(str(tmp_path)) for _ in range(2)]
+    for sink in sinks:
+        sink(tag)
+        sink.close()
+    paths = [path for sink in sinks for path in sink.files_written]
+    assert len(set(paths)) == 2
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in paths)
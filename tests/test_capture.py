@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+import pytest
+
+from senseid.parsers import SenseidTechnologies
+from senseid.readers.capture import CaptureFile, CaptureWriter
+from senseid.readers.replay import SenseidReplayReader
+from senseid.readers.simulated import SenseidSimulatedReader
+
+
+def test_open_while_writing(tmp_path):
+    path = str(tmp_path / 'live.sidcap')
+    with CaptureWriter(path, flush_interval_s=0.1) as writer:
+        with CaptureFile(path) as capture:
+            assert list(capture) == []
+        index = writer.register_reader('reader-1')
+        writer.append(index, SenseidTechnologies.RAIN, b'\xE2\x80\x11\x70')
+        # No further records: the background thread must flush the block
+        time.sleep(0.5)
+        with CaptureFile(path) as capture:
+            reports = list(capture)
+        assert [r.epc for r in reports] == [b'\xE2\x80\x11\x70']
+        assert reports[0].reader_id == 'reader-1'
+
+
+def _capture_simulated(path, n=200, **kwargs):
+    reader = SenseidSimulatedReader()
+    reader.connect('SIMULATED?tags=20&seed=5')
+    tags = []
+    done = threading.Event()
+
+    def on_tag(tag):
+        if len(tags) < n:
+            tags.append(tag)
+            if len(tags) == n:
+                done.set()
+
+    reader.start_capture(path, **kwargs)
+    reader.start_inventory_async(on_tag)
+    assert done.wait(10)
+    reader.stop_inventory_async()
+    reader.stop_capture()
+    reader.disconnect()
+    return tags
+
+
+def _replay(path):
+    replay = SenseidReplayReader()
+    assert replay.connect(f'{path}?speed=max')
+    tags = []
+    replay.start_inventory_async(tags.append)
+    assert replay.wait_until_finished(10)
+    replay.disconnect()
+    return tags
+
+
+def test_replay_delivers_the_captured_tags(tmp_path):
+    path = str(tmp_path / 'inventory.sidcap')
+    live = _capture_simulated(path)
+    replayed = _replay(path)
+    # The capture goes on until the inventory stops: it holds at least the
+    # tags seen live, in the same order
+    assert [t.id for t in replayed[:len(live)]] == [t.id for t in live]
+    assert [t.data and [d.value for d in t.data] for t in replayed[:len(live)]] == \
+           [t.data and [d.value for d in t.data] for t in live]
+
+
+def test_compressed_capture(tmp_path):
+    pytest.importorskip('zstandard')
+    path = str(tmp_path / 'inventory.sidcap')
+    live = _capture_simulated(path, compress=True)
+    assert [t.id for t in _replay(path)[:len(live)]] == [t.id for t in live]
+
+
+def test_truncated_capture_ends_at_the_last_whole_block(tmp_path):
+    path = str(tmp_path / 'truncated.sidcap')
+    with CaptureWriter(path, block_size=64) as writer:
+        index = writer.register_reader('reader-1')
+        for n in range(20):
+            writer.append(index, SenseidTechnologies.RAIN, n.to_bytes(12, 'big'))
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 5)
+    with CaptureFile(path) as capture:
+        epcs = [r.epc for r in capture]
+    assert 0 < len(epcs) < 20
+    assert epcs == [n.to_bytes(12, 'big') for n in range(len(epcs))]
+
+
+def test_replay_stop_from_notification_callback(tmp_path):
+    path = str(tmp_path / 'inventory.sidcap')
+    _capture_simulated(path, n=20)
+    replay = SenseidReplayReader()
+    assert replay.connect(f'{path}?speed=max')
+    errors = []
+    stopped = threading.Event()
+
+    def on_tag(tag):
+        start = time.monotonic()
+        replay.stop_inventory_async()
+        assert time.monotonic() - start < 0.5
+        stopped.set()
+
+    try:
+        replay.start_inventory_async(on_tag, errors.append)
+        assert stopped.wait(5)
+        assert replay.wait_until_finished(5)
+        assert replay._thread is None
+        assert errors == []
+    finally:
+        replay.disconnect()
@@ -0,0 +1,15 @@
+import pytest
+
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.parsers.rain import SenseidRainTag
+
+
+def test_plain_rain_id():
+    tag = parse_rain_report('E28011700000000000000001')
+    assert isinstance(tag, SenseidRainTag)
+
+
+@pytest.mark.parametrize('epc', ['not hex', 'E2801', 42])
+def test_malformed_epc_raises_type_error(epc):
+    with pytest.raises(TypeError):
+        parse_rain_report(epc)
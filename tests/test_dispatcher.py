@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import defaultdict
+
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.readers.dispatcher import SenseidOrderedDispatcher, SenseidOverflowPolicy
+
+from .samples import rain_epcs
+
+
+def _tags(n):
+    return [parse_rain_report(epc) for epc in rain_epcs(n)]
+
+
+def test_order_is_kept_per_tag_id():
+    tags = _tags(20) * 10
+    seen = defaultdict(list)
+    with SenseidOrderedDispatcher(lambda tag: seen[tag.id].append(tag), workers=4) as dispatcher:
+        for tag in tags:
+            dispatcher(tag)
+        assert dispatcher.drain(10)
+    expected = defaultdict(list)
+    for tag in tags:
+        expected[tag.id].append(tag)
+    assert {tag_id: [id(t) for t in ts] for tag_id, ts in seen.items()} == \
+           {tag_id: [id(t) for t in ts] for tag_id, ts in expected.items()}
+
+
+def test_drop_newest_bounds_queue_including_batch():
+    release = threading.Event()
+    dispatcher = SenseidOrderedDispatcher(lambda tag: release.wait(10), workers=1, max_queue=10, batch_size=4,
+                                          overflow=SenseidOverflowPolicy.DROP_NEWEST)
+    tags = _tags(30)
+    try:
+        for tag in tags[:4]:
+            dispatcher(tag)
+        while dispatcher._shards[0].queue:  # the worker takes them as one batch
+            time.sleep(0.001)
+        for tag in tags[4:]:
+            dispatcher(tag)
+            assert dispatcher.queue_depth <= 10
+        stats = dispatcher.get_stats()
+        assert stats.tags_queued + stats.tags_dropped == 30
+        assert stats.tags_queued <= 10
+    finally:
+        release.set()
+        dispatcher.close()
+    assert dispatcher.get_stats().tags_delivered == dispatcher.get_stats().tags_queued
+
+
+def test_drop_oldest_keeps_latest_tags():
+    release = threading.Event()
+    delivered = []
+
+    def callback(tag):
+        release.wait(10)
+        delivered.append(tag)
+
+    tags = _tags(30)
+    dispatcher = SenseidOrderedDispatcher(callback, workers=1, max_queue=10, batch_size=1,
+                                          overflow=SenseidOverflowPolicy.DROP_OLDEST)
+    dispatcher(tags[0])
+    while dispatcher._shards[0].queue:  # let the worker take it
+        time.sleep(0.001)
+    for tag in tags[1:]:
+        dispatcher(tag)
+    release.set()
+    dispatcher.close()
+    # The tag the worker was running, then the most recent ones that fit
+    assert delivered[-9:] == tags[-9:]
+    assert dispatcher.get_stats().tags_dropped == 30 - len(delivered)
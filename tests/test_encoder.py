@@ -0,0 +1,45 @@
+import pytest
+
+from senseid.parsers.ble import SenseidBleTag
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.parsers.encoder import encode_rain_epc
+from senseid.parsers.nfc import parse_nfc_ndef
+from senseid.simulation.population import SenseidTagFamily, SenseidTagPopulation, _DEFINITIONS
+
+_FAMILIES = (SenseidTagFamily.RAIN, SenseidTagFamily.SENSEREAD, SenseidTagFamily.FARSENS, SenseidTagFamily.BLE,
+             SenseidTagFamily.NFC)
+
+
+def _parse(report):
+    if report.family == SenseidTagFamily.BLE:
+        return SenseidBleTag(report.data)
+    if report.family == SenseidTagFamily.NFC:
+        return parse_nfc_ndef(report.data)[0]
+    return parse_rain_report(report.data, report.user_mem)
+
+
+def _resolution(data_def) -> float:
+    """Smallest step the raw field can represent, in engineering units."""
+    transform = data_def.transform.value
+    if transform == 'linear':
+        return abs(data_def.coefficients[1])
+    if transform == 'none':
+        return 1.0
+    return 0.0
+
+
+@pytest.mark.parametrize('family,type_id', [(family, type_id) for family in _FAMILIES
+                                            for type_id in _DEFINITIONS[family].types])
+def test_encoded_values_parse_back(family, type_id):
+    population = SenseidTagPopulation(size=5, mix={(family, type_id): 1.0}, seed=3)
+    for member in population._members:
+        tag = _parse(member.report)
+        assert tag is not None and tag.data is not None
+        assert [d.value for d in tag.data] == pytest.approx(
+            member.values, rel=1e-2, abs=max((_resolution(d) for d in member.data_defs), default=0.0))
+
+
+def test_unknown_type_is_rejected():
+    unknown = next(t for t in range(0x100) if t not in _DEFINITIONS[SenseidTagFamily.RAIN].types)
+    with pytest.raises(ValueError):
+        encode_rain_epc(unknown, 1, [])
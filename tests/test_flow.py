@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from senseid.readers.dispatcher import SenseidOrderedDispatcher
+from senseid.readers.flow import SenseidFlowControlEventType
+from senseid.readers.simulated import SenseidSimulatedReader
+
+PAUSE, RESUME = SenseidFlowControlEventType.PAUSE, SenseidFlowControlEventType.RESUME
+
+
+def _wait_for(condition, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def reader():
+    reader = SenseidSimulatedReader()
+    reader.connect('SIMULATED?tags=50&seed=1')
+    yield reader
+    reader.set_flow_control(None)
+    reader.stop_inventory_async()
+    reader.disconnect()
+
+
+def test_pause_and_resume_on_watermarks(reader):
+    backlog = [0]
+    events = []
+    reader.start_inventory_async(lambda tag: None)
+    reader.set_flow_control(100, 10, backlog=lambda: backlog[0], check_interval_s=0.01, on_event=events.append)
+    backlog[0] = 150
+    assert _wait_for(lambda: events)
+    assert events[0].kind is PAUSE and events[0].backlog == 150
+    assert not reader._inventory_running
+    backlog[0] = 50  # between the watermarks: stays paused
+    time.sleep(0.1)
+    assert len(events) == 1
+    backlog[0] = 5
+    assert _wait_for(lambda: len(events) == 2)
+    assert events[1].kind is RESUME and events[1].paused_s > 0
+    assert reader._inventory_running
+    stats = reader.get_stats()
+    assert stats.flow_control_pauses == 1
+    assert stats.flow_control_paused_s >= events[1].paused_s
+
+
+def test_max_pause_resumes_whatever_the_backlog(reader):
+    events = []
+    reader.start_inventory_async(lambda tag: None)
+    reader.set_flow_control(10, backlog=lambda: 1000, check_interval_s=0.01, max_pause_s=0.05,
+                            on_event=events.append)
+    assert _wait_for(lambda: len(events) >= 2)
+    assert [e.kind for e in events[:2]] == [PAUSE, RESUME]
+
+
+def test_application_stop_wins_over_resume(reader):
+    backlog = [1000]
+    events = []
+    reader.start_inventory_async(lambda tag: None)
+    reader.set_flow_control(10, backlog=lambda: backlog[0], check_interval_s=0.01, on_event=events.append)
+    assert _wait_for(lambda: events)
+    reader.stop_inventory_async()
+    backlog[0] = 0
+    assert _wait_for(lambda: len(events) == 2)
+    time.sleep(0.05)
+    assert not reader._inventory_running
+
+
+def test_dispatcher_backlog_pauses_the_inventory(reader):
+    release = threading.Event()
+    events = []
+    dispatcher = SenseidOrderedDispatcher(lambda tag: release.wait(10), workers=1, max_queue=100000)
+    try:
+        reader.start_inventory_async(dispatcher)
+        reader.set_flow_control(200, 0, check_interval_s=0.01, on_event=events.append)
+        assert _wait_for(lambda: events)
+        assert events[0].kind is PAUSE and events[0].backlog >= 200
+        release.set()
+        assert _wait_for(lambda: len(events) == 2)
+        assert events[1].kind is RESUME
+    finally:
+        release.set()
+        reader.stop_inventory_async()
+        dispatcher.close()
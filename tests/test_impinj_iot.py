@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('impinj_iot')
+
+from senseid.readers.impinj_iot import (IMPINJ_IOT_CAPABILITIES_CACHE, SenseidImpinjIot, _PRESETS_SCHEMA_PATH,
+                                        _SYSTEM_IMAGE_PATH)
+
+
+class _FakeDriver:
+    def get_reader_info(self):
+        return SimpleNamespace(model='R700', region='ETSI', firmware_version='1.4', antenna_count=4,
+                               min_tx_power_cdbm=1000, max_tx_power_cdbm=3300, serial_number='37021160000')
+
+
+class _FakeRest:
+    def __init__(self):
+        self.requests = []
+
+    def get_json(self, path):
+        self.requests.append([path])
+        return None
+
+    def get_json_many(self, paths):
+        self.requests.append(list(paths))
+        return [{'primaryFirmware': '8.4.1+git'} if path == _SYSTEM_IMAGE_PATH else None for path in paths]
+
+
+@pytest.fixture
+def reader():
+    reader = SenseidImpinjIot()
+    reader.driver = _FakeDriver()
+    reader._rest = _FakeRest()
+    IMPINJ_IOT_CAPABILITIES_CACHE.clear()
+    yield reader
+    IMPINJ_IOT_CAPABILITIES_CACHE.clear()
+
+
+def test_cold_cache_fetches_image_and_schema_together(reader):
+    details = reader.get_details()
+    assert details.firmware_version == '8.4.1'
+    assert details.antenna_count == 4
+    assert reader._rest.requests == [[_SYSTEM_IMAGE_PATH, _PRESETS_SCHEMA_PATH]]
+
+
+def test_warm_cache_skips_schema(reader):
+    IMPINJ_IOT_CAPABILITIES_CACHE.put('R700', '8.4.1+git', {'antenna_count': 2})
+    reader._rest.get_json = lambda path: reader._rest.requests.append([path]) or {'primaryFirmware': '8.4.1+git'}
+    assert reader.get_details().antenna_count == 2
+    assert reader._rest.requests == [[_SYSTEM_IMAGE_PATH]]
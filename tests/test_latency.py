@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.readers.latency import (STAGE_CALLBACK, STAGE_PARSE, STAGE_READER, STAGE_TOTAL, LatencyHistogram,
+                                     SenseidLatencyRecorder, _bucket_index, _bucket_range)
+from senseid.readers.simulated import SenseidSimulatedReader
+
+from .samples import rain_epcs, senseread_reports
+
+RESOLUTION = 1 / 64  # relative width of a bucket above the exact range
+
+
+def test_buckets_cover_their_values():
+    rng = random.Random(1)
+    values = list(range(300)) + [rng.randrange(1 << 40) for _ in range(2000)] + [(1 << 40) - 1]
+    for value in values:
+        low, high = _bucket_range(_bucket_index(value))
+        assert low <= value <= high
+        if value >= 128:
+            assert high - low + 1 <= value * RESOLUTION
+    assert _bucket_range(_bucket_index(127)) == (127, 127)
+
+
+def test_percentiles_within_the_bucket_resolution():
+    histogram = LatencyHistogram()
+    durations = [n / 1000 for n in range(1, 1001)]  # 1 ms .. 1 s
+    random.Random(2).shuffle(durations)
+    for seconds in durations:
+        histogram.record(seconds)
+    for p, expected in zip([50, 90, 99, 99.9, 100], histogram.percentiles([50, 90, 99, 99.9, 100])):
+        assert expected == pytest.approx(p / 100, rel=RESOLUTION)
+    assert histogram.percentile(0) == pytest.approx(0.001, rel=RESOLUTION)
+    assert (histogram.count, histogram.max_s) == (1000, 1.0)
+    assert histogram.mean_s == pytest.approx(0.5005)
+
+
+def test_exact_below_128_us():
+    histogram = LatencyHistogram()
+    for us in (3, 3, 3, 50):
+        histogram.record(us / 1e6)
+    assert histogram.percentiles([50, 75, 100]) == pytest.approx([3e-6, 3e-6, 50e-6])
+    assert LatencyHistogram().percentile(50) is None
+
+
+def test_merge_and_reset():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for _ in range(99):
+        first.record(0.001)
+    second.record(0.5)
+    first.merge(second)
+    assert first.count == 100 and first.max_s == 0.5
+    assert first.percentile(50) == pytest.approx(0.001, rel=RESOLUTION)
+    assert first.percentile(100) == pytest.approx(0.5, rel=RESOLUTION)
+    first.reset()
+    assert first.count == 0 and first.percentile(50) is None
+
+
+def test_stages_per_family():
+    recorder = SenseidLatencyRecorder()
+    recorder.record('RAIN', 10.0, 10.001, 10.003, reader_lag_s=0.02)
+    recorder.record('SENSEREAD', 10.0, 10.002, 10.010)
+    assert sorted(recorder.families()) == ['RAIN', 'SENSEREAD']
+    rain = recorder.summary()['RAIN']
+    assert rain[STAGE_PARSE]['p50_s'] == pytest.approx(0.001, rel=RESOLUTION)
+    assert rain[STAGE_CALLBACK]['p50_s'] == pytest.approx(0.002, rel=RESOLUTION)
+    assert rain[STAGE_TOTAL]['p50_s'] == pytest.approx(0.003, rel=RESOLUTION)
+    assert rain[STAGE_READER]['p50_s'] == pytest.approx(0.02, rel=RESOLUTION)
+    assert recorder.histogram(STAGE_READER, 'SENSEREAD').count == 0
+    assert recorder.histogram(STAGE_TOTAL).count == 2
+    assert recorder.histogram(STAGE_TOTAL).max_s == pytest.approx(0.010)
+    with pytest.raises(ValueError):
+        recorder.histogram('queue')
+
+
+def test_reader_records_each_delivery():
+    reader = SenseidSimulatedReader()
+    rain = [parse_rain_report(epc) for epc in rain_epcs(3)]
+    senseread = [parse_rain_report(epc, user_mem) for epc, user_mem in senseread_reports(2)]
+    for tag in rain + senseread:
+        reader._deliver_tag(lambda tag: None, tag, 0.0, None, 0.01)
+    reader._notify(lambda tag: None, rain[0])
+    latency = reader.get_latency()
+    assert latency.histogram(STAGE_TOTAL, 'RAIN').count == 4
+    assert latency.histogram(STAGE_TOTAL, 'SENSEREAD').count == 2
+    assert latency.histogram(STAGE_READER).count == 5  # _notify() has no reader stamp
+    reader.reset_latency()
+    assert latency.histogram(STAGE_TOTAL).count == 0
@@ -0,0 +1,19 @@
+import gc
+import re
+
+from senseid.readers.metrics import render_metrics
+from senseid.readers.simulated import SenseidSimulatedReader
+
+
+def _labels(text):
+    return re.findall(r'senseid_reader_reports_received_total\{reader="([^"]+)"', text)
+
+
+def test_duplicate_labels_are_stable():
+    readers = [SenseidSimulatedReader() for _ in range(3)]
+    first = _labels(render_metrics(readers))
+    assert len(set(first)) == 3
+    del readers[0]
+    gc.collect()
+    assert _labels(render_metrics(readers)) == first[1:]
+    assert _labels(render_metrics(list(reversed(readers)))) == list(reversed(first[1:]))
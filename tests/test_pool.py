@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from senseid.parsers import SenseidTechnologies
+from senseid.parsers.pool import SenseidParsePool
+
+from .samples import rain_epcs
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with SenseidParsePool(workers=2, batch_size=8) as pool:
+        yield pool
+
+
+def test_results_in_submission_order(pool):
+    epcs = rain_epcs(50)
+    delivered = []
+    stream = pool.open_stream(lambda tags, contexts: delivered.extend(zip(tags, contexts)))
+    for i, epc in enumerate(epcs):
+        stream.submit(SenseidTechnologies.RAIN, epc, context=i)
+    assert stream.wait(10)
+    stream.close()
+    assert [context for _, context in delivered] == list(range(len(epcs)))
+    assert all(tag is not None for tag, _ in delivered)
+
+
+def test_tags_are_stamped_at_submit():
+    delivered = []
+    with SenseidParsePool(workers=1, batch_size=4, max_delay_s=10) as pool:
+        stream = pool.open_stream(lambda tags, contexts: delivered.extend(tags))
+        for epc in rain_epcs(4):  # one batch
+            stream.submit(SenseidTechnologies.RAIN, epc)
+            time.sleep(0.01)
+        assert stream.wait(10)
+    timestamps = [tag.timestamp for tag in delivered]
+    assert timestamps == sorted(timestamps)
+    assert len(set(timestamps)) == len(timestamps)
+
+
+def test_oversized_report_is_rejected(pool):
+    stream = pool.open_stream(lambda tags, contexts: None)
+    with pytest.raises(ValueError):
+        stream.submit(SenseidTechnologies.RAIN, bytes(256))
+    with pytest.raises(ValueError):
+        stream.submit(SenseidTechnologies.RAIN, bytes(12), bytes(0xFFFF))
+    assert stream.pending_reports == 0
+    stream.close()
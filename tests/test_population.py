@@ -0,0 +1,31 @@
+import math
+
+import pytest
+
+from senseid.simulation.population import DEFAULT_MIX, SenseidTagFamily, SenseidTagPopulation, _DEFINITIONS
+
+
+def _all_types():
+    for family in DEFAULT_MIX:
+        if family == SenseidTagFamily.RAIN_ID:
+            continue
+        for type_id in _DEFINITIONS[family].types:
+            yield family, type_id
+
+
+@pytest.mark.parametrize('family,type_id', list(_all_types()))
+def test_generated_values_are_finite(family, type_id):
+    population = SenseidTagPopulation(size=20, mix={(family, type_id): 1.0}, update_ratio=1.0, seed=1)
+    population.reports(200)  # random-walk every member a few times
+    for member in population._members:
+        for (lo, hi), value in zip(member.ranges, member.values):
+            assert math.isfinite(lo) and math.isfinite(hi)
+            assert math.isfinite(value)
+
+
+def test_farsens_resistance_and_capacitance_ranges():
+    for type_id in (0x03, 0x0E):
+        if type_id not in _DEFINITIONS[SenseidTagFamily.FARSENS].types:
+            continue
+        population = SenseidTagPopulation(size=5, mix={(SenseidTagFamily.FARSENS, type_id): 1.0}, seed=2)
+        assert all(math.isfinite(v) for m in population._members for v in m.values)
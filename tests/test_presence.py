@@ -0,0 +1,109 @@
+import pytest
+
+from senseid.analytics import presence as presence_module
+from senseid.analytics.presence import SenseidPresenceEventType, SenseidPresenceTracker
+from senseid.parsers.dispatch import parse_rain_report
+
+from .samples import rain_epcs
+
+ENTER, UPDATE, LEAVE = SenseidPresenceEventType.ENTER, SenseidPresenceEventType.UPDATE, SenseidPresenceEventType.LEAVE
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(presence_module, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def tags():
+    return [parse_rain_report(epc) for epc in rain_epcs(3)]
+
+
+def _tracker(events, **kwargs):
+    return SenseidPresenceTracker(events.append, absence_timeout_s=1.0, tick_s=0.1, **kwargs)
+
+
+def test_enter_then_leave_after_the_timeout(clock, tags):
+    events = []
+    tracker = _tracker(events, update_interval_s=None)
+    tracker.report(tags[0], 'portal', 1)
+    assert [(e.kind, e.tag_id, e.reader, e.antenna) for e in events] == [(ENTER, tags[0].id, 'portal', 1)]
+    clock.now += 0.8
+    assert tracker.poll() == 0
+    assert tracker.is_visible(tags[0].id, 'portal', 1)
+    clock.now += 0.4
+    assert tracker.poll() == 1
+    assert events[-1].kind is LEAVE and events[-1].read_count == 1
+    assert len(tracker) == 0
+
+
+def test_reads_postpone_the_leave(clock, tags):
+    events = []
+    tracker = _tracker(events, update_interval_s=None)
+    for _ in range(30):  # read every 0.5 s for 15 s
+        tracker.report(tags[0])
+        clock.now += 0.5
+        tracker.poll()
+    assert [e.kind for e in events] == [ENTER]
+    clock.now += 1.0
+    tracker.poll()
+    assert [e.kind for e in events] == [ENTER, LEAVE]
+    assert events[-1].read_count == 30
+
+
+def test_locations_are_tracked_separately(clock, tags):
+    events = []
+    tracker = _tracker(events, update_interval_s=None)
+    tracker.report(tags[0], 'dock', 1)
+    tracker.report(tags[0], 'dock', 2)
+    tracker.report(tags[1], 'dock', 1)
+    assert len(tracker.visible('dock', 1)) == 2
+    assert len(tracker.visible('dock', 2)) == 1
+    clock.now += 0.6
+    tracker.report(tags[0], 'dock', 2)
+    clock.now += 0.6
+    tracker.poll()
+    assert sorted((e.tag_id, e.antenna) for e in events if e.kind is LEAVE) == \
+           sorted([(tags[0].id, 1), (tags[1].id, 1)])
+    assert tracker.is_visible(tags[0].id, 'dock', 2)
+
+
+def test_update_interval(clock, tags):
+    events = []
+    tracker = _tracker(events, update_interval_s=0.5)
+    for _ in range(10):
+        tracker.report(tags[0])
+        clock.now += 0.1
+    assert [e.kind for e in events] == [ENTER, UPDATE]
+
+
+def test_long_timeouts_cascade_through_the_wheel(clock, tags):
+    events = []
+    tracker = SenseidPresenceTracker(events.append, absence_timeout_s=100.0, tick_s=0.1, update_interval_s=None)
+    tracker.report(tags[0])
+    clock.now += 99.0
+    tracker.poll()
+    assert [e.kind for e in events] == [ENTER]
+    clock.now += 2.0
+    tracker.poll()
+    assert [e.kind for e in events] == [ENTER, LEAVE]
+
+
+def test_flush_sends_leave_for_every_visible_tag(clock, tags):
+    events = []
+    tracker = _tracker(events, update_interval_s=None)
+    for tag in tags:
+        tracker.report(tag)
+    assert tracker.flush() == len(tags)
+    assert [e.kind for e in events].count(LEAVE) == len(tags)
+    assert len(tracker) == 0
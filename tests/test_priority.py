@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.readers import priority as priority_module
+from senseid.readers.dispatcher import SenseidOrderedDispatcher, SenseidOverflowPolicy
+from senseid.readers.priority import SenseidPlainIdPolicy, is_priority_tag
+from senseid.readers.simulated import SenseidSimulatedReader
+
+from .samples import plain_epcs, rain_epcs
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(priority_module, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def sensor_tags():
+    tags = [parse_rain_report(epc) for epc in rain_epcs(5)]
+    assert all(is_priority_tag(tag) for tag in tags)
+    return tags
+
+
+@pytest.fixture
+def plain_tags():
+    tags = [parse_rain_report(epc) for epc in plain_epcs(5)]
+    assert not any(is_priority_tag(tag) for tag in tags)
+    return tags
+
+
+class _Harness:
+    """A reader whose delivery path is driven by hand, with a stubbed
+    backlog."""
+
+    def __init__(self, clock, **kwargs):
+        self.backlog = 0
+        self.delivered = []
+        self.reader = SenseidSimulatedReader()
+        self.shedder = self.reader.set_load_shedding(backlog=lambda: self.backlog, **kwargs)
+        self.shedder.check_interval_s = 0  # re-evaluate on every plain ID
+        self.clock = clock
+
+    def deliver(self, tags):
+        for tag in tags:
+            self.clock.now += 0.001
+            self.reader._deliver_tag(self.delivered.append, tag, time.perf_counter(), None, None)
+
+
+def test_drop_with_hysteresis(clock, sensor_tags, plain_tags):
+    harness = _Harness(clock, high_watermark=100, low_watermark=20, plain_ids=SenseidPlainIdPolicy.DROP,
+                       max_callback_load=None)
+    harness.deliver(plain_tags)
+    assert harness.delivered == plain_tags
+
+    harness.backlog = 100
+    harness.delivered.clear()
+    harness.deliver(plain_tags + sensor_tags)
+    assert harness.delivered == sensor_tags
+
+    harness.backlog = 50  # between the watermarks: still shedding
+    harness.delivered.clear()
+    harness.deliver(plain_tags)
+    assert harness.delivered == []
+
+    harness.backlog = 20
+    harness.deliver(plain_tags)
+    assert harness.delivered == plain_tags
+
+    stats = harness.reader.get_load_shedding_stats()
+    assert (stats.under_pressure, stats.pressure_episodes) == (False, 1)
+    assert stats.plain_ids_dropped == stats.plain_ids_shed == 10
+    assert (stats.plain_ids, stats.priority_tags) == (20, 5)
+    assert harness.reader.get_stats().tags_shed == 10
+
+
+def test_sample(clock, plain_tags):
+    harness = _Harness(clock, high_watermark=10, plain_ids=SenseidPlainIdPolicy.SAMPLE, sample_every=3,
+                       max_callback_load=None)
+    harness.backlog = 10
+    harness.deliver(plain_tags * 3)
+    assert len(harness.delivered) == 5
+    stats = harness.reader.get_load_shedding_stats()
+    assert stats.plain_ids_sampled_out == 10 == harness.reader.get_stats().tags_shed
+
+
+def test_aggregate_delivers_each_id_once_per_interval(clock, plain_tags):
+    harness = _Harness(clock, high_watermark=10, plain_ids=SenseidPlainIdPolicy.AGGREGATE, aggregate_interval_s=1.0,
+                       max_callback_load=None)
+    harness.backlog = 10
+    harness.deliver(plain_tags * 4)
+    assert harness.delivered == plain_tags
+    clock.now += 1.0
+    harness.deliver(plain_tags * 2)
+    assert harness.delivered == plain_tags * 2
+    assert harness.reader.get_load_shedding_stats().plain_ids_aggregated == 20
+
+
+def test_callback_load_starts_the_pressure(clock, plain_tags):
+    harness = _Harness(clock, high_watermark=10, plain_ids=SenseidPlainIdPolicy.DROP, max_callback_load=0.5)
+    harness.deliver(plain_tags[:1])
+    clock.now += 1.0
+    harness.reader._stats.callback_time_s += 0.6  # 60 % of the last second in the callback
+    harness.deliver(plain_tags[1:2])
+    assert harness.delivered == plain_tags[:1]
+    harness.deliver(plain_tags[2:])  # the callback is idle again
+    assert harness.delivered == plain_tags[:1] + plain_tags[2:]
+    stats = harness.reader.get_load_shedding_stats()
+    assert (stats.pressure_episodes, stats.plain_ids_dropped, stats.under_pressure) == (1, 1, False)
+
+
+def test_disabled_with_none():
+    reader = SenseidSimulatedReader()
+    reader.set_load_shedding(10, backlog=lambda: 1000)
+    assert reader.set_load_shedding(None) is None
+    assert reader.get_load_shedding_stats() is None
+
+
+def test_dispatcher_sensor_tags_evict_plain_ids(sensor_tags, plain_tags):
+    release = threading.Event()
+    delivered = []
+
+    def callback(tag):
+        release.wait(5)
+        delivered.append(tag)
+
+    with SenseidOrderedDispatcher(callback, workers=1, max_queue=4, overflow=SenseidOverflowPolicy.DROP_NEWEST,
+                                  priority_lanes=True) as dispatcher:
+        dispatcher(plain_tags[0])
+        deadline = time.monotonic() + 5
+        while dispatcher._shards[0].in_flight != 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        for tag in plain_tags[1:4]:
+            dispatcher(tag)
+        dispatcher(plain_tags[4])   # full: dropped
+        dispatcher(sensor_tags[0])  # full: takes the place of the oldest plain ID
+        release.set()
+    assert delivered == [plain_tags[0], sensor_tags[0], plain_tags[2], plain_tags[3]]
+    stats = dispatcher.get_stats()
+    assert (stats.tags_dropped, stats.priority_tags_queued) == (2, 1)
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pytest
+
+from senseid.parsers import SenseidData, SenseidTag, SenseidTechnologies
+from senseid.sinks import recent as recent_module
+from senseid.sinks.recent import SenseidRecentValues
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(recent_module, 'time', clock)
+    return clock
+
+
+def _tag(tag_id, value, timestamp, magnitude='Temperature'):
+    data = [SenseidData(magnitude=magnitude, magnitude_short=magnitude[0], unit_long='Celsius', unit_short='C',
+                        value=value)]
+    return SenseidTag(technology=SenseidTechnologies.RAIN, fw_version=1, sn=1, id=tag_id, name='Test',
+                      description='', data=data, timestamp=datetime.fromtimestamp(timestamp))
+
+
+def test_ring_wraps_past_capacity(clock):
+    recent = SenseidRecentValues(capacity=4)
+    for n in range(10):
+        recent(_tag('A', float(n), clock.now - 10 + n))
+    assert [value for _, value in recent.values('A', 'Temperature')] == [6.0, 7.0, 8.0, 9.0]
+    assert recent.latest('A', 'Temperature') == (datetime.fromtimestamp(clock.now - 1), 9.0)
+    assert recent.memory_bytes == 4 * 16
+
+
+def test_latest_before_and_after_the_first_wrap(clock):
+    recent = SenseidRecentValues(capacity=3)
+    assert recent.latest('A', 'Temperature') is None
+    for n in range(3):
+        recent(_tag('A', float(n), clock.now))
+        assert recent.latest('A', 'Temperature')[1] == float(n)
+    recent(_tag('A', 3.0, clock.now))
+    assert recent.latest('A', 'Temperature')[1] == 3.0
+
+
+def test_window_stats(clock):
+    recent = SenseidRecentValues(capacity=16)
+    for n, value in enumerate([5.0, 1.0, 3.0, 7.0]):
+        recent(_tag('A', value, clock.now - 40 + 10 * n))  # 40, 30, 20 and 10 s ago
+    stats = recent.window_stats('A', 'Temperature', 35)
+    assert (stats.count, stats.min, stats.max, stats.mean) == (3, 1.0, 7.0, pytest.approx(11 / 3))
+    assert (stats.first, stats.last) == (datetime.fromtimestamp(clock.now - 30), datetime.fromtimestamp(clock.now - 10))
+    assert recent.window_stats('A', 'Temperature', 5) is None
+    assert recent.window_stats('B', 'Temperature', 60) is None
+
+
+def test_scan_above_and_below(clock):
+    recent = SenseidRecentValues()
+    for tag_id, values in (('hot', [6.0, 9.0, 8.5]), ('cold', [1.0, -2.0, 0.5]), ('ok', [4.0, 5.0])):
+        for n, value in enumerate(values):
+            recent(_tag(tag_id, value, clock.now - 30 + n))
+    recent(_tag('stale', 20.0, clock.now - 1000))
+    above = recent.scan('Temperature', above=8.0, window_s=60)
+    assert [(m.tag_id, m.value, m.count) for m in above] == [('hot', 9.0, 2)]
+    assert above[0].timestamp == datetime.fromtimestamp(clock.now - 29)
+    below = recent.scan('Temperature', below=1.0, window_s=60)
+    assert [(m.tag_id, m.value, m.count) for m in below] == [('cold', -2.0, 2)]
+    assert recent.scan('Humidity', above=0.0) == []
+    with pytest.raises(ValueError):
+        recent.scan('Temperature', above=1.0, below=2.0)
+
+
+def test_least_recently_seen_tags_are_evicted_first(clock):
+    recent = SenseidRecentValues(max_series=3)
+    for tag_id in 'ABC':
+        recent(_tag(tag_id, 1.0, clock.now))
+    recent(_tag('A', 2.0, clock.now))  # A is now the most recent
+    recent(_tag('D', 1.0, clock.now))
+    assert recent.tag_ids() == ['C', 'A', 'D']
+    recent(_tag('E', 1.0, clock.now))
+    assert recent.tag_ids() == ['A', 'D', 'E']
+    assert (recent.evicted_tags, recent.series_count) == (2, 3)
+
+
+def test_idle_tags_are_evicted(clock):
+    recent = SenseidRecentValues(idle_timeout_s=60)
+    recent(_tag('A', 1.0, clock.now))
+    clock.now += 30
+    recent(_tag('B', 1.0, clock.now))
+    clock.now += 45
+    recent.evict_idle()
+    assert recent.tag_ids() == ['B']
+    clock.now += 61
+    recent(_tag('C', 1.0, clock.now))  # a report evicts as well
+    assert recent.tag_ids() == ['C']
+    assert recent.evicted_tags == 2
@@ -0,0 +1,94 @@
+import os
+import time
+
+import pytest
+
+from senseid.parsers import SenseidTechnologies
+from senseid.readers import simulated
+from senseid.readers.simulated import SenseidSimulatedReader
+from senseid.transport.ring import SenseidRingConsumer, SenseidRingReader, SenseidRingWriter
+
+from .samples import rain_epcs, senseread_reports
+
+
+@pytest.fixture
+def ring():
+    writer = SenseidRingWriter(f'senseid-test-{os.getpid()}', capacity=64)
+    yield writer
+    writer.close()
+
+
+def test_records_round_trip(ring):
+    index = ring.register_reader('reader-1')
+    with SenseidRingReader(ring.name) as reader:
+        ring.append(index, SenseidTechnologies.RAIN, b'\x01\x02\x03\x04', antenna=2, rssi_dbm=-55.5)
+        ring.append(index, SenseidTechnologies.RAIN, b'\x05\x06', user_mem=b'\xAA\xBB', reader_timestamp=7)
+        first, second = reader.read()
+        assert reader.read() == []
+    assert (first.epc, first.user_mem, first.antenna, first.rssi_dbm, first.reader_id) == \
+           (b'\x01\x02\x03\x04', None, 2, -55.5, 'reader-1')
+    assert (second.epc, second.user_mem, second.reader_timestamp) == (b'\x05\x06', b'\xAA\xBB', 7)
+
+
+def test_slow_reader_loses_the_oldest_records(ring):
+    index = ring.register_reader('reader-1')
+    with SenseidRingReader(ring.name) as reader:
+        for n in range(100):
+            ring.append(index, SenseidTechnologies.RAIN, n.to_bytes(4, 'big'))
+        reports = reader.read(1000)
+        assert reader.dropped == 100 - ring.capacity
+    assert [int.from_bytes(r.epc, 'big') for r in reports] == list(range(100 - ring.capacity, 100))
+
+
+def test_oversized_report_is_not_written(ring):
+    index = ring.register_reader('reader-1')
+    assert not ring.append(index, SenseidTechnologies.RAIN, bytes(ring.slot_size))
+    assert ring.dropped == 1
+
+
+def test_consumer_parses_every_report_until_closed():
+    writer = SenseidRingWriter(f'senseid-test-consumer-{os.getpid()}', capacity=1024)
+    tags = []
+    consumer = SenseidRingConsumer([writer.name], tags.append, from_start=True)
+    try:
+        index = writer.register_reader('reader-1')
+        epcs = rain_epcs(50)
+        reports = senseread_reports(10)
+        for epc in epcs:
+            writer.append(index, SenseidTechnologies.RAIN, bytes.fromhex(epc))
+        for epc, user_mem in reports:
+            writer.append(index, SenseidTechnologies.RAIN, bytes.fromhex(epc), bytes.fromhex(user_mem))
+        consumer.start()
+        writer.close(unlink=False)
+        assert consumer.wait_until_finished(10)
+    finally:
+        consumer.close()
+        writer.close()
+    assert len(tags) == len(epcs) + len(reports)
+    assert all(tag.data is not None for tag in tags[len(epcs):])
+
+
+def test_attached_reader_does_not_parse(monkeypatch):
+    parsed = []
+    parse_rain_report = simulated.parse_rain_report
+    monkeypatch.setattr(simulated, 'parse_rain_report',
+                        lambda *args: parsed.append(args) or parse_rain_report(*args))
+    writer = SenseidRingWriter(f'senseid-test-attach-{os.getpid()}', capacity=4096)
+    reader = SenseidSimulatedReader()
+    reader.connect('SIMULATED?tags=20&seed=5')
+    try:
+        with SenseidRingReader(writer.name, from_start=True) as ring_reader:
+            writer.attach(reader, reader_id='sim-1')
+            deadline = time.monotonic() + 10
+            while reader.get_stats().reports_received < 100 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            writer.detach(reader)
+            reports = ring_reader.read(4096)
+    finally:
+        reader.disconnect()
+        writer.close()
+    assert len(reports) >= 100
+    assert {r.reader_id for r in reports} == {'sim-1'}
+    assert parsed == []
+    stats = reader.get_stats()
+    assert (stats.tags_delivered, stats.parse_failures) == (0, 0)
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from senseid.readers import SenseidReaderConnectionInfo, SupportedSenseidReader
+from senseid.readers.scanner import SenseidReaderScanner
+
+NUR = SupportedSenseidReader.NURAPY
+ZEBRA = SupportedSenseidReader.ZEBRA_LLRP
+
+
+def _info(driver, connection_string):
+    return SenseidReaderConnectionInfo(driver=driver, connection_string=connection_string)
+
+
+@pytest.fixture
+def scanner():
+    found = []
+    scanner = SenseidReaderScanner(notification_callback=found.append)
+    scanner.found = found
+    return scanner
+
+
+def test_readers_are_deduplicated_by_driver_and_connection_string(scanner):
+    scanner._add_reader(_info(NUR, 'COM3'))
+    scanner._add_reader(_info(NUR, 'COM3'))
+    scanner._add_reader(_info(ZEBRA, 'COM3'))  # same string, other driver
+    assert [(c.driver, c.connection_string) for c in scanner.readers] == [(NUR, 'COM3'), (ZEBRA, 'COM3')]
+    assert len(scanner.found) == 2
+    scanner._remove_reader(_info(NUR, 'COM3'))
+    assert [c.driver for c in scanner.get_readers()] == [ZEBRA]
+
+
+def test_assigning_readers_replaces_the_registry(scanner):
+    scanner._add_reader(_info(NUR, 'COM3'))
+    scanner.readers = [_info(ZEBRA, '10.0.0.1'), _info(ZEBRA, '10.0.0.1')]
+    assert [c.connection_string for c in scanner.readers] == ['10.0.0.1']
+    scanner.readers.clear()  # a snapshot: no effect
+    assert len(scanner.readers) == 1
+    scanner.readers = []
+    assert scanner.readers == []
+
+
+def test_wait_for_readers_wakes_when_enough_are_found(scanner):
+    def add_later():
+        for n in range(3):
+            time.sleep(0.05)
+            scanner._add_reader(_info(ZEBRA, f'10.0.0.{n}'))
+        scanner._add_reader(_info(NUR, 'COM3'))
+
+    thread = threading.Thread(target=add_later)
+    thread.start()
+    start = time.monotonic()
+    readers = scanner.wait_for_readers(2, [ZEBRA], timeout_s=5)
+    assert time.monotonic() - start < 1.0
+    assert [c.connection_string for c in readers] == ['10.0.0.0', '10.0.0.1']
+    assert scanner.wait_for_reader_of_type(NUR, timeout_s=5).connection_string == 'COM3'
+    thread.join()
+
+
+def test_wait_for_readers_times_out_with_what_was_found(scanner):
+    scanner._add_reader(_info(ZEBRA, '10.0.0.1'))
+    start = time.monotonic()
+    assert [c.connection_string for c in scanner.wait_for_readers(2, timeout_s=0.1)] == ['10.0.0.1']
+    assert 0.09 <= time.monotonic() - start < 1.0
+    assert scanner.wait_for_reader_of_type(NUR, timeout_s=0.05) is None
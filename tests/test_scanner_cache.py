@@ -0,0 +1,69 @@
+import json
+
+from senseid.readers import SenseidReaderConnectionInfo, SupportedSenseidReader, create_SenseidReader
+from senseid.readers.scanner.cache import DiscoveryCache
+
+SIMULATED = SenseidReaderConnectionInfo(driver=SupportedSenseidReader.SIMULATED, connection_string='SIMULATED')
+
+
+def test_writes_are_debounced(tmp_path):
+    path = str(tmp_path / 'readers.json')
+    cache = DiscoveryCache(path, save_delay_s=60)
+    for n in range(5):
+        cache.add(SenseidReaderConnectionInfo(driver=SupportedSenseidReader.IMPINJ_LLRP,
+                                              connection_string=f'10.0.0.{n}'))
+    assert not (tmp_path / 'readers.json').exists()
+    cache.flush()
+    with open(path) as f:
+        assert len(json.load(f)['readers']) == 5
+    assert len(DiscoveryCache(path).get_readers()) == 5
+
+
+def test_scanned_reader_details_are_recorded(tmp_path):
+    from senseid.readers.scanner import SenseidReaderScanner
+    scanner = SenseidReaderScanner(cache_path=str(tmp_path / 'readers.json'))
+    scanner.discovery_cache.revalidate = lambda on_valid: None
+    for child in (scanner.serial_port_scanner, scanner.multicast_dns_service_discovery_scanner,
+                  scanner.pcsc_scanner, scanner.ws_discovery_scanner):
+        child.start = lambda *args, **kwargs: None
+        child.stop = lambda *args, **kwargs: None
+    scanner.start()
+    try:
+        scanner._add_reader(SIMULATED)
+        reader = create_SenseidReader(SIMULATED)
+        reader.connect('SIMULATED')
+        details = reader.get_details()
+        reader.disconnect()
+    finally:
+        scanner.stop()
+    assert DiscoveryCache(str(tmp_path / 'readers.json')).get_details(SIMULATED) == details
+
+
+def test_save_timer_does_not_block_exit(tmp_path):
+    cache = DiscoveryCache(str(tmp_path / 'readers.json'), save_delay_s=60)
+    cache.add(SIMULATED)
+    assert cache._save_timer.daemon
+    cache.flush()
+    assert cache._save_timer is None and (tmp_path / 'readers.json').exists()
+
+
+def test_failed_check_is_retried_before_eviction(tmp_path):
+    llrp = [SenseidReaderConnectionInfo(driver=SupportedSenseidReader.IMPINJ_LLRP, connection_string=f'10.0.0.{n}')
+            for n in range(3)]
+    cache = DiscoveryCache(str(tmp_path / 'readers.json'), save_delay_s=60)
+    for connection_info in llrp:
+        cache.add(connection_info)
+    answers = {'10.0.0.0': [True], '10.0.0.1': [False, True], '10.0.0.2': [False, False, True]}
+    attempts = []
+
+    def is_alive(connection_info, serial_ports, pcsc_readers):
+        attempts.append(connection_info.connection_string)
+        return answers[connection_info.connection_string].pop(0)
+
+    cache._is_alive = is_alive
+    valid = []
+    cache.revalidate(valid.append)
+    cache.flush()
+    assert sorted(c.connection_string for c in valid) == ['10.0.0.0', '10.0.0.1']
+    assert sorted(attempts) == ['10.0.0.0', '10.0.0.1', '10.0.0.1', '10.0.0.2', '10.0.0.2']
+    assert sorted(c.connection_string for c in cache.get_readers()) == ['10.0.0.0', '10.0.0.1']
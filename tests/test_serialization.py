@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from senseid.parsers.rain.yaml import SENSEID_RAIN_DEF
+from senseid.readers import SenseidReaderDetails, SenseidReaderStats, SupportedSenseidReader, SenseidReaderConnectionInfo
+from senseid.parsers import SenseidTechnologies
+from senseid.serialization import to_dict, to_json, to_json_batch
+
+
+def test_tags_match_to_json(sample_tags):
+    for tag in sample_tags:
+        assert to_json(tag) == tag.to_json()
+
+
+def test_batch_is_a_list_of_the_same_objects(sample_tags):
+    assert json.loads(to_json_batch(sample_tags)) == [json.loads(tag.to_json()) for tag in sample_tags]
+
+
+@pytest.mark.parametrize('obj', [
+    SenseidReaderDetails(model_name='R700', region='ETSI', firmware_version='8.4.1', antenna_count=4,
+                         min_tx_power=10.0, max_tx_power=33.0, technology=SenseidTechnologies.RAIN),
+    SenseidReaderStats(reports_received=3, queue_depth=None),
+    SenseidReaderConnectionInfo(driver=SupportedSenseidReader.SIMULATED, connection_string='SIMULATED'),
+])
+def test_reader_objects_match_to_json(obj):
+    assert to_json(obj) == obj.to_json()
+
+
+def test_definitions_are_serializable():
+    assert to_dict(SENSEID_RAIN_DEF)['types']
+
+
+def test_non_dataclass_is_rejected():
+    with pytest.raises(TypeError):
+        to_json({'a': 1})
@@ -0,0 +1,23 @@
+import threading
+import time
+
+from senseid.readers.simulated import SenseidSimulatedReader
+
+
+def test_stop_from_notification_callback():
+    reader = SenseidSimulatedReader()
+    reader.connect('SIMULATED?tags=5&seed=1')
+    stopped = threading.Event()
+
+    def on_tag(tag):
+        start = time.monotonic()
+        reader.stop_inventory_async()
+        assert time.monotonic() - start < 0.5
+        stopped.set()
+
+    try:
+        reader.start_inventory_async(on_tag)
+        assert stopped.wait(5)
+        assert reader._thread is None
+    finally:
+        reader.disconnect()
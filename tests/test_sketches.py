@@ -0,0 +1,109 @@
+import random
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from senseid.analytics import sketches as sketches_module
+from senseid.analytics.sketches import SenseidHyperLogLog, SenseidPopulationTracker, SenseidSpaceSaving
+
+
+def _ids(start, n):
+    return [f'E280{i:020X}' for i in range(start, start + n)]
+
+
+@pytest.mark.parametrize('n', [10, 1000, 50000])
+def test_hyperloglog_count_within_error(n):
+    sketch = SenseidHyperLogLog(precision=12)
+    sketch.update(_ids(0, n))
+    sketch.update(_ids(0, n))  # repeats do not count
+    # Three standard errors
+    assert sketch.count() == pytest.approx(n, rel=3 * 1.04 / 64, abs=1)
+
+
+def test_hyperloglog_merge_counts_the_union():
+    first, second = SenseidHyperLogLog(), SenseidHyperLogLog()
+    first.update(_ids(0, 30000))
+    second.update(_ids(20000, 30000))
+    merged = first.copy()
+    merged.merge(second)
+    assert merged.count() == pytest.approx(50000, rel=0.05)
+    assert first.count() == pytest.approx(30000, rel=0.05)  # copy() left it alone
+    with pytest.raises(ValueError):
+        first.merge(SenseidHyperLogLog(precision=10))
+
+
+def test_space_saving_evicts_the_actual_smallest_count():
+    top = SenseidSpaceSaving(k=2)
+    top.add('a')
+    top.add('b')
+    top.add('a', 3)  # the heap entry of 'a' still says 1
+    top.add('c')
+    assert top.top() == [('a', 4, 0), ('c', 2, 1)]
+
+
+def test_space_saving_error_bounds():
+    rng = random.Random(1)
+    heavy = {f'heavy-{i}': 500 - 50 * i for i in range(5)}
+    stream = [item for item, count in heavy.items() for _ in range(count)]
+    stream += [f'light-{rng.randrange(2000)}' for _ in range(3000)]
+    rng.shuffle(stream)
+    top = SenseidSpaceSaving(k=20)
+    for item in stream:
+        top.add(item)
+    exact = Counter(stream)
+    assert top.total == len(stream) and len(top) == 20
+    for item, count, error in top.top():
+        assert count - error <= exact[item] <= count
+    # Anything above total / k is tracked
+    tracked = {item for item, _, _ in top.top()}
+    assert {item for item, count in exact.items() if count > len(stream) / 20} <= tracked
+    assert [item for item, _, _ in top.top(5)] == list(heavy)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0 - 1_700_000_000.0 % 60
+
+    def time(self):
+        return self.now
+
+
+def test_population_intervals_roll(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(sketches_module, 'time', clock)
+    population = SenseidPopulationTracker(interval_s=60, top_k=2, history=5)
+    for tag_id in ['A', 'B', 'A', 'C', 'A']:
+        population.add(tag_id, 'dock-1')
+    stats = population.get_stats('dock-1')
+    assert (stats.current.reads, stats.current.distinct_tags, stats.history) == (5, 3, [])
+    assert stats.current.top_tags[0].tag_id == 'A' and stats.current.top_tags[0].reads == 3
+
+    clock.now += 60
+    population.add('D', 'dock-1')
+    clock.now += 3 * 60  # two minutes without reads
+    population.add('D', 'dock-1')
+    stats = population.get_stats('dock-1')
+    assert [(i.start, i.reads, i.distinct_tags) for i in stats.history] == [
+        (datetime.fromtimestamp(clock.now - 4 * 60), 5, 3),
+        (datetime.fromtimestamp(clock.now - 3 * 60), 1, 1),
+        (datetime.fromtimestamp(clock.now - 2 * 60), 0, 0),
+        (datetime.fromtimestamp(clock.now - 60), 0, 0)]
+    assert (stats.current.reads, stats.reads_total, stats.distinct_tags_total) == (1, 7, 4)
+
+    clock.now += 1000 * 60  # a long pause only keeps `history` intervals
+    stats = population.get_stats('dock-1')
+    assert len(stats.history) == 5
+    assert [i.start for i in stats.history] == [datetime.fromtimestamp(clock.now - n * 60) for n in range(5, 0, -1)]
+    assert stats.current.reads == 0
+
+
+def test_distinct_tags_across_readers():
+    population = SenseidPopulationTracker()
+    for tag_id in _ids(0, 100):
+        population.add(tag_id, 'dock-1')
+    for tag_id in _ids(50, 100):
+        population.add(tag_id, 'dock-2')
+    assert population.distinct_tags() == pytest.approx(150, abs=3)
+    assert population.distinct_tags(['dock-2']) == pytest.approx(100, abs=2)
+    assert population.distinct_tags(['dock-3']) == 0
@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.sinks.sqlite import SenseidSqliteSink
+
+from .samples import plain_epcs, rain_epcs
+
+
+def _sensor_tag(timestamp, epc=rain_epcs(1)[0]):
+    tag = parse_rain_report(epc)
+    tag.timestamp = timestamp
+    return tag
+
+
+def _wait_for(condition, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_readings_are_stored_and_queried(tmp_path):
+    now = datetime.now().replace(microsecond=0)
+    with SenseidSqliteSink(str(tmp_path / 'readings.db'), flush_interval_s=0.01) as sink:
+        tags = [_sensor_tag(now + timedelta(seconds=s)) for s in range(5)]
+        for tag in tags:
+            sink(tag)
+        sink(parse_rain_report(plain_epcs(1)[0]))  # no sensor data: not stored
+        assert sink.flush(5)
+        tag_id = tags[0].id
+        assert sink.tag_ids() == [tag_id]
+        readings = sink.query(tag_id, start=now + timedelta(seconds=1), end=now + timedelta(seconds=3))
+        per_tag = len(tags[0].data)
+        assert len(readings) == 2 * per_tag
+        assert {r.timestamp for r in readings} == {now + timedelta(seconds=1), now + timedelta(seconds=2)}
+
+
+def test_readings_in_the_same_microsecond_are_kept(tmp_path):
+    now = datetime.now()
+    with SenseidSqliteSink(str(tmp_path / 'readings.db'), flush_interval_s=60) as sink:
+        sink(_sensor_tag(now))
+        assert sink.flush(5)
+        for _ in range(2):  # clashes with the stored reading and within the batch
+            sink(_sensor_tag(now))
+        assert sink.flush(5)
+        per_tag = len(_sensor_tag(now).data)
+        readings = sink.query(sink.tag_ids()[0])
+        assert len(readings) == 3 * per_tag
+        assert sorted({r.timestamp for r in readings}) == [now + timedelta(microseconds=n) for n in range(3)]
+        assert sink.readings_shifted == 2 * per_tag
+
+
+def test_flush_waits_for_the_writer(tmp_path):
+    with SenseidSqliteSink(str(tmp_path / 'readings.db'), flush_interval_s=60) as sink:
+        assert sink.flush(0)  # nothing queued
+        sink(_sensor_tag(datetime.now()))
+        assert sink.flush(5)  # wakes the writer instead of waiting for the interval
+        assert sink.readings_written == len(_sensor_tag(datetime.now()).data)
+        started = threading.Event()
+        real_insert = sink._insert
+        release = threading.Event()
+
+        def slow_insert(rows):
+            started.set()
+            release.wait(5)
+            real_insert(rows)
+
+        sink._insert = slow_insert
+        sink(_sensor_tag(datetime.now() + timedelta(seconds=1)))
+        sink._wakeup.set()
+        assert started.wait(5)
+        assert not sink.flush(0.05)
+        threading.Timer(0.05, release.set).start()
+        assert sink.flush(5)
+
+
+def test_retention_by_age(tmp_path):
+    now = datetime.now()
+    with SenseidSqliteSink(str(tmp_path / 'readings.db'), retention_s=3600, flush_interval_s=0.01,
+                           retention_check_s=0.05) as sink:
+        old = [_sensor_tag(now - timedelta(hours=2, seconds=s)) for s in range(10)]
+        recent = [_sensor_tag(now - timedelta(seconds=s)) for s in range(10)]
+        for tag in old + recent:
+            sink(tag)
+        assert sink.flush(5)
+        assert _wait_for(lambda: sink.readings_deleted)
+        readings = sink.query(old[0].id)
+        assert readings and min(r.timestamp for r in readings) >= now - timedelta(hours=1)
+        assert sink.readings_deleted == len(old) * len(old[0].data)
+
+
+def _data_size(path):
+    with closing(sqlite3.connect(path)) as connection:
+        pages = [connection.execute(f'PRAGMA {name}').fetchone()[0]
+                 for name in ('page_count', 'freelist_count', 'page_size')]
+    return (pages[0] - pages[1]) * pages[2]
+
+
+def test_retention_by_size(tmp_path):
+    path = str(tmp_path / 'readings.db')
+    start = datetime.now() - timedelta(days=1)
+    with SenseidSqliteSink(path, max_size_bytes=64 * 1024, flush_interval_s=0.01,
+                           retention_check_s=0.05) as sink:
+        epcs = rain_epcs(50)
+        for n in range(20000):
+            sink(_sensor_tag(start + timedelta(milliseconds=n), epcs[n % len(epcs)]))
+        assert sink.flush(30)
+        # Wait for a retention pass after the last write
+        assert _wait_for(lambda: _data_size(path) <= 64 * 1024, 10)
+    with SenseidSqliteSink(path) as sink:
+        assert sink._data_size() <= 64 * 1024
+        remaining = [r.timestamp for tag_id in sink.tag_ids() for r in sink.query(tag_id)]
+    # The oldest readings went first
+    assert remaining and min(remaining) > start
+
+
+def test_backlog_beyond_the_limit_is_dropped(tmp_path):
+    sink = SenseidSqliteSink(str(tmp_path / 'readings.db'), flush_interval_s=60, batch_size=1000,
+                             max_pending_tags=3)
+    try:
+        for n in range(5):
+            sink(_sensor_tag(datetime.now() + timedelta(seconds=n)))
+        assert sink.dropped == 2
+    finally:
+        sink.close()
@@ -0,0 +1,95 @@
+import pytest
+
+from senseid import trace as trace_module
+from senseid.parsers.dispatch import parse_rain_report
+from senseid.readers.simulated import SenseidSimulatedReader
+from senseid.trace import TRACE, SenseidTrace
+
+from .samples import rain_epcs
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(trace_module, 'time', clock)
+    return clock
+
+
+def test_disabled_records_nothing():
+    trace = SenseidTrace()
+    trace.record('test', 'event %d', 1)
+    assert len(trace) == 0
+
+
+def test_ring_keeps_the_last_events():
+    trace = SenseidTrace()
+    trace.enable(capacity=5)
+    for n in range(12):
+        trace.record('test', 'event %d', n)
+    assert [event.args for event in trace.events()] == [(n,) for n in range(7, 12)]
+    lines = trace.dump(clear=True)
+    assert len(lines) == 5 and lines[0].endswith('test: event 7')
+    assert len(trace) == 0
+
+
+def test_sampling_keeps_one_in_n():
+    trace = SenseidTrace()
+    trace.enable(sample_every=10)
+    for n in range(100):
+        trace.record('test', 'event %d', n)
+    assert [event.args[0] for event in trace.events()] == list(range(9, 100, 10))
+    with pytest.raises(ValueError):
+        trace.enable(sample_every=0)
+
+
+def test_rate_limit(clock):
+    trace = SenseidTrace()
+    trace.enable(max_per_s=10)
+    for n in range(30):
+        trace.record('test', 'event %d', n)
+    assert (len(trace), trace.dropped) == (10, 20)
+    clock.now += 0.5  # refills half the bucket
+    for n in range(30):
+        trace.record('test', 'event %d', n)
+    assert (len(trace), trace.dropped) == (15, 45)
+
+
+def test_resizing_keeps_the_newest_events():
+    trace = SenseidTrace()
+    trace.enable(capacity=10)
+    for n in range(10):
+        trace.record('test', 'event %d', n)
+    trace.enable(capacity=3)
+    assert [event.args[0] for event in trace.events()] == [7, 8, 9]
+
+
+def test_bad_format_arguments_are_shown_raw():
+    trace = SenseidTrace()
+    trace.enable()
+    trace.record('test', 'two %s %s', 'args')
+    assert trace.dump()[0].endswith("test: two %s %s ('args',)")
+
+
+def test_reader_reports_are_traced():
+    reader = SenseidSimulatedReader()
+    reader.notification_callback = lambda tag: None
+    TRACE.enable(capacity=10)
+    try:
+        epc = rain_epcs(1)[0]
+        reader._deliver(parse_rain_report, epc)
+        events = TRACE.events()
+    finally:
+        TRACE.disable()
+        TRACE.clear()
+    assert [(event.source, event.args[0]) for event in events] == [('SenseidSimulatedReader', epc)]
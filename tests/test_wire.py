@@ -0,0 +1,42 @@
+import pytest
+
+from senseid.transport.wire import SenseidWireDecoder, SenseidWireEncoder
+
+
+def _assert_same(decoded, original):
+    assert type(decoded) is type(original)
+    for field in ('technology', 'id', 'sn', 'fw_version', 'name', 'description', 'datasheet_url', 'store_url',
+                  'timestamp'):
+        assert getattr(decoded, field) == getattr(original, field), field
+    if original.data is None:
+        assert decoded.data is None
+        return
+    assert [(d.magnitude, d.unit_short) for d in decoded.data] == [(d.magnitude, d.unit_short) for d in original.data]
+    assert [d.value for d in decoded.data] == pytest.approx([d.value for d in original.data], rel=1e-5)
+
+
+def test_round_trip(sample_tags):
+    payload = SenseidWireEncoder().encode_batch(sample_tags)
+    decoded = SenseidWireDecoder().feed(payload)
+    assert len(decoded) == len(sample_tags)
+    for tag, original in zip(decoded, sample_tags):
+        _assert_same(tag, original)
+
+
+def test_any_split_of_the_stream(sample_tags):
+    payload = SenseidWireEncoder().encode_batch(sample_tags)
+    decoder = SenseidWireDecoder()
+    decoded = []
+    for i in range(0, len(payload), 7):
+        decoded += decoder.feed(payload[i:i + 7])
+    assert [t.id for t in decoded] == [t.id for t in sample_tags]
+
+
+def test_dictionaries_reset_when_full(sample_tags):
+    encoder = SenseidWireEncoder(max_strings=16)
+    decoder = SenseidWireDecoder()
+    decoded = []
+    for tag in sample_tags:
+        decoded += decoder.feed(encoder.encode(tag))
+    for tag, original in zip(decoded, sample_tags):
+        _assert_same(tag, original)
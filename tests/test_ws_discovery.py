@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+from senseid.readers import SupportedSenseidReader
+from senseid.readers.scanner.ws_discovery import WsDiscoveryScanner
+
+HELLO = """<?xml version="1.0" encoding="UTF-8"?>
+<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://www.w3.org/2003/05/soap-envelope"
+    xmlns:wsa="http://schemas.xmlsoap.org/ws/2004/08/addressing"
+    xmlns:d="http://schemas.xmlsoap.org/ws/2005/04/discovery" xmlns:rdmp="urn:iso:std:iso-iec:24791:-3">
+  <SOAP-ENV:Header>
+    <wsa:To>urn:schemas-xmlsoap-org:ws:2005:04:discovery</wsa:To>
+    <wsa:Action>http://schemas.xmlsoap.org/ws/2005/04/discovery/Hello</wsa:Action>
+    <wsa:MessageID>urn:uuid:0d2c8bd2-3e4f-4b1a-9a43-1b2f4c0d9e11</wsa:MessageID>
+  </SOAP-ENV:Header>
+  <SOAP-ENV:Body>
+    <d:Hello>
+      <wsa:EndpointReference><wsa:Address>urn:uuid:84f0a9e8-fx9600-000001</wsa:Address></wsa:EndpointReference>
+      <d:Types>rdmp:rdmpdev</d:Types>
+      <d:Scopes>http://www.zebra.com/FX9600</d:Scopes>
+      <d:XAddrs>http://192.168.1.50:80/rdmp http://[fe80::1]/rdmp</d:XAddrs>
+      <d:MetadataVersion>1</d:MetadataVersion>
+    </d:Hello>
+  </SOAP-ENV:Body>
+</SOAP-ENV:Envelope>"""
+
+PROBE_MATCHES = """<?xml version="1.0" encoding="UTF-8"?>
+<s:Envelope xmlns:s="http://www.w3.org/2003/05/soap-envelope"
+    xmlns:a="http://schemas.xmlsoap.org/ws/2004/08/addressing"
+    xmlns:wsd="http://schemas.xmlsoap.org/ws/2005/04/discovery">
+  <s:Header>
+    <a:Action>http://schemas.xmlsoap.org/ws/2005/04/discovery/ProbeMatches</a:Action>
+    <a:RelatesTo>urn:uuid:1</a:RelatesTo>
+  </s:Header>
+  <s:Body>
+    <wsd:ProbeMatches>
+      <wsd:ProbeMatch>
+        <a:EndpointReference><a:Address>urn:uuid:fx7500-000002</a:Address></a:EndpointReference>
+        <wsd:Types>dn:NetworkVideoTransmitter rdmp:ISO24791-3</wsd:Types>
+        <wsd:XAddrs>http://reader.local/rdmp</wsd:XAddrs>
+      </wsd:ProbeMatch>
+    </wsd:ProbeMatches>
+  </s:Body>
+</s:Envelope>"""
+
+BYE = """<s:Envelope xmlns:s="http://www.w3.org/2003/05/soap-envelope"
+    xmlns:a="http://schemas.xmlsoap.org/ws/2004/08/addressing"
+    xmlns:d="http://schemas.xmlsoap.org/ws/2005/04/discovery">
+  <s:Header><a:Action>http://schemas.xmlsoap.org/ws/2005/04/discovery/Bye</a:Action></s:Header>
+  <s:Body><d:Bye><a:EndpointReference><a:Address>urn:uuid:84f0a9e8-fx9600-000001</a:Address>
+  </a:EndpointReference></d:Bye></s:Body>
+</s:Envelope>"""
+
+# A printer: RFID keywords only outside Types/Scopes/XAddrs must not match
+PRINTER_HELLO = HELLO.replace('rdmp:rdmpdev', 'wprt:PrintDeviceType') \
+    .replace('http://www.zebra.com/FX9600', 'http://printers/floor-2')
+
+
+@pytest.fixture
+def scanner():
+    found, removed = [], []
+    scanner = WsDiscoveryScanner(found.append, removed.append)
+    scanner.found, scanner.removed = found, removed
+    return scanner
+
+
+def test_parse_fields_with_any_prefix():
+    fields = WsDiscoveryScanner._parse_fields(PROBE_MATCHES)
+    assert fields['Action'] == ['http://schemas.xmlsoap.org/ws/2005/04/discovery/ProbeMatches']
+    assert fields['Address'] == ['urn:uuid:fx7500-000002']
+    assert fields['Types'] == ['dn:NetworkVideoTransmitter rdmp:ISO24791-3']
+    assert 'Scopes' not in fields
+
+
+def test_ip_from_xaddrs():
+    xaddrs = ['http://[fe80::1]/rdmp http://192.168.1.50:80/rdmp']
+    assert WsDiscoveryScanner._ip_from_xaddrs(xaddrs) == '192.168.1.50'
+    assert WsDiscoveryScanner._ip_from_xaddrs(['http://reader.local/rdmp']) is None
+    assert WsDiscoveryScanner._ip_from_xaddrs([]) is None
+
+
+def test_hello_then_bye(scanner):
+    scanner._handle_message(HELLO, '10.0.0.9')
+    scanner._handle_message(HELLO, '10.0.0.9')  # repeated announcement
+    assert [(c.driver, c.connection_string) for c in scanner.found] == \
+           [(SupportedSenseidReader.ZEBRA_LLRP, '192.168.1.50')]  # XAddrs wins over the sender
+    scanner._handle_message(BYE, '10.0.0.9')
+    assert [c.connection_string for c in scanner.removed] == ['192.168.1.50']
+    scanner._handle_message(BYE, '10.0.0.9')
+    assert len(scanner.removed) == 1
+
+
+def test_probe_match_without_ipv4_xaddr_uses_the_sender(scanner):
+    scanner._handle_message(PROBE_MATCHES, '10.0.0.7')
+    assert [c.connection_string for c in scanner.found] == ['10.0.0.7']
+
+
+def test_other_devices_and_actions_are_ignored(scanner):
+    scanner._handle_message(PRINTER_HELLO, '10.0.0.3')
+    scanner._handle_message(HELLO.replace('/Hello<', '/Probe<'), '10.0.0.4')
+    assert scanner.found == []
+
+
+def _scanner(monkeypatch, probes, interval_min, interval_max):
+    scanner = WsDiscoveryScanner(lambda info: None)
+    monkeypatch.setattr(scanner, '_get_local_ips', lambda: ['127.0.0.1'])
+    monkeypatch.setattr(scanner, '_send_probes', lambda: probes.append(time.monotonic()))
+    scanner._probe_interval_min = interval_min
+    scanner._probe_interval_max = scanner._probe_interval_no_listener = interval_max
+    return scanner
+
+
+def test_probes_back_off(monkeypatch):
+    probes = []
+    scanner = _scanner(monkeypatch, probes, 0.02, 0.08)
+    scanner.start()
+    time.sleep(0.5)
+    scanner.stop()
+    gaps = [b - a for a, b in zip(probes, probes[1:])]
+    assert 4 <= len(probes) <= 12
+    assert gaps[0] < gaps[1] < gaps[2]
+    assert gaps[-1] == pytest.approx(0.08, abs=0.05)
+
+
+def test_stop_wakes_the_loop(monkeypatch):
+    probes = []
+    scanner = _scanner(monkeypatch, probes, 60, 60)
+    scanner.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    scanner.stop()
+    assert time.monotonic() - start < 1.0
+    assert len(probes) == 1
+    assert scanner._thread is None and scanner._probe_socks == {}